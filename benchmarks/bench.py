@@ -0,0 +1,330 @@
+"""
+Benchmarks for the calculation hot paths.
+
+Each benchmark case is timed over several repetitions, and its peak memory
+allocation is measured (via `tracemalloc`, which also tracks numpy's array
+allocations) in a separate run. The results are written to a JSON file, which
+can be compared against that of another commit.
+
+Run from the repository root:
+
+    python -m benchmarks.bench run --output results.json
+    python -m benchmarks.bench compare old.json new.json
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import scipy
+import scipy.signal
+
+from bsvp import quat
+import bsvp.calc
+from common_utils.nre_utils.calc import filters, integrate, psd, shock
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SIGNAL_LENGTHS = [10 ** 4, 10 ** 5, 10 ** 6]
+SAMPLE_RATES = [1000, 20000]
+BINS_PER_OCTAVE = [3, 12]
+FILENAMES = [
+    os.path.join(REPO_ROOT, "tests", "SSX70065.IDE"),
+    os.path.join(REPO_ROOT, "tests", "test1.IDE"),
+]
+
+
+def _accel(length):
+    return np.random.default_rng(0).standard_normal((3, length))
+
+
+def _quats(length):
+    q = np.random.default_rng(0).standard_normal((length, 4))
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+
+def _psd(length, fs):
+    return scipy.signal.welch(
+        _accel(length), fs=fs, nperseg=min(length, fs), window="hanning"
+    )
+
+
+def iter_cases(quick=False):
+    """
+    Generate the benchmark cases.
+
+    :return: an iterable of (name, parameters, setup) tuples; `setup()`
+        prepares any inputs, and returns the function to be benchmarked
+    """
+    lengths = SIGNAL_LENGTHS[:2] if quick else SIGNAL_LENGTHS
+
+    for length, fs in itertools.product(lengths, SAMPLE_RATES):
+        params = dict(length=length, fs=fs)
+
+        def setup(length=length, fs=fs):
+            x = _accel(length)
+            return lambda: filters.highpass(x, fs=fs, cutoff=1, axis=-1)
+
+        yield "filters.highpass", params, setup
+
+        def setup(length=length, fs=fs):
+            x = _accel(length)
+            return lambda: integrate._integrate(x, dt=1 / fs, axis=-1)
+
+        yield "integrate._integrate", params, setup
+
+        def setup(length=length, fs=fs):
+            x = _accel(length)
+            return lambda: scipy.signal.welch(  # as configured in `_PSDData`
+                x,
+                fs=fs,
+                nperseg=int(np.ceil(fs / 1)),
+                window="hanning",
+                average="median",
+                axis=-1,
+            )
+
+        yield "scipy.signal.welch", params, setup
+
+        def setup(length=length, fs=fs):
+            q = _quats(length)
+            return lambda: quat.quat_to_angvel(q, 1 / fs)
+
+        yield "quat.quat_to_angvel", params, setup
+
+    for length, fs, bins_per_octave in itertools.product(
+        lengths[:2], SAMPLE_RATES, BINS_PER_OCTAVE
+    ):
+        params = dict(length=length, fs=fs, bins_per_octave=bins_per_octave)
+
+        def setup(length=length, fs=fs, bins_per_octave=bins_per_octave):
+            x = _accel(length)
+            freqs = 2 ** np.arange(0, np.log2(fs / 2), 1 / bins_per_octave)
+            return lambda: shock.pseudo_velocity(
+                x, freqs, dt=1 / fs, damp=0.05, axis=-1
+            )
+
+        yield "shock.pseudo_velocity", params, setup
+
+        for update_len in [2 ** 7, 2 ** 12]:
+
+            def setup(
+                length=length,
+                fs=fs,
+                bins_per_octave=bins_per_octave,
+                update_len=update_len,
+            ):
+                x = _accel(length)
+                freqs = 2 ** np.arange(0, np.log2(fs / 2), 1 / bins_per_octave)
+
+                def run():
+                    extrema = shock.RelDisplExtrema(
+                        2 * np.pi * freqs, dt=1 / fs, damp=0.05
+                    )
+                    for i in range(0, length, update_len):
+                        extrema.update(x[:, i : i + update_len])
+
+                return run
+
+            yield "shock.RelDisplExtrema.update", dict(
+                params, update_len=update_len
+            ), setup
+
+        def setup(length=length, fs=fs, bins_per_octave=bins_per_octave):
+            f, a_psd = _psd(length, fs)
+            return lambda: psd.to_octave(
+                f, a_psd, fstart=1, octave_bins=bins_per_octave
+            )
+
+        yield "psd.to_octave", params, setup
+
+        def setup(length=length, fs=fs, bins_per_octave=bins_per_octave):
+            f, a_psd = _psd(length, fs)
+            freq_splits = 2 ** np.arange(0, np.log2(fs / 2), 1 / bins_per_octave)
+            return lambda: psd.to_jagged(f, a_psd, freq_splits)
+
+        yield "psd.to_jagged", params, setup
+
+    for filename, block_len in itertools.product(FILENAMES, [None, 2 ** 16]):
+        params = dict(filename=os.path.basename(filename), block_len=block_len)
+
+        def setup(filename=filename, block_len=block_len):
+            builder = (
+                bsvp.calc.GetDataBuilder(accel_highpass_cutoff=1, block_len=block_len)
+                .add_psd(freq_bin_width=1)
+                .add_pvss(init_freq=1, bins_per_octave=12)
+                .add_metrics()
+                .add_peaks(margin_len=100)
+                .add_vc_curves(init_freq=1, bins_per_octave=3)
+            )
+
+            def run():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    builder._get_data(filename)
+
+            return run
+
+        yield "GetDataBuilder._get_data", params, setup
+
+
+def measure(func, repeat):
+    """
+    Measure the wall time & peak memory allocation of a function.
+
+    :return: the minimum & median wall times (in seconds) over `repeat` calls,
+        and the peak memory allocation (in bytes) of one call
+    """
+    tracemalloc.start()
+    try:
+        func()
+        _current, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    wall_times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        wall_times.append(time.perf_counter() - t0)
+
+    return min(wall_times), float(np.median(wall_times)), peak_memory
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(output, repeat=3, quick=False, match=None):
+    """Run the benchmarks, and write the results to a JSON file."""
+    results = []
+    for name, params, setup in iter_cases(quick=quick):
+        if match is not None and match not in name:
+            continue
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            wall_time_min, wall_time_median, peak_memory = measure(setup(), repeat)
+        results.append(
+            dict(
+                name=name,
+                params=params,
+                wall_time_min=wall_time_min,
+                wall_time_median=wall_time_median,
+                peak_memory=peak_memory,
+            )
+        )
+        print(
+            f"{name} {params}: {wall_time_min:.4g} s, "
+            f"{peak_memory / 2 ** 20:.4g} MiB"
+        )
+
+    with open(output, "w") as file:
+        json.dump(
+            dict(
+                meta=dict(
+                    commit=_git_commit(),
+                    timestamp=time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    platform=platform.platform(),
+                    python=platform.python_version(),
+                    numpy=np.__version__,
+                    scipy=scipy.__version__,
+                    repeat=repeat,
+                ),
+                results=results,
+            ),
+            file,
+            indent=2,
+        )
+
+
+def compare(baseline, candidate, threshold=1.1):
+    """
+    Compare two benchmark result files.
+
+    :return: the number of cases in which the candidate's wall time or peak
+        memory exceeds the baseline's by more than the threshold ratio
+    """
+
+    def load(filename):
+        with open(filename) as file:
+            results = json.load(file)["results"]
+        return {
+            (result["name"], json.dumps(result["params"], sort_keys=True)): result
+            for result in results
+        }
+
+    baseline, candidate = load(baseline), load(candidate)
+
+    regressions = 0
+    for key in sorted(baseline.keys() & candidate.keys()):
+        time_ratio = candidate[key]["wall_time_min"] / baseline[key]["wall_time_min"]
+        memory_ratio = candidate[key]["peak_memory"] / max(
+            baseline[key]["peak_memory"], 1
+        )
+        is_regression = time_ratio > threshold or memory_ratio > threshold
+        regressions += is_regression
+
+        name, params = key
+        print(
+            f"{'!' if is_regression else ' '} {name} {params}: "
+            f"time x{time_ratio:.3f}, memory x{memory_ratio:.3f}"
+        )
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parser_run = subparsers.add_parser("run", help="run the benchmarks")
+    parser_run.add_argument("--output", default="benchmark_results.json")
+    parser_run.add_argument("--repeat", type=int, default=3)
+    parser_run.add_argument(
+        "--quick", action="store_true", help="skip the largest signal lengths"
+    )
+    parser_run.add_argument(
+        "--match", help="only run benchmarks whose names contain this string"
+    )
+
+    parser_compare = subparsers.add_parser(
+        "compare", help="compare two benchmark result files"
+    )
+    parser_compare.add_argument("baseline")
+    parser_compare.add_argument("candidate")
+    parser_compare.add_argument(
+        "--threshold",
+        type=float,
+        default=1.1,
+        help="the ratio above which a change is flagged as a regression",
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        run(args.output, repeat=args.repeat, quick=args.quick, match=args.match)
+    else:
+        regressions = compare(args.baseline, args.candidate, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
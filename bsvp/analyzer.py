@@ -1,4 +1,5 @@
 from functools import wraps
+from collections import namedtuple
 import logging
 import sys
 import warnings
@@ -13,9 +14,15 @@ import numpy as np
 import scipy.signal
 import pandas as pd
 
-from bsvp import quat
+from bsvp import perf, quat, scratch, streaming
 from common_utils.nre_utils import ide_utils
-from common_utils.nre_utils.calc import psd, stats, shock, integrate, filters
+from common_utils.nre_utils.calc import psd, stats, shock, filters
+
+
+SegmentData = namedtuple(
+    "SegmentData",
+    "start_times, metric_names, metrics, psd_freqs, psd, vc_freqs, vc",
+)
 
 
 def as_series(
@@ -117,14 +124,64 @@ class Analyzer:
         accel_end_margin,
         psd_freq_bin_width,
         psd_window="hanning",
+        psd_average="median",
+        psd_median_rtol=None,
         pvss_init_freq,
         pvss_bins_per_octave,
         vc_init_freq,
         vc_bins_per_octave,
+        block_len=None,
+        segment_duration=None,
+        scratch_dir=None,
+        integral_rms_method="time",
+        dtype="float64",
+        peak_top_k=1,
+        peak_min_separation=0,
     ):
         """
         Copies out the numpy arrays for the highest priority channel for each
         sensor type, and any relevant metadata.  Cuts them into chunks.
+
+        :param psd_average: the method for averaging the PSD's segments, either
+            "median" or "mean"
+        :param psd_median_rtol: if set, a "median" PSD average is approximated
+            to within this relative error in bounded memory (see
+            `streaming.MedianSketch`), instead of holding the spectra of all
+            segments in memory
+        :param block_len: if set, the acceleration analyses are streamed over
+            blocks of this many samples, instead of loading the whole channel
+            into memory at once
+        :param segment_duration: the duration (in seconds) of the time
+            segments used in the per-segment analyses
+        :param scratch_dir: if set, the full-length acceleration array is
+            stored in a memory-mapped temporary file in this directory, instead
+            of in memory; the file is deleted on `close`, or once the analyzer
+            is garbage-collected
+        :param integral_rms_method: how the RMS velocity & displacement are
+            calculated; either "time", by integrating the acceleration in the
+            time domain, or "spectral", from the acceleration PSD over the band
+            above the highpass cutoff
+        :param dtype: the floating-point type of the full-length acceleration
+            array, either "float64" or "float32"; all reductions over the
+            acceleration (& its integrals) are still accumulated in double
+            precision. Single precision halves the memory & bandwidth of the
+            acceleration analyses (the full-length array is then filled block
+            by block, so double-precision data is only ever held one block at
+            a time); over the test recordings, its results agree
+            with those in double precision to within these relative errors:
+
+              - RMS & peak acceleration, RMS velocity, PVSS: 1e-6
+              - RMS displacement: 1e-5
+              - PSD & VC curves: 1e-6 (relative to their maxima)
+
+            The data is rounded only after both (double-precision) passes of
+            the highpass filter; without a highpass filter, the errors grow in
+            proportion to any static offset (e.g., gravity) relative to the
+            vibration level.
+        :param peak_top_k: the number of acceleration peaks found per axis &
+            in the resultant
+        :param peak_min_separation: the minimum separation (in samples) of the
+            acceleration peaks; see `streaming.PeakTracker`
         """
         if accel_start_time is not None and accel_start_margin is not None:
             raise ValueError(
@@ -134,14 +191,23 @@ class Analyzer:
             raise ValueError(
                 "only one of `accel_end_time` and `accel_end_margin` may be set at once"
             )
+        if integral_rms_method not in ("time", "spectral"):
+            raise ValueError(
+                f'unknown integral RMS method "{integral_rms_method}"; '
+                'must be one of "time" or "spectral"'
+            )
+        if np.dtype(dtype) not in (np.float32, np.float64):
+            raise ValueError(
+                f'unsupported dtype "{dtype}"; must be one of "float32" or "float64"'
+            )
 
         self._channels = ide_utils.dict_chs_best(
             (
                 (utype, ch_struct)
-                for (utype, ch_struct) in ide_utils.chs_by_utype(doc)
-                if len(ch_struct.eventarray) > 0
+                for (utype, ch_struct) in ide_utils.ChannelIndex(doc)
+                if ch_struct.length > 0
             ),
-            max_key=lambda x: (x.channel.id in preferred_chs, len(x.eventarray)),
+            max_key=lambda x: (x.channel.id in preferred_chs, x.length),
         )
 
         self._filename = doc.filename
@@ -152,23 +218,45 @@ class Analyzer:
         self._accel_start_margin = accel_start_margin
         self._accel_end_margin = accel_end_margin
         self._psd_window = psd_window
+        self._psd_average = psd_average
+        self._psd_median_rtol = psd_median_rtol
         self._psd_freq_bin_width = psd_freq_bin_width
         self._pvss_init_freq = pvss_init_freq
         self._pvss_bins_per_octave = pvss_bins_per_octave
         self._vc_init_freq = vc_init_freq
         self._vc_bins_per_octave = vc_bins_per_octave
+        self._block_len = block_len
+        self._segment_duration = segment_duration
+        self._integral_rms_method = integral_rms_method
+        self._dtype = np.dtype(dtype)
+        self._peak_top_k = peak_top_k
+        self._peak_min_separation = peak_min_separation
+        self._scratch = (
+            scratch.ScratchSpace(scratch_dir) if scratch_dir is not None else None
+        )
+
+    def close(self):
+        """Release any scratch storage held by the analyzer."""
+        if self._scratch is not None:
+            self._scratch.cleanup()
 
     # ==========================================================================
     # Data Processing, just to make init cleaner
     # ==========================================================================
 
     @cached_property
-    def _accelerationData(self):
-        """Populate the _acceleration* fields, including splitting and extending data."""
+    @perf.timed
+    def _accelerationSource(self):
+        """
+        Locate the acceleration data in the recording, without loading it.
+
+        :return: the channel, the conversion factor into m/s^2, and the range
+            of sample indices to use; `None` if there's no acceleration channel
+        """
         ch_struct = self._channels.get("acc", None)
         if ch_struct is None:
             logging.warning(f"no acceleration channel in {self._filename}")
-            return np.empty((3, 0), dtype=np.float)
+            return None
 
         aUnits = ch_struct.units[1]
         try:
@@ -182,36 +270,172 @@ class Analyzer:
         self._accelerationName = ch_struct.channel.name
         self._accelerationFs = ch_struct.fs
 
-        times = ch_struct.eventarray.arraySlice()[0] * 1e-6  # us -> s
-        aData = conversionFactor * ch_struct.eventarray.arrayValues(
-            subchannels=ch_struct.sch_ids,
-        )
+        eventarray = ch_struct.eventarray
+        length = ch_struct.length
 
+        start = 0
         if self._accel_start_margin is not None:
-            margin = int(np.ceil(ch_struct.fs * self._accel_start_margin))
-            aData = aData[:, margin:]
+            start = int(np.ceil(ch_struct.fs * self._accel_start_margin))
         elif self._accel_start_time is not None:
-            i = np.searchsorted(times, self._accel_start_time)
-            aData = aData[:, i:]
+            start = streaming.searchsorted_time(eventarray, self._accel_start_time)
+        start = min(start, length)
+
+        stop = length
         if self._accel_end_margin is not None:
             margin = int(np.ceil(ch_struct.fs * self._accel_end_margin))
-            aData = aData[:, : (-margin or None)]
+            stop = length - margin
         elif self._accel_end_time is not None:
-            i = np.searchsorted(times, self._accel_end_time)
-            aData = aData[:, :i]
+            # the end index is applied *after* trimming the start
+            stop = start + streaming.searchsorted_time(eventarray, self._accel_end_time)
+        stop = min(max(stop, start), length)
+
+        return ch_struct, conversionFactor, start, stop
+
+    @cached_property
+    @perf.timed
+    def _accelerationData(self):
+        """Populate the _acceleration* fields, including splitting and extending data."""
+        source = self._accelerationSource
+        if source is None:
+            return np.empty((3, 0), dtype=self._dtype)
+        ch_struct, conversionFactor, start, stop = source
+
+        if self._scratch is not None or self._dtype != np.float64:
+            # Write the data out block-wise, without ever loading it in full;
+            # the blocks are filtered in double precision & only rounded into
+            # the lower-precision array once both filter passes are done
+            stream = self._accelerationStream
+            shape = (stream.n_axes, len(stream))
+            if self._scratch is not None:
+                aData = self._scratch.empty(shape, self._dtype)
+            else:
+                aData = np.empty(shape, self._dtype)
+            i = 0
+            for block in stream:
+                aData[:, i : i + block.shape[-1]] = block
+                i += block.shape[-1]
+            if self._scratch is not None:
+                aData.setflags(write=False)
+            return aData
+
+        aData = ch_struct.eventarray.arrayValues(
+            start=start,
+            end=stop,
+            subchannels=ch_struct.sch_ids,
+        )
+        aData *= conversionFactor
 
         if self._accel_highpass_cutoff:
             aData = filters.highpass(
-                aData, fs=ch_struct.fs, cutoff=self._accel_highpass_cutoff, axis=-1
+                aData,
+                fs=ch_struct.fs,
+                cutoff=self._accel_highpass_cutoff,
+                axis=-1,
+                out=aData,
             )
 
         return aData
 
     @cached_property
-    def _accelerationResultant(self):
-        return stats.L2_norm(self._accelerationData, axis=0)
+    @perf.timed
+    def _accelerationStream(self):
+        """Generate the acceleration data in blocks; see `_accelerationData`."""
+        source = self._accelerationSource
+        if source is None:
+            return None
+        ch_struct, conversionFactor, start, stop = source
+
+        return streaming.AccelerationStream(
+            ch_struct,
+            start,
+            stop,
+            conversion_factor=conversionFactor,
+            highpass_cutoff=self._accel_highpass_cutoff,
+            block_len=(
+                self._block_len
+                if self._block_len is not None
+                else streaming.DEFAULT_BLOCK_LEN
+            ),
+            dtype=self._dtype,
+        )
 
     @cached_property
+    @perf.timed
+    def _accelerationStats(self):
+        """Run all acceleration analyses in a single pass over the data blocks."""
+        stream = self._accelerationStream
+        if stream is None:
+            return streaming.AccelerationStats(3, fs=None, length=0)
+
+        integral_rms = self._integral_rms_method == "time"
+        if len(stream) > 0 and integral_rms:
+            self._warnIfUnfiltered()
+
+        acc_stats = streaming.AccelerationStats(
+            stream.n_axes,
+            fs=stream.fs,
+            length=len(stream),
+            integral_rms=integral_rms,
+            pvss_freqs=(
+                self._PVSSFreqs(len(stream))
+                if self._pvss_init_freq is not None and len(stream) > 0
+                else None
+            ),
+            psd_nperseg=(
+                int(np.ceil(stream.fs / self._psd_freq_bin_width))
+                if self._psd_freq_bin_width is not None
+                else None
+            ),
+            psd_window=self._psd_window,
+            psd_average=self._psd_average,
+            psd_median_rtol=self._psd_median_rtol,
+            peak_top_k=self._peak_top_k,
+            peak_min_separation=self._peak_min_separation,
+        )
+        for block in stream:
+            acc_stats.update(block)
+
+        return acc_stats
+
+    @cached_property
+    @perf.timed
+    def _accelerationMetrics(self):
+        """
+        Reduce the broad acceleration metrics in a single blocked pass; see
+        `streaming.AccelerationMetrics`.
+        """
+        if self._block_len is not None:
+            return self._accelerationStats
+
+        aData = self._accelerationData
+        if aData.shape[-1] == 0:
+            return streaming.AccelerationMetrics(aData.shape[0], fs=None)
+
+        if self._integral_rms_method != "time":
+            fs = None
+        else:
+            self._warnIfUnfiltered()
+            fs = self._accelerationFs
+        acc_metrics = streaming.AccelerationMetrics(
+            aData.shape[0],
+            fs=fs,
+            peak_top_k=self._peak_top_k,
+            peak_min_separation=self._peak_min_separation,
+        )
+        for i in range(0, aData.shape[-1], streaming.DEFAULT_BLOCK_LEN):
+            acc_metrics.update(aData[:, i : i + streaming.DEFAULT_BLOCK_LEN])
+
+        return acc_metrics
+
+    def _warnIfUnfiltered(self):
+        if not self._accel_highpass_cutoff:
+            logging.warning(
+                "no highpass filter used before integration; "
+                "velocity & displacement calculations may be unstable"
+            )
+
+    @cached_property
+    @perf.timed
     def _microphoneData(self):
         """Populate the _microphone* fields, including splitting and extending data."""
         ch_struct = self._channels.get("mic", None)
@@ -228,44 +452,8 @@ class Analyzer:
 
         return data
 
-    @cached_property
-    def _velocityData(self):
-        aData = self._accelerationData
-        if aData.size == 0:
-            return np.empty((3, 0), dtype=np.float)
-
-        if not self._accel_highpass_cutoff:
-            logging.warning(
-                "no highpass filter used before integration; "
-                "velocity calculation may be unstable"
-            )
-
-        vData = integrate._integrate(aData, dt=1 / self._accelerationFs, axis=1)
-
-        return vData
-
-    @cached_property
-    def _displacementData(self):
-        vData = self._velocityData
-        if vData.size == 0:
-            return np.empty((3, 0), dtype=np.float)
-
-        if not self._accel_highpass_cutoff:
-            logging.warning(
-                "no highpass filter used before integration; "
-                "displacement calculation may be unstable"
-            )
-
-        dData = integrate._integrate(vData, dt=1 / self._accelerationFs, axis=1)
-
-        return dData
-
-    @cached_property
-    def _PVSSData(self):
-        aData = self._accelerationData
-        if aData.size == 0:
-            return np.empty(0, dtype=np.float), self._accelerationData
-
+    def _PVSSFreqs(self, length):
+        """Generate the PVSS natural frequencies for a signal length."""
         log2_f0 = np.log2(self._pvss_init_freq)
         log2_f1 = np.log2(self._accelerationFs)
         num_bins = np.floor(
@@ -279,9 +467,22 @@ class Analyzer:
             base=2,
             endpoint=True,
         )
-        freqs = freqs[
-            (freqs >= self._accelerationFs / self._accelerationData.shape[-1])
-        ]
+        return freqs[(freqs >= self._accelerationFs / length)]
+
+    @cached_property
+    @perf.timed
+    def _PVSSData(self):
+        if self._block_len is not None:
+            acc_stats = self._accelerationStats
+            if acc_stats.count == 0:
+                return np.empty(0, dtype=np.float), np.empty((len(acc_stats.sum_sq), 0))
+            return acc_stats.pvss_freqs, acc_stats.pvss.T
+
+        aData = self._accelerationData
+        if aData.size == 0:
+            return np.empty(0, dtype=np.float), self._accelerationData
+
+        freqs = self._PVSSFreqs(self._accelerationData.shape[-1])
         pv = shock.pseudo_velocity(
             self._accelerationData,
             freqs,
@@ -297,26 +498,53 @@ class Analyzer:
         return freqs, pv
 
     @cached_property
+    @perf.timed
     def _PSDData(self):
+        if self._block_len is not None:
+            acc_stats = self._accelerationStats
+            if acc_stats.count == 0:
+                return np.empty(0, dtype=np.float), np.empty((len(acc_stats.sum_sq), 0))
+            return acc_stats.psd
+
         aData = self._accelerationData
         if aData.size == 0:
             return np.empty(0, dtype=np.float), self._accelerationData
 
-        return scipy.signal.welch(
-            aData,
-            fs=self._accelerationFs,
-            nperseg=int(np.ceil(self._accelerationFs / self._psd_freq_bin_width)),
+        return self._welch(aData)
+
+    def _welch(self, aData):
+        """Calculate the PSD of acceleration data with the configured parameters."""
+        nperseg = int(np.ceil(self._accelerationFs / self._psd_freq_bin_width))
+        if self._psd_average == "median" and self._psd_median_rtol is None:
+            f, a_psd = scipy.signal.welch(
+                aData,
+                fs=self._accelerationFs,
+                nperseg=nperseg,
+                window=self._psd_window,
+                average="median",
+                axis=-1,
+            )
+            return f, a_psd.astype(np.float64, copy=False)
+
+        # Average the segments' spectra as they're calculated
+        welch = streaming.WelchSegments(
+            self._accelerationFs,
+            nperseg,
+            aData.shape[-1],
             window=self._psd_window,
-            average="median",
-            axis=1,
+            average=self._psd_average,
+            median_rtol=self._psd_median_rtol,
         )
+        for i in range(0, aData.shape[-1], streaming.DEFAULT_BLOCK_LEN):
+            welch.update(aData[:, i : i + streaming.DEFAULT_BLOCK_LEN])
+        return welch.psd()
 
     @cached_property
+    @perf.timed
     def _VCCurveData(self):
         """Calculate Vibration Criteria (VC) Curves for the accelerometer."""
-        aData = self._accelerationData
-        if aData.size == 0:
-            return np.empty(0, dtype=np.float), self._accelerationData
+        if self._PSDData[1].size == 0:
+            return self._PSDData
 
         """
         Theory behind the calculation:
@@ -348,7 +576,24 @@ class Analyzer:
         be integrated into velocity. This can be done in the frequency domain
         by replacing |X(2πf)|^2 with (1/2πf)^2 |X(2πf)|^2.
         """
+        return self._VCCurves(*self._PSDData)
+
+    def _spectralIntegralRMS(self, dn):
+        """
+        Calculate the RMS of an integral of the acceleration from the
+        acceleration PSD, over the band above the highpass cutoff; see
+        `_VCCurveData` for the theory.
+
+        :param dn: the integral number (e.g., -1 = velocity, -2 = displacement)
+        """
         f, a_psd = self._PSDData
+        if a_psd.size == 0:
+            return np.full(a_psd.shape[0], np.nan)
+
+        return psd.to_rms(f, a_psd, dn=dn, min_freq=(self._accel_highpass_cutoff or 0))
+
+    def _VCCurves(self, f, a_psd):
+        """Calculate VC curves from an acceleration PSD; see `_VCCurveData`."""
         f, v_psd = psd.differentiate(f, a_psd, n=-1)
         f_oct, v_psd_oct = psd.to_octave(
             f,
@@ -362,6 +607,96 @@ class Analyzer:
         return f_oct, v_vc
 
     @cached_property
+    @perf.timed
+    def _segmentData(self):
+        """
+        Calculate the acceleration analyses over consecutive time segments.
+
+        The segments start at the earliest data present among all channels and
+        run through the latest; analyses for segments (or parts thereof) not
+        covered by the acceleration data are filled with NaN's.
+
+        Each segment's PSD is calculated once, and reused for the VC curves &
+        the velocity/displacement RMS. The latter are calculated in the
+        frequency domain over the band above the highpass cutoff.
+        """
+        # Build the segment boundaries in microseconds
+        t_first, t_last = np.inf, -np.inf
+        for ch_struct in self._channels.values():
+            eventarray = ch_struct.eventarray
+            t_first = min(t_first, eventarray.arraySlice(0, 1)[0, 0])
+            t_last = max(t_last, eventarray.arraySlice(-1, None)[0, 0])
+        duration = 1e6 * self._segment_duration
+        segment_count = max(int(np.ceil((t_last - t_first) / duration)), 1)
+        t_splits = t_first + duration * np.arange(segment_count + 1)
+
+        metric_names = [
+            "RMS Acceleration",
+            "RMS Velocity",
+            "RMS Displacement",
+            "Peak Absolute Acceleration",
+        ]
+
+        source = self._accelerationSource
+        if source is None:
+            n_axes, freqs = 3, np.empty(0)
+        else:
+            ch_struct, _conversionFactor, start, stop = source
+            n_axes = len(ch_struct.sch_ids)
+            nperseg = int(np.ceil(self._accelerationFs / self._psd_freq_bin_width))
+            freqs = np.fft.rfftfreq(nperseg, d=1 / self._accelerationFs)
+
+            i_splits = [
+                streaming.searchsorted_time(ch_struct.eventarray, 1e-6 * t)
+                for t in t_splits
+            ]
+            i_splits = np.clip(i_splits, start, stop) - start
+
+        metrics = np.full((segment_count, len(metric_names), n_axes + 1), np.nan)
+        a_psd = np.full((segment_count, n_axes, len(freqs)), np.nan)
+
+        for i in range(segment_count if source is not None else 0):
+            if i_splits[i] == i_splits[i + 1]:
+                continue
+            if self._block_len is not None:
+                aData = self._accelerationStream.slice(i_splits[i], i_splits[i + 1])
+            else:
+                aData = self._accelerationData[:, i_splits[i] : i_splits[i + 1]]
+
+            metrics[i, 0, :-1] = stats.rms(aData, axis=-1)
+            metrics[i, 3, :-1] = stats.max_abs(aData, axis=-1)
+            metrics[i, 3, -1] = stats.L2_norm(aData, axis=0).max()
+            if aData.shape[-1] >= nperseg:
+                a_psd[i] = self._welch(aData)[1]
+
+        metrics[:, 0, -1] = stats.L2_norm(metrics[:, 0, :-1], axis=-1)
+        metrics[:, [0, 3]] *= self.MPS2_TO_G
+
+        if source is None:
+            vc_freqs, vc = np.empty(0), np.empty((segment_count, n_axes, 0))
+        else:
+            # Reuse the PSD's for all frequency-domain analyses
+            for j, dn, scale in [(1, -1, self.MPS_TO_MMPS), (2, -2, self.M_TO_MM)]:
+                rms = psd.to_rms(
+                    freqs, a_psd, dn=dn, min_freq=(self._accel_highpass_cutoff or 0)
+                )
+                metrics[:, j, :-1] = scale * rms
+                metrics[:, j, -1] = scale * stats.L2_norm(rms, axis=-1)
+
+            vc_freqs, vc = self._VCCurves(freqs, a_psd)
+
+        return SegmentData(
+            start_times=t_splits[:-1],
+            metric_names=metric_names,
+            metrics=metrics,
+            psd_freqs=freqs,
+            psd=a_psd,
+            vc_freqs=vc_freqs,
+            vc=vc,
+        )
+
+    @cached_property
+    @perf.timed
     def _pressureData(self):
         """Populate the _pressure* fields, including splitting and extending data."""
         ch_struct = self._channels.get("pre", None)
@@ -387,6 +722,7 @@ class Analyzer:
         return data
 
     @cached_property
+    @perf.timed
     def _temperatureData(self):
         """Populate the _temperature* fields, including splitting and extending data."""
         ch_struct = self._channels.get("tmp", None)
@@ -412,6 +748,7 @@ class Analyzer:
         return data
 
     @cached_property
+    @perf.timed
     def _gyroscopeData(self):
         """Populate the _gyro* fields, including splitting and extending data."""
         ch_struct = self._channels.get("gyr", None)
@@ -428,7 +765,8 @@ class Analyzer:
                 [3, 0, 1, 2]
             ]  # reorders to <W, X, Y, Z> & strips out the "Acc" channel
 
-            data = (180 / np.pi) * quat.quat_to_angvel(quat_raw.T, 1 / self._gyroFs).T
+            data = quat.quat_to_angvel(quat_raw.T, 1 / self._gyroFs).T
+            data *= 180 / np.pi
 
             def strip_invalid_prefix(data, prefix_len):
                 """Search prefix for invalid data and remove it (if any)."""
@@ -462,6 +800,7 @@ class Analyzer:
         pass
 
     @cached_property
+    @perf.timed
     def _gpsPositionData(self):
         ch_struct = self._channels.get("gps", None)
         if ch_struct is None:
@@ -480,6 +819,7 @@ class Analyzer:
         return data
 
     @cached_property
+    @perf.timed
     def _gpsSpeedData(self):
         ch_struct = self._channels.get("spd", None)
         if ch_struct is None:
@@ -503,6 +843,7 @@ class Analyzer:
     # ==========================================================================
 
     @cached_property
+    @perf.timed
     @as_series(
         "acc",
         "RMS Acceleration",
@@ -511,14 +852,11 @@ class Analyzer:
     )
     def accRMSFull(self):
         """Accelerometer Tri-axial RMS."""
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            rms = stats.rms(
-                self._accelerationData, axis=1
-            )  # RuntimeWarning: Mean of empty slice.
-        return self.MPS2_TO_G * np.append(rms, stats.L2_norm(rms))
+        acc_metrics = self._accelerationMetrics
+        return self.MPS2_TO_G * np.append(acc_metrics.rms, acc_metrics.resultant_rms)
 
     @cached_property
+    @perf.timed
     @as_series(
         "acc",
         "RMS Velocity",
@@ -527,14 +865,14 @@ class Analyzer:
     )
     def velRMSFull(self):
         """Velocity Tri-axial RMS, after applying a 0.1Hz highpass filter."""
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            rms = stats.rms(
-                self._velocityData, axis=1
-            )  # RuntimeWarning: Mean of empty slice.
+        if self._integral_rms_method == "spectral":
+            rms = self._spectralIntegralRMS(dn=-1)
+        else:
+            rms = self._accelerationMetrics.velocity_rms
         return self.MPS_TO_MMPS * np.append(rms, stats.L2_norm(rms))
 
     @cached_property
+    @perf.timed
     @as_series(
         "acc",
         "RMS Displacement",
@@ -543,14 +881,14 @@ class Analyzer:
     )
     def disRMSFull(self):
         """Displacement Tri-axial RMS, after applying a 0.1Hz highpass filter."""
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            rms = stats.rms(
-                self._displacementData, axis=1
-            )  # RuntimeWarning: Mean of empty slice.
+        if self._integral_rms_method == "spectral":
+            rms = self._spectralIntegralRMS(dn=-2)
+        else:
+            rms = self._accelerationMetrics.displacement_rms
         return self.M_TO_MM * np.append(rms, stats.L2_norm(rms))
 
     @cached_property
+    @perf.timed
     @as_series(
         "acc",
         "Peak Absolute Acceleration",
@@ -559,17 +897,16 @@ class Analyzer:
     )
     def accPeakFull(self):
         """Peak instantaneous tri-axial acceleration"""
-        max_abs = stats.max_abs(self._accelerationData, axis=1)
-        max_abs_res = np.amax(
-            stats.L2_norm(self._accelerationData, axis=0),
-            initial=-np.inf,
-            axis=-1,
-        )
+        acc_metrics = self._accelerationMetrics
         return self.MPS2_TO_G * np.nan_to_num(
-            np.append(max_abs, max_abs_res), nan=np.nan, posinf=np.inf, neginf=np.nan
+            np.append(acc_metrics.max_abs, acc_metrics.resultant_max),
+            nan=np.nan,
+            posinf=np.inf,
+            neginf=np.nan,
         )
 
     @cached_property
+    @perf.timed
     @as_series(
         "acc",
         "Peak Pseudo Velocity Shock Spectrum",
@@ -589,6 +926,7 @@ class Analyzer:
         )
 
     @cached_property
+    @perf.timed
     @as_series("gps", "GPS Position", default_axis_names=["Latitude", "Longitude"])
     def gpsLocFull(self):
         """Average GPS location"""
@@ -601,6 +939,7 @@ class Analyzer:
         return data[..., -1]
 
     @cached_property
+    @perf.timed
     @as_series("spd", "GPS Speed", default_axis_names=["Ground"])
     def gpsSpeedFull(self):
         """Average GPS speed"""
@@ -613,6 +952,7 @@ class Analyzer:
             return np.mean(data)  # RuntimeWarning: Mean of empty slice.
 
     @cached_property
+    @perf.timed
     @as_series(
         "gyr",
         "RMS Angular Velocity",
@@ -629,6 +969,7 @@ class Analyzer:
         return np.append(rms, stats.L2_norm(rms))
 
     @cached_property
+    @perf.timed
     @as_series("mic", "RMS Microphone", default_axis_names=[""])
     def micRMSFull(self):
         """Microphone RMS"""
@@ -639,6 +980,7 @@ class Analyzer:
             )  # RuntimeWarning: Mean of empty slice.
 
     @cached_property
+    @perf.timed
     @as_series("tmp", "Average Temperature", default_axis_names=[""])
     def tempFull(self):
         """Average Temperature"""
@@ -647,6 +989,7 @@ class Analyzer:
             return self._temperatureData.mean()  # RuntimeWarning: Mean of empty slice.
 
     @cached_property
+    @perf.timed
     @as_series("pre", "Average Pressure", default_axis_names=[""])
     def pressFull(self):
         """Average Pressure"""
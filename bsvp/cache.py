@@ -0,0 +1,159 @@
+"""
+A persistent on-disk cache for the per-file results of `GetDataBuilder`.
+
+Each entry holds the calculated data of one recording under one analysis
+configuration, and is stamped with a fingerprint of the recording file
+(its size & modification time, or optionally a digest of its contents). An
+entry whose recording has since changed is discarded on lookup, so only new
+or modified files are recalculated.
+
+The cache is bounded in size: whenever it grows past its limit, the least
+recently used entries are deleted.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+
+import pandas as pd
+
+from bsvp import perf
+
+
+_CACHE_VERSION = 1
+_ENTRY_SUFFIX = ".pkl"
+
+
+def _file_digest(filename, chunk_size=2 ** 20):
+    """Generate a digest of the contents of a file."""
+    digest = hashlib.sha256()
+    with open(filename, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    A size-bounded, least-recently-used store of recording results.
+
+    Entries are written atomically, so a cache directory may be shared by
+    several processes at once (e.g., by `aggregate_data` with `workers`).
+
+    :param dirpath: the directory in which to store cache entries; created if
+        it does not exist
+    :param max_size: the maximum total size (in bytes) of all entries
+    :param content_digest: if `True`, recordings are fingerprinted by a digest
+        of their contents instead of their size & modification time; this is
+        more robust (e.g., to copied files with reset modification times), but
+        requires reading each file in full on every lookup
+    """
+
+    def __init__(self, dirpath, max_size=2 ** 30, content_digest=False):
+        if max_size < 0:
+            raise ValueError(f"invalid negative cache size {max_size}")
+
+        self.dirpath = os.fspath(dirpath)
+        self.max_size = max_size
+        self.content_digest = content_digest
+
+    def _fingerprint(self, filename):
+        stat = os.stat(filename)
+        if self.content_digest:
+            return (stat.st_size, _file_digest(filename))
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _entry_path(self, filename, config):
+        key = repr((_CACHE_VERSION, pd.__version__, os.path.abspath(filename), config))
+        return os.path.join(
+            self.dirpath,
+            hashlib.sha256(key.encode()).hexdigest() + _ENTRY_SUFFIX,
+        )
+
+    @perf.timed
+    def get(self, filename, config):
+        """
+        Retrieve the cached results for a recording & configuration.
+
+        :return: the cached results, or `None` if there are no valid results
+        """
+        entry_path = self._entry_path(filename, config)
+        try:
+            with open(entry_path, "rb") as file:
+                fingerprint, data = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # corrupt entry, e.g. from an interrupted write by an old version
+            self._remove(entry_path)
+            return None
+
+        if fingerprint != self._fingerprint(filename):
+            self._remove(entry_path)
+            return None
+
+        # Mark entry as recently used
+        try:
+            os.utime(entry_path)
+        except FileNotFoundError:
+            pass
+
+        return data
+
+    @perf.timed
+    def put(self, filename, config, data):
+        """Store the results for a recording & configuration."""
+        os.makedirs(self.dirpath, exist_ok=True)
+        entry_path = self._entry_path(filename, config)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.dirpath, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                pickle.dump(
+                    (self._fingerprint(filename), data),
+                    file,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp_path, entry_path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+
+        self._evict()
+
+    def clear(self):
+        """Delete all entries in the cache."""
+        for entry_path, _stat in self._entries():
+            self._remove(entry_path)
+
+    def _entries(self):
+        try:
+            with os.scandir(self.dirpath) as dir_entries:
+                entries = []
+                for dir_entry in dir_entries:
+                    if not dir_entry.name.endswith(_ENTRY_SUFFIX):
+                        continue
+                    try:
+                        entries.append((dir_entry.path, dir_entry.stat()))
+                    except FileNotFoundError:
+                        pass  # removed by another process
+                return entries
+        except FileNotFoundError:
+            return []
+
+    def _evict(self):
+        """Delete the least recently used entries until within the size limit."""
+        entries = sorted(self._entries(), key=lambda entry: entry[1].st_mtime_ns)
+        total_size = sum(stat.st_size for (_path, stat) in entries)
+        for entry_path, stat in entries:
+            if total_size <= self.max_size:
+                break
+            self._remove(entry_path)
+            total_size -= stat.st_size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
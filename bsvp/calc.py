@@ -1,4 +1,6 @@
+import concurrent.futures
 from functools import partial
+import itertools
 import logging
 import os
 
@@ -6,11 +8,29 @@ import numpy as np
 import pandas as pd
 import idelib
 
+from bsvp import perf, streaming
 from bsvp.analyzer import Analyzer
+from bsvp.cache import ResultCache
+from bsvp.parquet import ParquetFolderWriter
+from common_utils.nre_utils import ebmlite_utils, ide_utils
 from common_utils.nre_utils.calc import stats as utils_stats
 from common_utils.nre_utils.calc import psd as utils_psd
 
 
+# The channel utypes from which each type of output is calculated
+_OUTPUT_UTYPES = dict(
+    psd={"acc"},
+    pvss={"acc"},
+    metrics={"acc", "gyr", "mic", "gps", "spd", "tmp", "pre"},
+    peaks={"acc"},
+    vc_curves={"acc"},
+    segment_metrics={"acc"},
+    segment_psd={"acc"},
+    segment_vc_curves={"acc"},
+    rolling={"acc", "gyr", "mic"},
+)
+
+
 def _make_meta(dataset):
     """Generate a pandas object containing metadata for the given recording."""
     serial_no = dataset.recorderInfo["RecorderSerial"]
@@ -25,6 +45,39 @@ def _make_meta(dataset):
     )
 
 
+def _make_axis_spectrum(f, data, axis_names, resultant):
+    """
+    Format a per-axis spectrum & its resultant into a pandas object, indexed by
+    axis & frequency in frequency-major order (as from `DataFrame.stack`).
+
+    :param f: the spectrum frequencies
+    :param data: the per-axis spectra, with axes along the first dimension
+    :param axis_names: the names of the axes in `data`
+    :param resultant: a function that calculates the resultant spectrum from
+        the per-axis spectra, as `resultant(data, axis=0, keepdims=True)`
+    """
+    data = np.concatenate([data, resultant(data, axis=0, keepdims=True)], axis=0)
+    values = data.T.reshape(-1)
+    n_axes = len(axis_names) + 1
+    codes = [np.tile(np.arange(n_axes), len(f)), np.repeat(np.arange(len(f)), n_axes)]
+
+    # Drop missing values, as `DataFrame.stack` does
+    is_valid = ~np.isnan(values)
+    if not is_valid.all():
+        values = values[is_valid]
+        codes = [level_codes[is_valid] for level_codes in codes]
+
+    return pd.Series(
+        values,
+        index=pd.MultiIndex(
+            levels=[pd.Index(axis_names + ["Resultant"]), pd.Index(f)],
+            codes=codes,
+            names=["axis", "frequency"],
+            verify_integrity=False,
+        ),
+    )
+
+
 def _make_psd(analyzer, fstart=None, bins_per_octave=None):
     """
     Format the PSD of the main accelerometer channel into a pandas object.
@@ -47,16 +100,13 @@ def _make_psd(analyzer, fstart=None, bins_per_octave=None):
             mode="mean",
         )
 
-    df_psd = pd.DataFrame(
-        psd.T * analyzer.MPS2_TO_G ** 2,  # (m/s^2)^2/Hz -> g^2/Hz
-        index=pd.Index(f, name="frequency"),
-        columns=pd.Index(accel_ch.axis_names, name="axis"),
+    return _make_axis_spectrum(
+        f,
+        psd * analyzer.MPS2_TO_G ** 2,  # (m/s^2)^2/Hz -> g^2/Hz
+        accel_ch.axis_names,
+        resultant=np.sum,
     )
 
-    df_psd["Resultant"] = np.sum(df_psd.to_numpy(), axis=1)
-
-    return df_psd.stack(level="axis").reorder_levels(["axis", "frequency"])
-
 
 def _make_pvss(analyzer):
     """
@@ -70,16 +120,13 @@ def _make_pvss(analyzer):
 
     f, pvss = analyzer._PVSSData
 
-    df_pvss = pd.DataFrame(
-        pvss.T * analyzer.MPS_TO_MMPS,
-        index=pd.Index(f, name="frequency"),
-        columns=pd.Index(accel_ch.axis_names, name="axis"),
+    return _make_axis_spectrum(
+        f,
+        pvss * analyzer.MPS_TO_MMPS,
+        accel_ch.axis_names,
+        resultant=utils_stats.L2_norm,
     )
 
-    df_pvss["Resultant"] = utils_stats.L2_norm(df_pvss.to_numpy(), axis=1)
-
-    return df_pvss.stack(level="axis").reorder_levels(["axis", "frequency"])
-
 
 def _make_metrics(analyzer):
     """
@@ -122,7 +169,8 @@ def _make_metrics(analyzer):
 def _make_peak_windows(analyzer, margin_len):
     """
     Store windows of the main accelerometer channel about its peaks in a pandas
-    object.
+    object; the peaks of each axis & of the resultant are found as configured
+    in the analyzer (see `streaming.AccelerationMetrics.peak_indices`).
 
     The acceleration is scaled to units of g (gravity = 9.80665 meters per
     square second).
@@ -131,25 +179,41 @@ def _make_peak_windows(analyzer, margin_len):
     if accel_ch is None:
         return None
 
-    data = analyzer.MPS2_TO_G * np.concatenate(  # m/s^2 -> g
-        [analyzer._accelerationData, analyzer._accelerationResultant[None]], axis=0
+    acc_metrics = analyzer._accelerationMetrics
+    data_len = acc_metrics.count
+    peak_indices = acc_metrics.peak_indices  # per axis, then the resultant
+    i_axis = np.repeat(
+        np.arange(len(peak_indices)), [len(i_peaks) for i_peaks in peak_indices]
     )
+    i_max = np.concatenate(peak_indices)
+
+    if analyzer._block_len is None:
+
+        def read_window(start, stop):
+            return analyzer._accelerationData[:, start:stop]
+
+    else:
+        read_window = analyzer._accelerationStream.slice
+
+    def get_window(j, start, stop):
+        window = read_window(start, stop)
+        if j == len(accel_ch.axis_names):
+            return analyzer.MPS2_TO_G * utils_stats.L2_norm(window, axis=0)
+        return analyzer.MPS2_TO_G * window[j]
 
     window_len = 2 * margin_len + 1
-    t = (
-        accel_ch.eventarray.arraySlice()[0]
-        - accel_ch.channel.dataset.sessions[0].firstTime
-    )
     dt = 1 / analyzer._accelerationFs
-    result_data = np.full((window_len, data.shape[0]), np.nan, dtype=data.dtype)
+    t0 = accel_ch.channel.dataset.sessions[0].firstTime
+    t = np.array([accel_ch.eventarray.arraySlice(i, i + 1)[0, 0] - t0 for i in i_max])
+    result_data = np.full((window_len, len(i_max)), np.nan, dtype=float)
 
     # Calculate ranges
-    i_max = np.argmax(np.abs(data), axis=1)
-    i_max_neg = i_max - data.shape[1]
-    for j in range(data.shape[0]):
-        result_data[-margin_len - 1 - i_max[j] : margin_len - i_max_neg[j], j] = data[
-            j, i_max_neg[j] - margin_len : i_max[j] + margin_len + 1
-        ]
+    for k, (j, i) in enumerate(zip(i_axis, i_max)):
+        start = max(i - margin_len, 0)
+        stop = min(i + margin_len + 1, data_len)
+        result_data[start - i + margin_len : stop - i + margin_len, k] = get_window(
+            j, start, stop
+        )
 
     # Format results
     result = (
@@ -161,8 +225,8 @@ def _make_peak_windows(analyzer, margin_len):
             ),
             columns=pd.MultiIndex.from_arrays(
                 [
-                    accel_ch.axis_names + ["Resultant"],
-                    t[i_max].astype("timedelta64[us]"),
+                    np.array(accel_ch.axis_names + ["Resultant"])[i_axis],
+                    t.astype("timedelta64[us]"),
                 ],
                 names=["axis", "peak time"],
             ),
@@ -186,15 +250,292 @@ def _make_vc_curves(analyzer):
 
     f, vc = analyzer._VCCurveData
 
-    df_vc = pd.DataFrame(
-        vc.T * analyzer.MPS_TO_UMPS,  # (m/s) -> (μm/s)
-        index=pd.Index(f, name="frequency"),
-        columns=pd.Index(accel_ch.axis_names, name="axis"),
+    return _make_axis_spectrum(
+        f,
+        vc * analyzer.MPS_TO_UMPS,  # (m/s) -> (μm/s)
+        accel_ch.axis_names,
+        resultant=utils_stats.L2_norm,
     )
 
-    df_vc["Resultant"] = utils_stats.L2_norm(df_vc.to_numpy(), axis=1)
 
-    return df_vc.stack(level="axis").reorder_levels(["axis", "frequency"])
+# The labels of the rolling statistics in `_make_rolling`
+_ROLLING_STAT_LABELS = dict(rms="RMS", peak="Peak Absolute", mean="Mean")
+
+
+def _make_rolling(analyzer, window, step, stat_names):
+    """
+    Calculate statistics over sliding time windows of the main accelerometer,
+    gyroscope & microphone channels into a pandas object, as time series
+    indexed by the start time of each window.
+
+    The acceleration & rotation speed also include their resultants (i.e., the
+    statistics of the magnitude of each sample). The same units are used as in
+    `_make_metrics`.
+
+    :param window: the duration of each window, in seconds
+    :param step: the time between the starts of consecutive windows, in seconds
+    :param stat_names: the statistics to calculate; see `streaming.RollingStats`
+    """
+
+    def iter_blocks(data):
+        for i in range(0, data.shape[-1], streaming.DEFAULT_BLOCK_LEN):
+            yield data[:, i : i + streaming.DEFAULT_BLOCK_LEN]
+
+    sources = []  # of (ch_struct, quantity, axis names, start index, scale, blocks)
+    accel_source = analyzer._accelerationSource
+    if accel_source is not None:
+        ch_struct, _conversionFactor, start, _stop = accel_source
+        sources.append(
+            (
+                ch_struct,
+                "Acceleration",
+                ch_struct.axis_names + ["Resultant"],
+                start,
+                analyzer.MPS2_TO_G,
+                (
+                    iter(analyzer._accelerationStream)
+                    if analyzer._block_len is not None
+                    else iter_blocks(analyzer._accelerationData)
+                ),
+            )
+        )
+    for utype, quantity, axis_names, data in [
+        ("gyr", "Angular Velocity", ["X", "Y", "Z", "Resultant"], "_gyroscopeData"),
+        ("mic", "Microphone", None, "_microphoneData"),
+    ]:
+        ch_struct = analyzer._channels.get(utype, None)
+        if ch_struct is None:
+            continue
+        data = np.atleast_2d(getattr(analyzer, data))
+        sources.append(
+            (
+                ch_struct,
+                quantity,
+                axis_names or ch_struct.axis_names,
+                # any invalid prefix stripped from the data
+                ch_struct.length - data.shape[-1],
+                1,
+                iter_blocks(data),
+            )
+        )
+
+    series_list = []
+    for ch_struct, quantity, axis_names, start, scale, blocks in sources:
+        nperseg = max(int(round(window * ch_struct.fs)), 1)
+        nstep = max(int(round(step * ch_struct.fs)), 1)
+        with_resultant = axis_names[-1] == "Resultant"
+
+        rolling_stats = streaming.RollingStats(
+            len(axis_names), nperseg, nstep, stat_names
+        )
+        for block in blocks:
+            if with_resultant:
+                block = np.concatenate(
+                    [block, utils_stats.L2_norm(block, axis=0, keepdims=True)]
+                )
+            rolling_stats.update(block)
+        results = rolling_stats.result()
+
+        window_count = next(iter(results.values())).shape[-1]
+        if window_count == 0:
+            continue
+        # relative to the start of the recording, as with segments
+        t_start = (
+            ch_struct.eventarray.arraySlice(start, start + 1)[0, 0]
+            - ch_struct.channel.dataset.sessions[0].firstTime
+        )
+        start_times = pd.to_timedelta(
+            t_start + 1e6 * nstep * np.arange(window_count) / ch_struct.fs, unit="us"
+        )
+        for stat_name in stat_names:
+            series_list.append(
+                pd.Series(
+                    scale * results[stat_name].reshape(-1),
+                    index=pd.MultiIndex.from_product(
+                        [
+                            [f"{_ROLLING_STAT_LABELS[stat_name]} {quantity}"],
+                            axis_names,
+                            start_times,
+                        ],
+                        names=["calculation", "axis", "window start"],
+                    ),
+                )
+            )
+
+    if not series_list:
+        return None
+    return pd.concat(series_list)
+
+
+def _segment_start_index(analyzer, start_times):
+    """Format segment start times relative to the start of the recording."""
+    accel_ch = analyzer._channels["acc"]
+    t0 = accel_ch.channel.dataset.sessions[0].firstTime
+    return pd.to_timedelta(start_times - t0, unit="us")
+
+
+def _make_segment_metrics(analyzer):
+    """
+    Format the per-segment metrics of the main accelerometer channel into a
+    pandas object.
+
+    The metrics use the same units as in `_make_metrics`.
+    """
+    accel_ch = analyzer._channels.get("acc", None)
+    if accel_ch is None:
+        return None
+
+    segments = analyzer._segmentData
+
+    return pd.Series(
+        segments.metrics.reshape(-1),
+        index=pd.MultiIndex.from_product(
+            [
+                _segment_start_index(analyzer, segments.start_times),
+                segments.metric_names,
+                accel_ch.axis_names + ["Resultant"],
+            ],
+            names=["segment start", "calculation", "axis"],
+        ),
+    )
+
+
+def _make_segment_psd(analyzer, fstart=None, bins_per_octave=None):
+    """
+    Format the per-segment PSD's of the main accelerometer channel into a
+    pandas object.
+
+    The PSD is scaled to units of g^2/Hz (g := gravity = 9.80665 meters per
+    square second).
+    """
+    accel_ch = analyzer._channels.get("acc", None)
+    if accel_ch is None:
+        return None
+
+    segments = analyzer._segmentData
+    f, psd = segments.psd_freqs, segments.psd
+    if bins_per_octave is not None:
+        f, psd = utils_psd.to_octave(
+            f,
+            psd,
+            fstart=(fstart or 1),
+            octave_bins=bins_per_octave,
+            axis=-1,
+            mode="mean",
+        )
+    psd = np.concatenate([psd, np.sum(psd, axis=1, keepdims=True)], axis=1)
+
+    return pd.Series(
+        psd.reshape(-1) * analyzer.MPS2_TO_G ** 2,  # (m/s^2)^2/Hz -> g^2/Hz
+        index=pd.MultiIndex.from_product(
+            [
+                _segment_start_index(analyzer, segments.start_times),
+                accel_ch.axis_names + ["Resultant"],
+                f,
+            ],
+            names=["segment start", "axis", "frequency"],
+        ),
+    )
+
+
+def _make_segment_vc_curves(analyzer):
+    """
+    Format the per-segment VC curves of the main accelerometer channel into a
+    pandas object.
+    """
+    accel_ch = analyzer._channels.get("acc", None)
+    if accel_ch is None:
+        return None
+
+    segments = analyzer._segmentData
+    vc = np.concatenate(
+        [segments.vc, utils_stats.L2_norm(segments.vc, axis=1, keepdims=True)],
+        axis=1,
+    )
+
+    return pd.Series(
+        vc.reshape(-1) * analyzer.MPS_TO_UMPS,  # (m/s) -> (μm/s)
+        index=pd.MultiIndex.from_product(
+            [
+                _segment_start_index(analyzer, segments.start_times),
+                accel_ch.axis_names + ["Resultant"],
+                segments.vc_freqs,
+            ],
+            names=["segment start", "axis", "frequency"],
+        ),
+    )
+
+
+def _to_payload(series):
+    """
+    Pack a pandas Series into plain numpy arrays, which are much cheaper to
+    pass between processes than pandas objects.
+    """
+    if series is None or isinstance(series, pd.DataFrame):
+        return series
+
+    index = series.index
+    if isinstance(index, pd.MultiIndex):
+        levels = [np.asarray(level) for level in index.levels]
+        codes = [np.asarray(level_codes) for level_codes in index.codes]
+    else:
+        levels, codes = [np.asarray(index)], None
+
+    return series.to_numpy(), levels, codes, list(index.names), series.name
+
+
+def _from_payload(payload):
+    """Unpack a pandas Series from the output of `_to_payload`."""
+    if payload is None or isinstance(payload, pd.DataFrame):
+        return payload
+
+    values, levels, codes, names, name = payload
+    if codes is None:
+        index = pd.Index(levels[0], name=names[0])
+    else:
+        index = pd.MultiIndex(levels=levels, codes=codes, names=names)
+
+    return pd.Series(values, index=index, name=name)
+
+
+def _concat_level_values(indexes, level):
+    """
+    Concatenate the values of one level of several (multi-)indexes.
+
+    Text levels are combined into a categorical by remapping each index's level
+    codes onto the union of their distinct values, rather than by hashing the
+    value of every row.
+    """
+    if not all(
+        isinstance(index, pd.MultiIndex)
+        and pd.api.types.is_object_dtype(index.levels[level])
+        for index in indexes
+    ):
+        return np.concatenate(
+            [index.get_level_values(level).to_numpy() for index in indexes]
+        )
+
+    categories = (
+        pd.Index(np.concatenate([index.levels[level] for index in indexes]))
+        .unique()
+        .dropna()
+    )
+    codes = np.concatenate(
+        [
+            # a trailing -1 keeps missing values' codes (-1) as missing
+            np.append(categories.get_indexer(index.levels[level]), -1)[
+                index.codes[level]
+            ]
+            for index in indexes
+        ]
+    )
+
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def _get_data_payload(builder, filename):
+    """Calculate data from a single recording in a worker process."""
+    return {k: _to_payload(v) for (k, v) in builder._get_data(filename).items()}
 
 
 class GetDataBuilder:
@@ -212,6 +553,8 @@ class GetDataBuilder:
       - add_metrics
       - add_peaks
       - add_vc_curves
+      - add_segments
+      - add_rolling
     - execution functions - these functions take recording files as parameters,
       perform the configured calculations on the data therein, and return the
       calculated data as pandas objects.
@@ -247,6 +590,13 @@ class GetDataBuilder:
         accel_end_time=None,
         accel_start_margin=None,
         accel_end_margin=None,
+        block_len=None,
+        cache_dir=None,
+        cache_max_size=2 ** 30,
+        scratch_dir=None,
+        dtype="float64",
+        record_timing=False,
+        prescan=False,
     ):
         """
         Constructor.
@@ -255,6 +605,30 @@ class GetDataBuilder:
             others of its unit type
         :param accel_highpass_cutoff: the cutoff frequency used when
             pre-filtering acceleration data
+        :param block_len: if set, acceleration data is processed in blocks of
+            this many samples, keeping memory use bounded regardless of the
+            recording length
+        :param cache_dir: if set, the calculated data of each recording is
+            cached in this directory, and reused by later calls with the same
+            configuration for as long as the recording file is unchanged
+        :param cache_max_size: the maximum size (in bytes) of the cache; the
+            least recently used results are discarded beyond this limit
+        :param scratch_dir: if set, the full-length acceleration arrays are
+            stored in memory-mapped temporary files in this directory, instead
+            of in memory
+        :param dtype: the floating-point type of the acceleration data, either
+            "float64" or "float32"; single precision halves the memory use of
+            the acceleration analyses, at a small cost in accuracy (see
+            `Analyzer`)
+        :param record_timing: if `True`, the duration of every calculation
+            stage for each file is recorded in the output's "perf" table; see
+            also `OutputStruct.to_chrome_trace`
+        :param prescan: if `True`, the metadata of each recording is scanned
+            before it's imported (see `nre_utils.ebmlite_utils.prescan`);
+            recordings without data for any of the configured calculations
+            are then left out of the results without being imported, and with
+            `workers`, recordings are scheduled by their amount of relevant
+            data rather than by file size
         """
         if accel_start_time is not None and accel_start_margin is not None:
             raise ValueError(
@@ -274,6 +648,9 @@ class GetDataBuilder:
             accel_end_time=accel_end_time,
             accel_start_margin=accel_start_margin,
             accel_end_margin=accel_end_margin,
+            block_len=block_len,
+            scratch_dir=scratch_dir,
+            dtype=np.dtype(dtype).name,
         )
 
         # Even unused parameters MUST be set; used to instantiate `Analyzer` in `_get_data`
@@ -281,11 +658,28 @@ class GetDataBuilder:
         self._psd_freq_start_octave = None
         self._psd_bins_per_octave = None
         self._psd_window = None
+        self._psd_average = "median"
+        self._psd_median_rtol = None
         self._pvss_init_freq = None
         self._pvss_bins_per_octave = None
         self._peak_window_margin_len = None
+        self._peak_top_k = 1
+        self._peak_min_separation = 0
         self._vc_init_freq = None
         self._vc_bins_per_octave = None
+        self._segment_duration = None
+        self._rolling_window = None
+        self._rolling_step = None
+        self._rolling_stats = None
+        self._integral_rms_method = "time"
+        self._record_timing = record_timing
+        self._prescan = prescan
+
+        self._cache = (
+            None
+            if cache_dir is None
+            else ResultCache(cache_dir, max_size=cache_max_size)
+        )
 
     def add_psd(
         self,
@@ -294,6 +688,8 @@ class GetDataBuilder:
         freq_start_octave=None,
         bins_per_octave=None,
         window="hanning",
+        average="median",
+        median_rtol=None,
     ):
         """
         Add the acceleration PSD to the calculation queue.
@@ -308,11 +704,21 @@ class GetDataBuilder:
             specified by `freq_bin_width`
         :param window: the window type used in the PSD calculation; see the
             documentation for `scipy.signal.welch` for details
+        :param average: the method for averaging the spectra of the PSD's
+            segments, either "median" or "mean"; the mean is always calculated
+            in bounded memory
+        :param median_rtol: if set, the "median" average is approximated to
+            within this relative error in bounded memory, instead of holding
+            the spectra of all segments in memory at once
         """
         if all(i is None for i in (freq_bin_width, bins_per_octave)):
             raise ValueError(
                 "must at least provide parameters for one of linear and log-spaced modes"
             )
+        if average not in ("mean", "median"):
+            raise ValueError(
+                f'unknown average method "{average}"; must be one of "mean" or "median"'
+            )
         if freq_bin_width is None:
             if freq_start_octave is None:
                 freq_start_octave = 1
@@ -327,6 +733,8 @@ class GetDataBuilder:
         self._psd_freq_start_octave = freq_start_octave
         self._psd_bins_per_octave = bins_per_octave
         self._psd_window = window
+        self._psd_average = average
+        self._psd_median_rtol = median_rtol
 
         return self
 
@@ -344,9 +752,28 @@ class GetDataBuilder:
 
         return self
 
-    def add_metrics(self):
-        """Add broad channel metrics to the calculation queue."""
+    def add_metrics(self, *, integral_rms_method="time"):
+        """
+        Add broad channel metrics to the calculation queue.
+
+        :param integral_rms_method: how the RMS velocity & displacement are
+            calculated; either "time", by integrating the acceleration in the
+            time domain, or "spectral", from the acceleration PSD (as
+            configured in `add_psd`, or with the defaults of `add_vc_curves`
+            otherwise) over the band above the highpass cutoff
+        """
+        if integral_rms_method not in ("time", "spectral"):
+            raise ValueError(
+                f'unknown integral RMS method "{integral_rms_method}"; '
+                'must be one of "time" or "spectral"'
+            )
+
         self._metrics_queue["metrics"] = None
+        self._integral_rms_method = integral_rms_method
+
+        if integral_rms_method == "spectral" and self._psd_freq_bin_width is None:
+            self._psd_freq_bin_width = 0.2
+            self._psd_window = "hanning"
 
         if "pvss" not in self._metrics_queue:
             self._pvss_init_freq = 1
@@ -354,16 +781,29 @@ class GetDataBuilder:
 
         return self
 
-    def add_peaks(self, *, margin_len):
+    def add_peaks(self, *, margin_len, top_k=1, min_separation=None):
         """
-        Add windows about the acceleration's peak value to the calculation
+        Add windows about the acceleration's peak values to the calculation
         queue.
 
         :param margin_len: the number of samples on each side of a peak to
             include in the windows
+        :param top_k: the number of peaks to find for each axis & for the
+            resultant; by default, only the largest value
+        :param min_separation: the minimum separation (in samples) between the
+            peaks of an axis; each peak is the largest value within this many
+            samples on either side. Defaults to `margin_len`; only used if
+            `top_k > 1`
         """
+        if top_k < 1:
+            raise ValueError(f"invalid number of peaks {top_k}; must be at least 1")
+        if min_separation is None:
+            min_separation = margin_len
+
         self._metrics_queue["peaks"] = None
         self._peak_window_margin_len = margin_len
+        self._peak_top_k = top_k
+        self._peak_min_separation = min_separation
 
         return self
 
@@ -384,28 +824,141 @@ class GetDataBuilder:
 
         return self
 
+    def add_segments(self, *, duration):
+        """
+        Add per-segment analyses to the calculation queue.
+
+        The recording is split into consecutive time segments, and each
+        segment gets its own acceleration metrics (RMS acceleration, velocity &
+        displacement; peak acceleration), PSD and VC curves. The PSD & VC
+        curves use the parameters from `add_psd` & `add_vc_curves` if set,
+        and the defaults of `add_vc_curves` otherwise.
+
+        :param duration: the duration (in seconds) of each segment
+        """
+        self._metrics_queue["segment_metrics"] = None
+        self._metrics_queue["segment_psd"] = None
+        self._metrics_queue["segment_vc_curves"] = None
+        self._segment_duration = duration
+
+        if "psd" not in self._metrics_queue and "vc_curves" not in self._metrics_queue:
+            self._psd_freq_bin_width = 0.2
+            self._psd_window = "hanning"
+        if "vc_curves" not in self._metrics_queue:
+            self._vc_init_freq = 1
+            self._vc_bins_per_octave = 3
+
+        return self
+
+    def add_rolling(self, *, window, step=None, stats=("rms", "peak", "mean")):
+        """
+        Add rolling statistics of the acceleration, rotation speed & microphone
+        to the calculation queue.
+
+        Each statistic is calculated over sliding time windows, and output as
+        a time series with one value per window; its cost doesn't depend on the
+        window length.
+
+        :param window: the duration (in seconds) of each window
+        :param step: the time (in seconds) between the starts of consecutive
+            windows; by default, the windows don't overlap
+        :param stats: the statistics to calculate, any of "rms", "peak" (i.e.,
+            the maximum absolute value) & "mean"
+        """
+        if step is None:
+            step = window
+        if window <= 0 or step <= 0:
+            raise ValueError(
+                f"invalid window {window} & step {step}; both must be positive"
+            )
+        stats = tuple(stats)
+        unknown_stats = set(stats) - set(_ROLLING_STAT_LABELS)
+        if not stats or unknown_stats:
+            raise ValueError(
+                f"invalid rolling statistics {list(stats)}; "
+                f"must be any of {list(_ROLLING_STAT_LABELS)}"
+            )
+
+        self._metrics_queue["rolling"] = None
+        self._rolling_window = window
+        self._rolling_step = step
+        self._rolling_stats = stats
+
+        return self
+
+    def _config(self):
+        """Summarize the calculation configuration, for use as a cache key."""
+        config = {
+            k: v
+            for (k, v) in vars(self).items()
+            if k not in ("_cache", "_record_timing", "_prescan")
+        }
+        # The scratch location doesn't affect the results
+        config["_analyzer_kwargs"] = {
+            k: v for (k, v) in self._analyzer_kwargs.items() if k != "scratch_dir"
+        }
+        return sorted((k, repr(v)) for (k, v) in config.items())
+
     def _get_data(self, filename):
         """
-        Calculate data from a single recording into a pandas object.
+        Calculate data from a single recording into a pandas object, or load
+        it from the cache if available.
 
         Used internally by `aggregate_data`.
         """
+        if not self._record_timing:
+            return self._load_data(filename)
+
+        recorder = perf.PerfRecorder()
+        with perf.recording(recorder), recorder.stage("GetDataBuilder._get_data"):
+            data = self._load_data(filename)
+        data["perf"] = recorder.to_frame()
+
+        return data
+
+    def _load_data(self, filename):
+        """Calculate data from a single recording, or load it from the cache."""
+        if self._cache is None:
+            return self._calc_data(filename)
+
+        config = self._config()
+        data = self._cache.get(filename, config)
+        if data is not None:
+            print(f"loading {filename} from cache...")
+            return data
+
+        data = self._calc_data(filename)
+        self._cache.put(filename, config, data)
+        return data
+
+    def _calc_data(self, filename):
+        """Calculate data from a single recording into a pandas object."""
         print(f"processing {filename}...")
 
         data = {}
-        with idelib.importFile(filename) as ds:
-            analyzer = Analyzer(
-                ds,
-                **self._analyzer_kwargs,
-                psd_window=self._psd_window,
-                psd_freq_bin_width=self._psd_freq_bin_width,
-                pvss_init_freq=self._pvss_init_freq,
-                pvss_bins_per_octave=self._pvss_bins_per_octave,
-                vc_init_freq=self._vc_init_freq,
-                vc_bins_per_octave=self._vc_bins_per_octave,
-            )
+        with perf.stage("idelib.importFile"):
+            ds = idelib.importFile(filename)
+        with ds:
+            with perf.stage("Analyzer.__init__"):
+                analyzer = Analyzer(
+                    ds,
+                    **self._analyzer_kwargs,
+                    psd_window=self._psd_window,
+                    psd_average=self._psd_average,
+                    psd_median_rtol=self._psd_median_rtol,
+                    psd_freq_bin_width=self._psd_freq_bin_width,
+                    pvss_init_freq=self._pvss_init_freq,
+                    pvss_bins_per_octave=self._pvss_bins_per_octave,
+                    vc_init_freq=self._vc_init_freq,
+                    vc_bins_per_octave=self._vc_bins_per_octave,
+                    segment_duration=self._segment_duration,
+                    integral_rms_method=self._integral_rms_method,
+                    peak_top_k=self._peak_top_k,
+                    peak_min_separation=self._peak_min_separation,
+                )
 
-            data["meta"] = _make_meta(ds)
+            with perf.stage("_make_meta"):
+                data["meta"] = _make_meta(ds)
 
             funcs = dict(
                 psd=partial(
@@ -420,56 +973,308 @@ class GetDataBuilder:
                     margin_len=self._peak_window_margin_len,
                 ),
                 vc_curves=_make_vc_curves,
+                segment_metrics=_make_segment_metrics,
+                segment_psd=partial(
+                    _make_segment_psd,
+                    fstart=self._psd_freq_start_octave,
+                    bins_per_octave=self._psd_bins_per_octave,
+                ),
+                segment_vc_curves=_make_segment_vc_curves,
+                rolling=partial(
+                    _make_rolling,
+                    window=self._rolling_window,
+                    step=self._rolling_step,
+                    stat_names=self._rolling_stats,
+                ),
             )
-            for output_type in self._metrics_queue.keys():
-                data[output_type] = funcs[output_type](analyzer)
+            try:
+                for output_type in self._metrics_queue.keys():
+                    func = funcs[output_type]
+                    with perf.stage(getattr(func, "func", func).__name__):
+                        data[output_type] = func(analyzer)
+            finally:
+                analyzer.close()
 
         return data
 
-    def aggregate_data(self, filenames):
-        """Compile configured data from the given files into a dataframe."""
-        series_lists = zip(
-            *(self._get_data(filename).values() for filename in filenames)
+    def _prescan_files(self, filenames):
+        """
+        Scan the metadata of recordings, leaving out those without data for any
+        of the configured calculations.
+
+        Used internally by `aggregate_data` & `aggregate_data_to`.
+
+        :return: the remaining filenames, and the size (in bytes) of the
+            relevant data in each prescanned recording
+        """
+        utypes = set().union(*(_OUTPUT_UTYPES[k] for k in self._metrics_queue))
+
+        kept_filenames, data_sizes = [], {}
+        for filename in filenames:
+            try:
+                summary = ebmlite_utils.prescan(filename)
+            except Exception:
+                # leave unreadable files to be reported by the full import
+                kept_filenames.append(filename)
+                continue
+
+            relevant_channels = [
+                channel
+                for channel in summary.channels.values()
+                if any(
+                    ide_utils.UTYPE_GROUPS.get(sch.label) in utypes
+                    for sch in channel.subchannels
+                )
+            ]
+            if not any(
+                channel.sample_count is None or channel.sample_count > 0
+                for channel in relevant_channels
+            ):
+                print(f"skipping {filename}, no data to analyze...")
+                continue
+
+            kept_filenames.append(filename)
+            data_sizes[filename] = sum(
+                channel.payload_size for channel in relevant_channels
+            )
+
+        return kept_filenames, data_sizes
+
+    def _iter_data_parallel(self, filenames, workers, data_sizes=None):
+        """
+        Calculate data from several recordings over a pool of processes,
+        yielding the data of each recording as soon as it is ready.
+
+        Files are submitted largest-first (by their `data_sizes` if given, else
+        their file sizes), so that no large file is left straggling at the end
+        of the batch. At most `2 * workers` files are
+        pending at once, so that finished results don't pile up while they're
+        being consumed. Any file that fails to process is logged and skipped.
+
+        :return: an iterator of the indices of the successfully processed
+            files & their data, in order of completion
+        """
+
+        def file_size(filename):
+            if data_sizes is not None and filename in data_sizes:
+                return data_sizes[filename]
+            try:
+                return os.path.getsize(filename)
+            except OSError:
+                return 0
+
+        schedule = iter(
+            sorted(range(len(filenames)), key=lambda i: -file_size(filenames[i]))
         )
 
-        print("aggregating data...")
-        meta, *dfs = (
-            pd.concat(
-                series_list,
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = {}
+            while True:
+                for i in itertools.islice(schedule, 2 * workers - len(pending)):
+                    pending[executor.submit(_get_data_payload, self, filenames[i])] = i
+                if not pending:
+                    break
+
+                done, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    i = pending.pop(future)
+                    try:
+                        payload = future.result()
+                    except Exception:
+                        logging.exception(f"failed to process {filenames[i]}")
+                        continue
+
+                    yield i, {k: _from_payload(v) for (k, v) in payload.items()}
+
+    def _iter_data_serial(self, filenames):
+        """
+        Calculate data from several recordings, one at a time in the current
+        process. As in `_iter_data_parallel`, any file that fails to process
+        is logged and skipped.
+
+        Used internally by `aggregate_data` & `aggregate_data_to`.
+
+        :return: an iterator of the indices of the successfully processed
+            files & their data, in the given order
+        """
+        for i, filename in enumerate(filenames):
+            try:
+                data = self._get_data(filename)
+            except Exception:
+                logging.exception(f"failed to process {filename}")
+                continue
+
+            yield i, data
+
+    def _get_data_parallel(self, filenames, workers, data_sizes=None):
+        """
+        Calculate data from several recordings over a pool of processes (see
+        `_iter_data_parallel`); results are returned in the given order.
+
+        Used internally by `aggregate_data`.
+
+        :return: the successfully processed filenames, and their data
+        """
+        file_data = dict(self._iter_data_parallel(filenames, workers, data_sizes))
+
+        return (
+            [filenames[i] for i in sorted(file_data)],
+            [file_data[i] for i in sorted(file_data)],
+        )
+
+    def aggregate_data(self, filenames, workers=None):
+        """
+        Compile configured data from the given files into a dataframe.
+
+        :param filenames: the recording files to process
+        :param workers: the number of worker processes over which to spread
+            the files; if `None`, files are processed one at a time in the
+            current process. Either way, a file that fails to process is
+            logged and left out of the results, rather than aborting the batch.
+
+        The text columns of the long-form tables (e.g., the filename, axis &
+        serial number) are categorical.
+        """
+        data_sizes = None
+        if self._prescan:
+            filenames, data_sizes = self._prescan_files(filenames)
+
+        if workers is None:
+            file_data = dict(self._iter_data_serial(filenames))
+            filenames = [filenames[i] for i in file_data]
+            file_data = list(file_data.values())
+        else:
+            filenames, file_data = self._get_data_parallel(
+                filenames, workers, data_sizes
+            )
+
+        if self._record_timing:
+            perf_df = pd.concat(
+                [data.pop("perf") for data in file_data],
                 keys=filenames,
-                names=["filename"]
-                + next(s for s in series_list if s is not None).index.names,
+                names=["filename"],
+            ).reset_index(level="filename")
+            recorder = perf.PerfRecorder()
+        else:
+            recorder = None
+
+        print("aggregating data...")
+        with perf.recording(recorder), perf.stage("GetDataBuilder.aggregate_data"):
+            dfs = self._aggregate(filenames, file_data)
+        if recorder is not None:
+            dfs["perf"] = pd.concat(
+                [perf_df, recorder.to_frame()], ignore_index=True, sort=False
             )
-            if series_list and any(s is not None for s in series_list)
-            else None
-            for series_list in series_lists
-        )
 
-        meta = meta.unstack(level=1)
+        print("done!")
+
+        return OutputStruct(dfs)
+
+    def aggregate_data_to(self, filenames, sink, workers=None):
+        """
+        Compile configured data from the given files into an output sink,
+        one file at a time.
+
+        Unlike with `aggregate_data`, the results of each file are written to
+        the sink as soon as the file is processed, and then released, so that
+        memory use doesn't grow with the number of files. Files already stored
+        in the sink are skipped, so calling this again with the same sink after
+        an interruption resumes the work where it left off.
+
+        :param filenames: the recording files to process
+        :param sink: the output sink, e.g., a `bsvp.sinks.CsvFolderSink`,
+            `bsvp.sinks.SqliteSink` or `bsvp.sinks.ParquetDatasetSink`
+        :param workers: the number of worker processes over which to spread
+            the files, as in `aggregate_data`; with workers, files are written
+            to the sink in order of completion
+        :return: the filenames written to the sink
+        """
+        completed = sink.completed()
+        for filename in filenames:
+            if filename in completed:
+                print(f"skipping {filename}, already in sink...")
+        filenames = [filename for filename in filenames if filename not in completed]
+
+        data_sizes = None
+        if self._prescan:
+            filenames, data_sizes = self._prescan_files(filenames)
+
+        if workers is None:
+            file_data = self._iter_data_serial(filenames)
+        else:
+            file_data = self._iter_data_parallel(filenames, workers, data_sizes)
+
+        written = []
+        for i, data in file_data:
+            filename = filenames[i]
+            perf_df = data.pop("perf", None)
+            dfs = self._aggregate([filename], [data])
+            if perf_df is not None:
+                perf_df.insert(0, "filename", filename)
+                dfs["perf"] = perf_df
+
+            sink.write(filename, dfs)
+            written.append(filename)
+
+        print("done!")
 
-        def reformat(series):
-            if series is None:
+        return written
+
+    def _aggregate(self, filenames, file_data):
+        """Merge the data of several recordings into long-form dataframes."""
+        meta = pd.DataFrame(
+            {
+                key: np.array([data["meta"][key] for data in file_data], dtype=dtype)
+                for (key, dtype) in [
+                    ("serial number", object),
+                    ("start time", "datetime64[ns]"),
+                ]
+            },
+            index=pd.Index(filenames, name="filename"),
+        )
+        file_keys = pd.Categorical(filenames)
+        serial_numbers = pd.Categorical(meta["serial number"])
+        start_times = meta["start time"].to_numpy()
+
+        def reformat(series_list):
+            i_files = [i for (i, s) in enumerate(series_list) if s is not None]
+            if not i_files:
                 return None
 
-            df = series.to_frame().T.melt()
-            df["serial number"] = meta.loc[df["filename"], "serial number"].reset_index(
-                drop=True
+            # Precompute each row's file, from which its file-level columns
+            # are taken
+            i_file_rows = np.repeat(i_files, [len(series_list[i]) for i in i_files])
+            index_names = series_list[i_files[0]].index.names
+
+            columns = dict(
+                filename=pd.Categorical.from_codes(
+                    file_keys.codes[i_file_rows], dtype=file_keys.dtype
+                )
             )
-            df["start time"] = meta.loc[df["filename"], "start time"].reset_index(
-                drop=True
+            for level, name in enumerate(index_names):
+                columns[name] = _concat_level_values(
+                    [series_list[i].index for i in i_files], level
+                )
+            columns["value"] = np.concatenate(
+                [series_list[i].to_numpy() for i in i_files]
             )
+            columns["serial number"] = pd.Categorical.from_codes(
+                serial_numbers.codes[i_file_rows], dtype=serial_numbers.dtype
+            )
+            columns["start time"] = start_times[i_file_rows]
 
-            return df
+            return pd.DataFrame(columns, copy=False)
 
-        dfs = dict(
+        return dict(
             meta=meta,
-            **{key: reformat(df) for (key, df) in zip(self._metrics_queue.keys(), dfs)},
+            **{
+                key: reformat([data[key] for data in file_data])
+                for key in self._metrics_queue.keys()
+            },
         )
 
-        print("done!")
-
-        return OutputStruct(dfs)
-
 
 class OutputStruct:
     """A data wrapper class with methods for common export operations."""
@@ -489,6 +1294,47 @@ class OutputStruct:
             path = os.path.join(folder_path, f"{k}.csv")
             df.to_csv(path, index=(k == "meta"))
 
+    def to_parquet_folder(
+        self,
+        folder_path,
+        *,
+        compression="snappy",
+        value_dtype="float32",
+        row_group_size=None,
+    ):
+        """
+        Write data to a folder as Parquet files (requires `pyarrow`).
+
+        Text columns (e.g., the filename, axis & serial number) are stored
+        dictionary-encoded; see `bsvp.parquet.ParquetFolderWriter`, which can
+        also write results incrementally.
+
+        :param folder_path: the output directory path for .parquet files
+        :param compression: the compression codec (e.g., "snappy", "zstd",
+            "gzip"), or `None` for no compression
+        :param value_dtype: the type to which the "value" columns are
+            converted, or `None` to keep their original type
+        :param row_group_size: the maximum number of rows per row group
+        """
+        with ParquetFolderWriter(
+            folder_path, compression=compression, value_dtype=value_dtype
+        ) as writer:
+            writer.write(self.dataframes, row_group_size=row_group_size)
+
+    def to_chrome_trace(self, path):
+        """
+        Write the stage timings recorded with `GetDataBuilder(record_timing=True)`
+        as a Chrome trace-event JSON file.
+
+        :param path: the output file path
+        """
+        if "perf" not in self.dataframes:
+            raise ValueError(
+                "no timing data to export; set `record_timing=True` in `GetDataBuilder`"
+            )
+
+        perf.to_chrome_trace(self.dataframes["perf"], path)
+
     def to_html_plots(self, folder_path=None, show=False):
         """
         Generate plots in HTML.
@@ -525,8 +1371,15 @@ class OutputStruct:
                 fig.update_yaxes(type="log", title_text="Velocity (mm/s)")
                 fig.update_layout(title="Pseudo Velocity Shock Spectrum (PVSS)")
 
-            elif k == "metrics":
-                logging.warning("HTML plot for metrics not currently implemented")
+            elif k in (
+                "metrics",
+                "perf",
+                "segment_metrics",
+                "segment_psd",
+                "segment_vc_curves",
+                "rolling",
+            ):
+                logging.warning(f"HTML plot for {k} not currently implemented")
                 continue
 
             elif k == "peaks":
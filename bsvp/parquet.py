@@ -0,0 +1,214 @@
+"""
+Columnar Parquet export of `GetDataBuilder` results.
+
+The long-format tables of `aggregate_data` repeat their text columns (e.g., the
+filename, axis & serial number) on every row; in Parquet, these are stored
+dictionary-encoded, i.e. as small integer codes into a table of the distinct
+values. Together with single-precision values & compression, this makes the
+files a fraction of the size of the equivalent CSV's.
+
+Requires `pyarrow`.
+"""
+import hashlib
+import os
+import tempfile
+
+import pandas as pd
+
+
+def _to_storage_frame(df, value_dtype):
+    """Convert a results table into its storage types."""
+    if pd.api.types.is_object_dtype(df.index):
+        df = df.set_axis(df.index.astype("category"), axis=0)
+    df = df.assign(
+        **{
+            column: df[column].astype("category")
+            for column in df.columns
+            if pd.api.types.is_object_dtype(df[column])
+        }
+    )
+    if value_dtype is not None and "value" in df.columns:
+        df = df.assign(value=df["value"].astype(value_dtype))
+
+    return df
+
+
+class ParquetFolderWriter:
+    """
+    Write results tables to a folder of Parquet files, one per table.
+
+    Each call to `write` appends one row group to each file, so results can be
+    written incrementally (e.g., as each recording finishes). The files are
+    only complete once the writer is closed.
+
+    :param folder_path: the output directory path for .parquet files
+    :param compression: the compression codec (e.g., "snappy", "zstd",
+        "gzip"), or `None` for no compression
+    :param value_dtype: the type to which the tables' "value" columns are
+        converted, or `None` to keep their original type
+    """
+
+    def __init__(self, folder_path, *, compression="snappy", value_dtype="float32"):
+        import pyarrow.parquet
+
+        self._pq = pyarrow.parquet
+        self.folder_path = folder_path
+        self.compression = compression
+        self.value_dtype = value_dtype
+        self._writers = {}
+
+        os.makedirs(folder_path, exist_ok=True)
+
+    def write(self, dataframes, row_group_size=None):
+        """
+        Append results tables to their files.
+
+        :param dataframes: a dict of results tables, as in
+            `OutputStruct.dataframes`; `None` entries are skipped
+        :param row_group_size: the maximum number of rows per row group; by
+            default, each table is written as one row group
+        """
+        import pyarrow as pa
+
+        for k, df in dataframes.items():
+            if df is None:
+                continue
+
+            df = _to_storage_frame(df, self.value_dtype)
+            # Only keep meaningful indexes (i.e., the "meta" table's filenames)
+            preserve_index = df.index.name is not None
+            writer = self._writers.get(k)
+            if writer is None:
+                table = pa.Table.from_pandas(df, preserve_index=preserve_index)
+                writer = self._writers[k] = self._pq.ParquetWriter(
+                    os.path.join(self.folder_path, f"{k}.parquet"),
+                    table.schema,
+                    compression=self.compression,
+                    use_dictionary=[
+                        field.name
+                        for field in table.schema
+                        if pa.types.is_dictionary(field.type)
+                    ],
+                )
+            else:
+                table = pa.Table.from_pandas(
+                    df, schema=writer.schema, preserve_index=preserve_index
+                )
+
+            writer.write_table(table, row_group_size=row_group_size)
+
+    def close(self):
+        """Finish writing all files."""
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ParquetDatasetSink:
+    """
+    Store results tables as Parquet datasets, with one file per recording; an
+    output sink for `GetDataBuilder.aggregate_data_to` (see `bsvp.sinks`).
+
+    Each table is a subfolder of `folder_path` (e.g., "psd/"), which can be
+    read whole with `pandas.read_parquet`. Every file is written atomically,
+    and a recording's "meta" file is written last, marking its results as
+    complete; on opening, any files of incomplete recordings (e.g., from an
+    interrupted run) are deleted.
+
+    :param folder_path: the output directory path for the datasets
+    :param compression: the compression codec (e.g., "snappy", "zstd",
+        "gzip"), or `None` for no compression
+    :param value_dtype: the type to which the tables' "value" columns are
+        converted, or `None` to keep their original type
+    """
+
+    def __init__(self, folder_path, *, compression="snappy", value_dtype="float32"):
+        import pyarrow.parquet
+
+        self._pq = pyarrow.parquet
+        self.folder_path = folder_path
+        self.compression = compression
+        self.value_dtype = value_dtype
+
+        os.makedirs(os.path.join(folder_path, "meta"), exist_ok=True)
+        self._completed = {
+            self._pq.read_table(path, columns=["filename"])
+            .column("filename")[0]
+            .as_py(): os.path.basename(path)
+            for path in self._paths("meta")
+        }
+        self._remove_incomplete()
+
+    def _paths(self, table):
+        table_path = os.path.join(self.folder_path, table)
+        return [
+            os.path.join(table_path, name)
+            for name in sorted(os.listdir(table_path))
+            if name.endswith(".parquet")
+        ]
+
+    def _remove_incomplete(self):
+        complete_names = set(self._completed.values())
+        for entry in os.scandir(self.folder_path):
+            if not entry.is_dir():
+                continue
+            for name in os.listdir(entry.path):
+                if name.endswith(".tmp") or (
+                    name.endswith(".parquet") and name not in complete_names
+                ):
+                    os.remove(os.path.join(entry.path, name))
+
+    def completed(self):
+        """Get the filenames of the recordings already stored."""
+        return set(self._completed)
+
+    def write(self, filename, dataframes):
+        """
+        Store the results tables of one recording.
+
+        :param filename: the recording's filename
+        :param dataframes: a dict of results tables, as in
+            `OutputStruct.dataframes`; `None` entries are skipped
+        """
+        import pyarrow as pa
+
+        name = hashlib.sha256(filename.encode()).hexdigest()[:32] + ".parquet"
+        # The "meta" file marks the recording as complete, so goes last
+        keys = sorted(dataframes, key=lambda k: k == "meta")
+        for k in keys:
+            df = dataframes[k]
+            if df is None:
+                continue
+
+            df = _to_storage_frame(df, self.value_dtype)
+            table = pa.Table.from_pandas(df, preserve_index=df.index.name is not None)
+
+            table_path = os.path.join(self.folder_path, k)
+            os.makedirs(table_path, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=table_path, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as file:
+                    self._pq.write_table(table, file, compression=self.compression)
+                    file.flush()
+                    os.fsync(file.fileno())
+                os.replace(tmp_path, os.path.join(table_path, name))
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+
+        self._completed[filename] = name
+
+    def close(self):
+        """Release the sink; all results are already stored."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
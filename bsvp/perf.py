@@ -0,0 +1,125 @@
+"""
+Per-stage timing instrumentation for `GetDataBuilder` runs.
+
+Stages are timed only while a `PerfRecorder` is active (see `recording`);
+otherwise, each instrumented call costs a single context-variable lookup.
+"""
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+
+PERF_COLUMNS = ["stage", "depth", "start time", "duration", "pid", "tid"]
+
+_active_recorder = contextvars.ContextVar("active_recorder", default=None)
+
+
+class PerfRecorder:
+    """Collect the timings of (possibly nested) calculation stages."""
+
+    def __init__(self):
+        self.records = []
+        self._depth = 0
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time the enclosed code as a stage."""
+        depth = self._depth
+        self._depth += 1
+        start_time = time.time()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - t0
+            self._depth -= 1
+            self.records.append(
+                (name, depth, start_time, duration, os.getpid(), threading.get_ident())
+            )
+
+    def to_frame(self):
+        """Tabulate the recorded stages, in order of their start times."""
+        df = pd.DataFrame.from_records(self.records, columns=PERF_COLUMNS)
+        df["start time"] = pd.to_datetime(df["start time"], unit="s")
+        df["duration"] = pd.to_timedelta(df["duration"], unit="s")
+
+        return df.sort_values(["start time", "depth"], kind="mergesort").reset_index(
+            drop=True
+        )
+
+
+@contextlib.contextmanager
+def recording(recorder):
+    """Record all instrumented stages within the enclosed code to `recorder`."""
+    token = _active_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _active_recorder.reset(token)
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Time the enclosed code as a stage, if recording."""
+    recorder = _active_recorder.get()
+    if recorder is None:
+        yield
+        return
+
+    with recorder.stage(name):
+        yield
+
+
+def timed(method):
+    """Time each call of a function as a stage, if recording."""
+    name = method.__qualname__
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        recorder = _active_recorder.get()
+        if recorder is None:
+            return method(*args, **kwargs)
+
+        with recorder.stage(name):
+            return method(*args, **kwargs)
+
+    return wrapper
+
+
+def to_chrome_trace(perf_df, path):
+    """
+    Write a table of stage timings as a Chrome trace-event JSON file, viewable
+    in `chrome://tracing` or https://ui.perfetto.dev.
+
+    :param perf_df: a table of stage timings, with the columns of
+        `PerfRecorder.to_frame` and optionally a "filename" column
+    :param path: the output file path
+    """
+    t0 = perf_df["start time"].min()
+    events = [
+        dict(
+            name=row["stage"],
+            cat="bsvp",
+            ph="X",
+            ts=(row["start time"] - t0) / np.timedelta64(1, "us"),
+            dur=row["duration"] / np.timedelta64(1, "us"),
+            pid=int(row["pid"]),
+            tid=int(row["tid"]),
+            args=(
+                {"filename": row["filename"]}
+                if isinstance(row.get("filename"), str)
+                else {}
+            ),
+        )
+        for (_i, row) in perf_df.iterrows()
+    ]
+
+    with open(path, "w") as file:
+        json.dump(dict(traceEvents=events, displayTimeUnit="ms"), file)
@@ -13,24 +13,58 @@ def as_quat_array(q, force_copy=False):
     return q
 
 
-def quat_mul(q1, q2):
-    """Multiply two quaternion arrays."""
+def _sum_products(out, terms, tmp):
+    """
+    Sum signed products of quaternion components into a preallocated array.
+
+    :param out: the output array
+    :param terms: a sequence of `(sign, a, b)` terms, each adding `sign * a * b`;
+        the first term's sign must be positive
+    :param tmp: a scratch array with the same shape as `out`
+    """
+    (_, a, b), *terms = terms
+    np.multiply(a, b, out=out)
+    for sign, a, b in terms:
+        np.multiply(a, b, out=tmp)
+        (np.add if sign > 0 else np.subtract)(out, tmp, out=out)
+
+    return out
+
+
+def _components(q):
+    """Split a quaternion array into views of its w, x, y & z components."""
+    return tuple(q[..., i] for i in range(4))
+
+
+def quat_mul(q1, q2, out=None):
+    """
+    Multiply two quaternion arrays.
+
+    :param out: an optional array in which to store the result; must not
+        overlap with either input
+    """
     q1, q2 = as_quat_array(q1), as_quat_array(q2)
+    if out is None:
+        out = np.empty(np.broadcast(q1, q2).shape, dtype=np.result_type(q1, q2))
 
-    result = np.empty(np.broadcast(q1, q2).shape, dtype=np.result_type(q1, q2))
+    w1, x1, y1, z1 = _components(q1)
+    w2, x2, y2, z2 = _components(q2)
+    tmp = np.empty_like(out[..., 0])
 
-    result[..., 0] = np.sum(q1 * q2 * np.array([1, -1, -1, -1]), axis=-1)
-    result[..., 1] = np.sum(
-        q1 * q2[..., [1, 0, 3, 2]] * np.array([1, 1, 1, -1]), axis=-1
+    _sum_products(
+        out[..., 0], [(1, w1, w2), (-1, x1, x2), (-1, y1, y2), (-1, z1, z2)], tmp
     )
-    result[..., 2] = np.sum(
-        q1 * q2[..., [2, 3, 0, 1]] * np.array([1, -1, 1, 1]), axis=-1
+    _sum_products(
+        out[..., 1], [(1, w1, x2), (1, x1, w2), (1, y1, z2), (-1, z1, y2)], tmp
     )
-    result[..., 3] = np.sum(
-        q1 * q2[..., [3, 2, 1, 0]] * np.array([1, 1, -1, 1]), axis=-1
+    _sum_products(
+        out[..., 2], [(1, w1, y2), (-1, x1, z2), (1, y1, w2), (1, z1, x2)], tmp
+    )
+    _sum_products(
+        out[..., 3], [(1, w1, z2), (1, x1, y2), (-1, y1, x2), (1, z1, w2)], tmp
     )
 
-    return result
+    return out
 
 
 def quat_conj(q):
@@ -51,13 +85,63 @@ def quat_div(q1, q2):
     return quat_mul(q1, quat_inv(q2))
 
 
-def quat_to_angvel(q, *dt):
+def _angvel_kernel(q_prime, q, out, tmp):
+    """
+    Calculate angular velocities from quaternions & their derivatives, i.e.
+    the vector part of `2 * q_prime * q^-1`, into a preallocated array.
+    """
+    dw, dx, dy, dz = _components(q_prime)
+    w, x, y, z = _components(q)
+
+    norm = _sum_products(
+        np.empty_like(tmp), [(1, w, w), (1, x, x), (1, y, y), (1, z, z)], tmp
+    )
+    np.divide(2, norm, out=norm)
+
+    _sum_products(out[..., 0], [(1, dx, w), (-1, dw, x), (-1, dy, z), (1, dz, y)], tmp)
+    _sum_products(out[..., 1], [(1, dy, w), (-1, dw, y), (1, dx, z), (-1, dz, x)], tmp)
+    _sum_products(out[..., 2], [(1, dz, w), (-1, dw, z), (-1, dx, y), (1, dy, x)], tmp)
+    out *= norm[..., np.newaxis]
+
+    return out
+
+
+def quat_to_angvel(q, *dt, chunk_len=2 ** 14):
     """
     Calculate the angular velocity for an array of orientation quaternions.
 
+    A 1D series of quaternions is processed in chunks along the time axis, so
+    that all intermediate arrays are chunk-sized; each chunk is extended by one
+    sample on either side for the derivative's stencil.
+
     :param q: quaternion array; requires q.shape[-1] == 4
     :param dt: the time corresponing to each quaternion sample
+    :param chunk_len: the number of samples processed at once
     :return: the angular velocity
     """
-    q_prime = np.gradient(q, *dt, axis=range(q.ndim - 1), edge_order=2)
-    return 2 * quat_div(q_prime, q)[..., 1:]
+    q = as_quat_array(q)
+    if q.ndim != 2:
+        q_prime = np.gradient(q, *dt, axis=range(q.ndim - 1), edge_order=2)
+        return 2 * quat_div(q_prime, q)[..., 1:]
+
+    n = len(q)
+    dtype = q.dtype if np.issubdtype(q.dtype, np.inexact) else np.float64
+    # stored component-major, so that each component is contiguous
+    out = np.empty((3, n), dtype=dtype).T
+    tmp = np.empty(min(n, chunk_len), dtype=dtype)
+
+    for start in range(0, n, chunk_len):
+        stop = min(start + chunk_len, n)
+        # the `edge_order=2` stencil needs at least 3 samples
+        halo_start = max(min(start - 1, n - 3), 0)
+        halo_stop = min(max(stop + 1, 3), n)
+
+        chunk_dt = [
+            dt_i[halo_start:halo_stop] if np.ndim(dt_i) == 1 else dt_i for dt_i in dt
+        ]
+        q_prime = np.gradient(q[halo_start:halo_stop], *chunk_dt, axis=0, edge_order=2)[
+            start - halo_start : stop - halo_start
+        ]
+        _angvel_kernel(q_prime, q[start:stop], out[start:stop], tmp[: stop - start])
+
+    return out
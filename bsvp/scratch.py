@@ -0,0 +1,46 @@
+"""
+Disk-backed scratch storage for intermediate arrays too large to hold in
+memory.
+
+Arrays are allocated as memory-mapped temporary files, so the operating system
+pages them between disk & memory as needed; a recording larger than the
+available memory then degrades to disk speed, rather than exhausting memory.
+"""
+import os
+import shutil
+import tempfile
+import weakref
+
+import numpy as np
+
+
+class ScratchSpace:
+    """
+    A temporary directory of memory-mapped arrays.
+
+    The directory & all arrays in it are deleted on `cleanup`, or otherwise
+    once the `ScratchSpace` object is garbage-collected.
+
+    :param dirpath: the directory in which to create the temporary directory;
+        if `None`, the system default is used (see `tempfile.gettempdir`)
+    """
+
+    def __init__(self, dirpath=None):
+        self.path = tempfile.mkdtemp(prefix="bsvp-", dir=dirpath)
+        self._finalizer = weakref.finalize(
+            self, shutil.rmtree, self.path, ignore_errors=True
+        )
+
+    def empty(self, shape, dtype=np.float64):
+        """Allocate a new uninitialized memory-mapped array."""
+        if np.prod(shape) == 0:
+            # can't memory-map an empty file
+            return np.empty(shape, dtype=dtype)
+
+        fd, filepath = tempfile.mkstemp(suffix=".dat", dir=self.path)
+        os.close(fd)
+        return np.memmap(filepath, dtype=dtype, mode="w+", shape=shape)
+
+    def cleanup(self):
+        """Delete the directory & all arrays in it."""
+        self._finalizer()
@@ -0,0 +1,237 @@
+"""
+Output sinks for the incremental aggregation of `GetDataBuilder` results.
+
+With `GetDataBuilder.aggregate_data_to`, the results tables of each recording
+are passed to a sink as soon as the recording is processed, and then released.
+A sink provides:
+
+- `write(filename, dataframes)`: store the results tables of one recording
+  (as in `OutputStruct.dataframes`) atomically; after an interruption, either
+  all or none of a recording's results are kept
+- `completed()`: get the filenames of the recordings already stored, which are
+  skipped when resuming an interrupted run
+- `close()`: release any resources held by the sink
+
+The sinks here store results as CSV files (`CsvFolderSink`), in a SQLite
+database (`SqliteSink`), or as Parquet datasets (`ParquetDatasetSink`, which
+requires `pyarrow`).
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import warnings
+
+import pandas as pd
+
+from bsvp.parquet import ParquetDatasetSink
+
+
+__all__ = ["CsvFolderSink", "SqliteSink", "ParquetDatasetSink"]
+
+
+def _fsync_write(file, data):
+    file.write(data)
+    file.flush()
+    os.fsync(file.fileno())
+
+
+class CsvFolderSink:
+    """
+    Append results tables to a folder of CSV files, one per table, as written
+    by `OutputStruct.to_csv_folder`.
+
+    A journal file records each recording once its rows are written, along
+    with the sizes of the CSV files at that point. Any rows written after the
+    last journal entry (e.g., by an interrupted run) are truncated away when the
+    sink is opened.
+
+    :param folder_path: the output directory path for .CSV files
+    """
+
+    JOURNAL_NAME = "_completed.jsonl"
+    # Fixed, so that the timestamps of all recordings are formatted alike
+    DATE_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+    def __init__(self, folder_path):
+        self.folder_path = folder_path
+        self._journal_path = os.path.join(folder_path, self.JOURNAL_NAME)
+        self._completed = set()
+        self._sizes = {}
+
+        os.makedirs(folder_path, exist_ok=True)
+        self._recover()
+
+    def _table_path(self, k):
+        return os.path.join(self.folder_path, f"{k}.csv")
+
+    def _recover(self):
+        """Load the journal, and discard any results not recorded in it."""
+        try:
+            with open(self._journal_path) as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return
+
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                break  # a partially written entry, and the end of the journal
+
+        if len(entries) < len(lines):
+            fd, tmp_path = tempfile.mkstemp(dir=self.folder_path, suffix=".tmp")
+            with os.fdopen(fd, "w") as file:
+                _fsync_write(file, "".join(lines[: len(entries)]))
+            os.replace(tmp_path, self._journal_path)
+
+        self._completed = {entry["filename"] for entry in entries}
+        if entries:
+            self._sizes = entries[-1]["sizes"]
+        for k, size in self._sizes.items():
+            os.truncate(self._table_path(k), size)
+
+    def completed(self):
+        """Get the filenames of the recordings already stored."""
+        return set(self._completed)
+
+    def write(self, filename, dataframes):
+        """
+        Append the results tables of one recording.
+
+        :param filename: the recording's filename
+        :param dataframes: a dict of results tables, as in
+            `OutputStruct.dataframes`; `None` entries are skipped
+        """
+        sizes = dict(self._sizes)
+        for k, df in dataframes.items():
+            if df is None:
+                continue
+
+            path = self._table_path(k)
+            is_new = k not in sizes
+            if not is_new:
+                # drop any rows left by a failed write
+                os.truncate(path, sizes[k])
+            with open(path, "w" if is_new else "a", newline="") as file:
+                df.to_csv(
+                    file,
+                    header=is_new,
+                    index=(k == "meta"),
+                    date_format=self.DATE_FORMAT,
+                )
+                file.flush()
+                os.fsync(file.fileno())
+                sizes[k] = file.tell()
+
+        with open(self._journal_path, "a") as file:
+            _fsync_write(file, json.dumps(dict(filename=filename, sizes=sizes)) + "\n")
+
+        self._sizes = sizes
+        self._completed.add(filename)
+
+    def close(self):
+        """Release the sink; all results are already stored."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SqliteSink:
+    """
+    Append results tables to tables of a SQLite database.
+
+    Each recording's results are inserted in a single transaction, together
+    with its filename in the "_completed" table. Text columns are stored as
+    text, timestamps as ISO-format text, and time offsets (e.g., "peak
+    offset") as floating-point seconds.
+
+    :param path: the database file path
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._con = sqlite3.connect(path, isolation_level=None)
+        self._con.execute(
+            "CREATE TABLE IF NOT EXISTS _completed (filename TEXT PRIMARY KEY)"
+        )
+
+    def completed(self):
+        """Get the filenames of the recordings already stored."""
+        return {
+            filename
+            for (filename,) in self._con.execute("SELECT filename FROM _completed")
+        }
+
+    @staticmethod
+    def _to_sql_frame(df):
+        """Convert a results table into types storable by SQLite."""
+        if df.index.name is not None:
+            df = df.reset_index()
+
+        columns = {}
+        for column, values in df.items():
+            if pd.api.types.is_categorical_dtype(values):
+                values = values.astype(object)
+            if pd.api.types.is_datetime64_dtype(values):
+                values = values.dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+            elif pd.api.types.is_timedelta64_dtype(values):
+                values = values.dt.total_seconds()
+            columns[column] = values.astype(object).where(values.notna(), None)
+
+        return pd.DataFrame(columns)
+
+    def _create_table(self, k, df):
+        exists = self._con.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (k,)
+        ).fetchone()
+        if not exists:
+            with warnings.catch_warnings():
+                # column names are quoted, so may contain spaces
+                warnings.filterwarnings("ignore", "The spaces in these column names")
+                schema = pd.io.sql.get_schema(df.infer_objects(), k)
+            self._con.execute(schema)
+
+    def write(self, filename, dataframes):
+        """
+        Insert the results tables of one recording.
+
+        :param filename: the recording's filename
+        :param dataframes: a dict of results tables, as in
+            `OutputStruct.dataframes`; `None` entries are skipped
+        """
+        self._con.execute("BEGIN")
+        try:
+            for k, df in dataframes.items():
+                if df is None:
+                    continue
+
+                df = self._to_sql_frame(df)
+                self._create_table(k, df)
+                self._con.executemany(
+                    'INSERT INTO "{}" ({}) VALUES ({})'.format(
+                        k,
+                        ", ".join(f'"{column}"' for column in df.columns),
+                        ", ".join("?" * len(df.columns)),
+                    ),
+                    df.itertuples(index=False, name=None),
+                )
+            self._con.execute("INSERT INTO _completed VALUES (?)", (filename,))
+        except BaseException:
+            self._con.execute("ROLLBACK")
+            raise
+        self._con.execute("COMMIT")
+
+    def close(self):
+        """Close the database connection."""
+        self._con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
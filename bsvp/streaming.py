@@ -0,0 +1,849 @@
+"""
+Block-wise evaluation of the acceleration analyses in `Analyzer`.
+
+Instead of loading an entire channel into memory, the objects herein pull
+fixed-size blocks of samples from a recording and carry the state of each
+processing stage (unit conversion, highpass filtering, integration & metric
+reductions) from one block to the next. Peak memory is then set by the block
+length rather than the recording length.
+"""
+import heapq
+import warnings
+
+import numpy as np
+import scipy.ndimage
+import scipy.signal
+
+from common_utils.nre_utils import np_segments
+from common_utils.nre_utils.calc import filters, shock, stats
+
+
+# The block length used to reduce data that is already held in memory
+DEFAULT_BLOCK_LEN = 2 ** 16
+
+
+def searchsorted_time(eventarray, t):
+    """
+    Find the first sample index in an `EventArray` at or after the time `t`
+    (in seconds), without loading the array's timestamps into memory.
+
+    Equivalent to `np.searchsorted(eventarray.arraySlice()[0] * 1e-6, t)`.
+    """
+    lo, hi = 0, len(eventarray)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if eventarray.arraySlice(mid, mid + 1)[0, 0] * 1e-6 < t:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class AccelerationStream:
+    """
+    The unit-converted & highpass-filtered samples of an acceleration channel,
+    generated in blocks.
+
+    :param ch_struct: the `ide_utils.ChannelStruct` of the acceleration channel
+    :param start, stop: the range of sample indices in the channel to use
+    :param conversion_factor: the scale factor into units of m/s^2
+    :param highpass_cutoff: the cutoff frequency of the highpass filter; if
+        falsy, no filter is applied
+    :param block_len: the number of samples per block
+    :param dtype: the floating-point type of the generated blocks; the
+        highpass filter is always evaluated in double precision
+    """
+
+    def __init__(
+        self,
+        ch_struct,
+        start,
+        stop,
+        conversion_factor,
+        highpass_cutoff,
+        block_len,
+        dtype=np.float64,
+    ):
+        self._eventarray = ch_struct.eventarray
+        self._sch_ids = ch_struct.sch_ids
+        self._start = start
+        self._length = max(stop - start, 0)
+        self._conversion_factor = conversion_factor
+        self._block_len = block_len
+        self._dtype = np.dtype(dtype)
+        self.fs = ch_struct.fs
+        self.n_axes = len(ch_struct.sch_ids)
+
+        self._highpass = None
+        if highpass_cutoff and self._length > 0:
+            self._highpass = filters.BlockHighpass(
+                self._read,
+                self._length,
+                fs=self.fs,
+                cutoff=highpass_cutoff,
+                block_len=block_len,
+            )
+
+    def __len__(self):
+        return self._length
+
+    def _read(self, start, stop):
+        """Read the unit-converted (but unfiltered) samples in `[start, stop)`."""
+        return self._conversion_factor * self._eventarray.arrayValues(
+            start=self._start + start,
+            end=self._start + stop,
+            subchannels=self._sch_ids,
+        )
+
+    def __iter__(self):
+        """Iterate over the conditioned acceleration data in blocks."""
+        if self._highpass is not None:
+            for block in self._highpass:
+                yield block.astype(self._dtype, copy=False)
+            return
+
+        for start in range(0, self._length, self._block_len):
+            yield self._read(start, min(start + self._block_len, self._length)).astype(
+                self._dtype, copy=False
+            )
+
+    def slice(self, start, stop):
+        """Generate the conditioned acceleration data in `[start, stop)`."""
+        if self._highpass is not None:
+            return self._highpass.slice(start, stop).astype(self._dtype, copy=False)
+
+        start, stop, _step = slice(start, stop).indices(self._length)
+        return self._read(start, max(start, stop)).astype(self._dtype, copy=False)
+
+
+def _merge_moments(moments_a, moments_b):
+    """
+    Combine the (count, mean, 2nd central moment) statistics of two
+    consecutive data sets.
+
+    See Chan et al., "Updating Formulae and a Pairwise Algorithm for Computing
+    Sample Variances" (1979).
+    """
+    n_a, mean_a, m2_a = moments_a
+    n_b, mean_b, m2_b = moments_b
+    n = n_a + n_b
+    if n_a == 0:
+        return moments_b
+    if n_b == 0:
+        return moments_a
+
+    delta = mean_b - mean_a
+    return (
+        n,
+        mean_a + delta * (n_b / n),
+        m2_a + m2_b + delta ** 2 * (n_a * n_b / n),
+    )
+
+
+class _RunningIntegral:
+    """
+    Continue a trapezoidal cumulative integral over consecutive blocks.
+
+    The integral is accumulated in the blocks' own floating-point type.
+    """
+
+    def __init__(self, dt):
+        self._dt = dt
+        self._last_value = None
+        self._last_integral = None
+
+    def update(self, block):
+        if block.shape[-1] == 0:
+            return block
+
+        if self._last_value is None:
+            # The integral starts at zero (i.e., `initial=0`)
+            block_ext = block
+            integral_init = np.zeros_like(block[..., :1])
+        else:
+            block_ext = np.concatenate([self._last_value, block], axis=-1)
+            integral_init = self._last_integral
+
+        increments = self._dt * (block_ext[..., 1:] + block_ext[..., :-1]) / 2.0
+        result = np.cumsum(
+            np.concatenate([integral_init, increments], axis=-1), axis=-1
+        )
+        if self._last_value is not None:
+            result = result[..., 1:]
+
+        self._last_value = block[..., -1:]
+        self._last_integral = result[..., -1:]
+        return result
+
+
+class IntegralRMS:
+    """
+    Calculate the RMS velocity & displacement of an acceleration signal fed in
+    consecutive blocks.
+
+    The results match those of `integrate._integrate` (i.e., a cumulative
+    trapezoidal integral with its mean removed) applied once & twice over the
+    full signal. Since the velocity's mean is only known at the end of the
+    signal, the displacement is tracked before subtracting the velocity's mean
+    -- which only adds a linear trend `-mean(v) * t` to the displacement -- and
+    the trend is removed from its statistics at the end.
+    """
+
+    def __init__(self, dt):
+        self._dt = dt
+        self._vel_integral = _RunningIntegral(dt)
+        self._dis_integral = _RunningIntegral(dt)
+        self._vel_moments = (0, 0.0, 0.0)
+        self._dis_moments = (0, 0.0, 0.0)
+        self._dis_index_comoment = 0.0
+
+    def update(self, block):
+        """Feed the next block of acceleration data (time in the last axis)."""
+        n_b = block.shape[-1]
+        if n_b == 0:
+            return
+        n_a = self._vel_moments[0]
+        # Accumulate in double precision, regardless of the data's precision
+        block = block.astype(np.float64, copy=False)
+
+        vel = self._vel_integral.update(block)
+        dis = self._dis_integral.update(vel)
+
+        vel_mean = vel.mean(axis=-1)
+        self._vel_moments = _merge_moments(
+            self._vel_moments,
+            (n_b, vel_mean, np.sum((vel - vel_mean[..., None]) ** 2, axis=-1)),
+        )
+
+        # Co-moment between the displacement & the sample index
+        dis_mean_a = self._dis_moments[1]
+        dis_mean_b = dis.mean(axis=-1)
+        index_mean_a = (n_a - 1) / 2
+        index_mean_b = n_a + (n_b - 1) / 2
+        index_b = np.arange(n_b) - (n_b - 1) / 2
+        comoment_b = np.sum((dis - dis_mean_b[..., None]) * index_b, axis=-1)
+        self._dis_index_comoment = (
+            self._dis_index_comoment
+            + comoment_b
+            + (dis_mean_a - dis_mean_b)
+            * (index_mean_a - index_mean_b)
+            * (n_a * n_b / (n_a + n_b))
+        )
+        self._dis_moments = _merge_moments(
+            self._dis_moments,
+            (n_b, dis_mean_b, np.sum((dis - dis_mean_b[..., None]) ** 2, axis=-1)),
+        )
+
+    @property
+    def velocity_rms(self):
+        n, _mean, m2 = self._vel_moments
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # RuntimeWarning: x/0
+            return np.sqrt(m2 / n)
+
+    @property
+    def displacement_rms(self):
+        n, _mean, m2 = self._dis_moments
+        slope = self._vel_moments[1] * self._dt
+        index_m2 = n * (n ** 2 - 1) / 12
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # RuntimeWarning: x/0
+            var = (
+                m2 - 2 * slope * self._dis_index_comoment + slope ** 2 * index_m2
+            ) / n
+            return np.sqrt(np.maximum(var, 0))
+
+
+class MedianSketch:
+    """
+    Estimate the medians of many streams of non-negative values at once, in
+    bounded memory.
+
+    Each stream's values are counted in logarithmically-spaced buckets, such
+    that any value estimated from its bucket is within a relative error of
+    `rtol` (cf. Masson et al., "DDSketch: A Fast and Fully-Mergeable Quantile
+    Sketch with Relative-Error Guarantees" (2019)). Each stream keeps
+    `bucket_count` buckets, centered on the median of its first `init_count`
+    values; any values beyond either end are counted in the end buckets.
+
+    The memory used is `4 * bucket_count` bytes per stream, regardless of the
+    number of values.
+
+    :param shape: the shape of the array of streams
+    :param rtol: the maximum relative error of the estimated medians
+    :param bucket_count: the number of buckets per stream; the buckets span a
+        range of `((1 + rtol) / (1 - rtol)) ** bucket_count` (e.g., ~170x for
+        the defaults) about each stream's initial median
+    :param init_count: the number of values per stream used to place the
+        buckets; medians of up to this many values are exact
+    """
+
+    def __init__(self, shape, rtol=0.01, bucket_count=256, init_count=16):
+        if not 0 < rtol < 1:
+            raise ValueError(f"invalid relative tolerance {rtol}; must be in (0, 1)")
+
+        self.shape = tuple(shape)
+        self.count = 0
+        self._log_gamma = np.log((1 + rtol) / (1 - rtol))
+        self._bucket_count = bucket_count
+        self._init_count = init_count
+        self._init_values = []
+        self._key_offsets = None
+        self._counts = None
+        self._zero_counts = None
+        self._is_clipped = None
+
+    def _keys(self, values):
+        with np.errstate(divide="ignore"):  # log(0)
+            return np.ceil(np.log(values) / self._log_gamma)
+
+    def _value(self, keys):
+        gamma = np.exp(self._log_gamma)
+        return 2 * gamma ** keys / (gamma + 1)
+
+    def update(self, values):
+        """Feed the next values of each stream (in the first axis)."""
+        if self._counts is None:
+            self._init_values.append(np.array(values, dtype=np.float64))
+            self.count += len(values)
+            if self.count >= self._init_count:
+                init_values = np.concatenate(self._init_values, axis=0)
+                self._init_values = []
+                self._init_sketch(np.median(init_values[: self._init_count], axis=0))
+                self._insert(init_values)
+            return
+
+        self._insert(values)
+        self.count += len(values)
+
+    def _init_sketch(self, init_medians):
+        init_keys = self._keys(init_medians)
+        self._key_offsets = (
+            np.where(np.isfinite(init_keys), init_keys, 0) - self._bucket_count // 2
+        )
+        self._counts = np.zeros(self.shape + (self._bucket_count,), dtype=np.uint32)
+        self._zero_counts = np.zeros(self.shape, dtype=np.uint32)
+        self._is_clipped = np.zeros(self.shape + (2,), dtype=bool)
+
+    def _insert(self, values):
+        stream_indices = np.indices(self.shape, sparse=True)
+        for values_i in values:
+            # Each stream gets one value per iteration -> no repeated indices
+            is_zero = ~(values_i > 0)
+            buckets = self._keys(np.where(is_zero, 1, values_i)) - self._key_offsets
+            self._is_clipped[..., 0] |= ~is_zero & (buckets < 0)
+            self._is_clipped[..., 1] |= buckets >= self._bucket_count
+            buckets = np.clip(buckets, 0, self._bucket_count - 1).astype(int)
+
+            self._zero_counts += is_zero
+            self._counts[tuple(stream_indices) + (buckets,)] += ~is_zero
+
+    def _quantile_value(self, rank, chunk_size=2 ** 12):
+        """
+        Estimate the value of the given (0-based) rank in each stream.
+
+        :return: the estimated values, and whether each may exceed the error
+            tolerance (i.e., lies in an end bucket holding clipped values)
+        """
+        counts = self._counts.reshape(-1, self._bucket_count)
+        nonzero_ranks = rank - self._zero_counts.reshape(-1).astype(np.int64)
+        buckets = np.empty(len(counts), dtype=int)
+        for i in range(0, len(counts), chunk_size):
+            # Bound the size of the cumulative counts
+            cum_counts = np.cumsum(counts[i : i + chunk_size], axis=-1, dtype=np.int64)
+            buckets[i : i + chunk_size] = np.argmax(
+                cum_counts > nonzero_ranks[i : i + chunk_size, None], axis=-1
+            )
+        buckets = buckets.reshape(self.shape)
+        nonzero_ranks = nonzero_ranks.reshape(self.shape)
+
+        values = self._value(buckets + self._key_offsets)
+        values[nonzero_ranks < 0] = 0
+        is_clipped = (nonzero_ranks >= 0) & (
+            ((buckets == 0) & self._is_clipped[..., 0])
+            | ((buckets == self._bucket_count - 1) & self._is_clipped[..., 1])
+        )
+        return values, is_clipped
+
+    def median(self):
+        """Estimate the median of each stream."""
+        if self._counts is None:
+            if self.count == 0:
+                return np.full(self.shape, np.nan)
+            return np.median(np.concatenate(self._init_values, axis=0), axis=0)
+
+        value_lo, is_clipped_lo = self._quantile_value((self.count - 1) // 2)
+        value_hi, is_clipped_hi = self._quantile_value(self.count // 2)
+        is_clipped = is_clipped_lo | is_clipped_hi
+        if np.any(is_clipped):
+            warnings.warn(
+                f"{np.count_nonzero(is_clipped)} approximate median(s) fell "
+                "outside the sketch's range, and may exceed the error tolerance; "
+                "consider increasing `bucket_count`",
+                RuntimeWarning,
+            )
+
+        return (value_lo + value_hi) / 2
+
+
+class WelchSegments:
+    """
+    Calculate a Welch's method PSD for a signal fed in consecutive blocks.
+
+    The result matches `scipy.signal.welch` with its default overlap,
+    'constant' detrending & density scaling.
+
+    With "mean" averaging, only the running sum of the segments' periodograms
+    is kept. With "median" averaging, the periodograms of all segments are
+    kept, unless `median_rtol` is set; the median is then approximated in
+    bounded memory with a `MedianSketch`.
+
+    :param median_rtol: if set, the maximum relative error of an approximate
+        "median" average
+    """
+
+    def __init__(
+        self,
+        fs,
+        nperseg,
+        length,
+        window="hanning",
+        average="median",
+        median_rtol=None,
+    ):
+        if average not in ("mean", "median"):
+            raise ValueError(
+                f'unknown average method "{average}"; must be one of "mean" or "median"'
+            )
+        if nperseg > length:
+            warnings.warn(
+                f"nperseg = {nperseg:d} is greater than input length "
+                f" = {length:d}, using nperseg = {length:d}"
+            )
+            nperseg = length
+
+        self._fs = fs
+        self._nperseg = nperseg
+        self._step = nperseg - nperseg // 2
+        self._window = window
+        self._average = average
+        self._median_rtol = median_rtol
+        self._excess = None
+        self._periodograms = []
+        self._median_sketch = None
+        self._sum = 0.0
+        self._count = 0
+
+    def update(self, block):
+        """Feed the next block of data (time in the last axis)."""
+        if self._excess is not None:
+            block = np.concatenate([self._excess, block], axis=-1)
+        if block.shape[-1] < self._nperseg:
+            self._excess = block
+            return
+
+        segments, excess = np_segments.segment_view(
+            block, nperseg=self._nperseg, step=self._step, axis=-1
+        )
+        self._excess = np.array(excess)
+
+        # Each segment is its own single-segment PSD
+        self.freqs, psd = scipy.signal.welch(
+            segments,
+            fs=self._fs,
+            nperseg=self._nperseg,
+            window=self._window,
+            axis=-1,
+        )
+        psd = psd.astype(np.float64, copy=False)
+        self._count += psd.shape[-2]
+
+        if self._average == "mean":
+            self._sum = self._sum + np.sum(psd, axis=-2)
+        elif self._median_rtol is not None:
+            if self._median_sketch is None:
+                self._median_sketch = MedianSketch(
+                    psd.shape[:-2] + psd.shape[-1:], rtol=self._median_rtol
+                )
+            self._median_sketch.update(np.moveaxis(psd, -2, 0))
+        else:
+            self._periodograms.append(psd)
+
+    def psd(self):
+        """Average the periodograms of all segments fed so far."""
+        if self._average == "mean":
+            return self.freqs, self._sum / self._count
+
+        n = self._count
+        ii_2 = 2 * np.arange(1.0, (n - 1) // 2 + 1)
+        median_bias = 1 + np.sum(1.0 / (ii_2 + 1) - 1.0 / ii_2)
+        if self._median_sketch is not None:
+            return self.freqs, self._median_sketch.median() / median_bias
+
+        periodograms = np.concatenate(self._periodograms, axis=-2)
+        return self.freqs, np.median(periodograms, axis=-2) / median_bias
+
+
+class PeakTracker:
+    """
+    Track the largest separated peaks of several signals over blocks of data.
+
+    A sample is a peak if its magnitude is greater than that of every sample up
+    to `min_separation` samples before it, and no less than that of every
+    sample up to `min_separation` samples after it; peaks are therefore more
+    than `min_separation` samples apart. The `top_k` largest peaks of each
+    signal are kept in a bounded min-heap, and only the last
+    `2 * min_separation` samples are carried between blocks.
+
+    :param n_signals: the number of signals
+    :param top_k: the number of peaks to keep per signal
+    :param min_separation: the minimum separation of peaks, in samples
+    """
+
+    def __init__(self, n_signals, top_k, min_separation):
+        if top_k < 1:
+            raise ValueError(f"invalid number of peaks {top_k}; must be at least 1")
+        if min_separation < 0:
+            raise ValueError(f"invalid negative peak separation {min_separation}")
+
+        self.top_k = top_k
+        self.min_separation = min_separation
+        self._heaps = [[] for _ in range(n_signals)]  # of (magnitude, -index)
+        # Samples carried from the previous block, starting from `_tail_start`;
+        # the signals are padded before their start so every sample has a full
+        # window of preceding samples
+        self._tail = np.full((n_signals, min_separation), -np.inf)
+        self._tail_start = -min_separation
+        self._next = 0  # the first sample not yet evaluated as a peak
+
+    def update(self, magnitudes):
+        """
+        Feed the next block of magnitudes (signals in the first axis, time in
+        the last axis); any monotonic function of magnitude (e.g., its square)
+        gives the same peaks.
+        """
+        buffer = np.concatenate([self._tail, magnitudes], axis=-1)
+        # Only samples with a full window of following samples are evaluated
+        stop = self._tail_start + buffer.shape[-1] - self.min_separation
+        self._evaluate(self._heaps, buffer, stop)
+
+        keep_start = max(self._next - self.min_separation, self._tail_start)
+        self._tail = buffer[:, keep_start - self._tail_start :]
+        self._tail_start = keep_start
+
+    def _evaluate(self, heaps, buffer, stop):
+        """Evaluate the samples from `_next` to `stop` as peaks into `heaps`."""
+        start = self._next
+        if stop <= start:
+            return
+        sep = self.min_separation
+        i0 = start - self._tail_start  # in buffer coordinates
+        values = buffer[:, i0 : i0 + stop - start]
+
+        if sep == 0:
+            is_peak = np.ones(values.shape, dtype=bool)
+        else:
+            # `window_max[..., i]` is the max of `buffer[..., i : i + sep]`
+            window_max = scipy.ndimage.maximum_filter1d(
+                buffer,
+                size=sep,
+                axis=-1,
+                mode="constant",
+                cval=-np.inf,
+                origin=-(sep // 2),
+            )
+            is_peak = (
+                values > window_max[:, i0 - sep : i0 - sep + values.shape[-1]]
+            ) & (values >= window_max[:, i0 + 1 : i0 + 1 + values.shape[-1]])
+
+        for heap, signal_values, signal_is_peak in zip(heaps, values, is_peak):
+            i_peaks = np.flatnonzero(signal_is_peak)
+            peak_values = signal_values[i_peaks]
+            if len(heap) == self.top_k:
+                # equal values come later, so lose to the heap's peaks
+                is_larger = peak_values > heap[0][0]
+                i_peaks, peak_values = i_peaks[is_larger], peak_values[is_larger]
+            if len(i_peaks) > self.top_k:
+                is_top = (
+                    peak_values >= np.partition(peak_values, -self.top_k)[-self.top_k]
+                )
+                i_peaks, peak_values = i_peaks[is_top], peak_values[is_top]
+
+            for i, value in zip(i_peaks + start, peak_values):
+                item = (float(value), -int(i))
+                if len(heap) < self.top_k:
+                    heapq.heappush(heap, item)
+                else:
+                    heapq.heappushpop(heap, item)
+
+        self._next = stop
+
+    def peaks(self):
+        """
+        Get the sample indices of the peaks found so far, per signal, in order
+        of decreasing magnitude.
+        """
+        heaps = [list(heap) for heap in self._heaps]
+        next_start = self._next
+        # The signals are padded after their end, like before their start
+        buffer = np.concatenate(
+            [self._tail, np.full((len(heaps), self.min_separation), -np.inf)],
+            axis=-1,
+        )
+        self._evaluate(heaps, buffer, self._tail_start + self._tail.shape[-1])
+        self._next = next_start
+
+        return [
+            np.array([-i for (_value, i) in sorted(heap, reverse=True)], dtype=int)
+            for heap in heaps
+        ]
+
+
+class RollingStats:
+    """
+    Calculate statistics over sliding windows of several signals, block by
+    block.
+
+    The statistics are calculated over each block together with the samples
+    of any windows left incomplete by the previous block, which are all that's
+    carried between blocks; the cost doesn't depend on the window length (see
+    `stats.window_mean` & `stats.window_max_abs`).
+
+    :param n_signals: the number of signals
+    :param nperseg: the number of samples per window
+    :param step: the number of samples between the starts of consecutive
+        windows
+    :param stat_names: the statistics to calculate, any of "rms", "peak"
+        (i.e., the maximum absolute value) & "mean"
+    """
+
+    STAT_FUNCS = dict(
+        rms=stats.window_rms,
+        peak=stats.window_max_abs,
+        mean=stats.window_mean,
+    )
+
+    def __init__(self, n_signals, nperseg, step, stat_names):
+        unknown_names = set(stat_names) - set(self.STAT_FUNCS)
+        if unknown_names:
+            raise ValueError(
+                f"unknown rolling statistics {sorted(unknown_names)}; "
+                f"must be any of {list(self.STAT_FUNCS)}"
+            )
+
+        self.nperseg = nperseg
+        self.step = step
+        self._results = {name: [] for name in stat_names}
+        self._tail = np.empty((n_signals, 0))
+        self._skip = 0  # samples before the next window start, if past the tail
+
+    def update(self, block):
+        """Feed the next block of data (time in the last axis)."""
+        skip = min(self._skip, block.shape[-1])
+        self._skip -= skip
+        buffer = np.concatenate([self._tail, block[:, skip:]], axis=-1)
+
+        n_windows = max((buffer.shape[-1] - self.nperseg) // self.step + 1, 0)
+        if n_windows > 0:
+            span = buffer[:, : (n_windows - 1) * self.step + self.nperseg]
+            for name, results in self._results.items():
+                results.append(self.STAT_FUNCS[name](span, self.nperseg, self.step))
+
+        next_start = n_windows * self.step
+        self._tail = buffer[:, next_start:].copy()
+        self._skip += max(next_start - buffer.shape[-1], 0)
+
+    def result(self):
+        """
+        Get the statistics of all complete windows so far.
+
+        :return: a dict of each statistic's values, as arrays with signals in
+            the first axis & windows in the last axis
+        """
+        return {
+            name: np.concatenate([np.empty((len(self._tail), 0))] + results, axis=-1)
+            for (name, results) in self._results.items()
+        }
+
+
+class AccelerationMetrics:
+    """
+    Accumulate the broad acceleration metrics of `Analyzer` (RMS & peak
+    acceleration, RMS velocity & displacement) over blocks of acceleration
+    data in a single fused pass.
+
+    Each block is squared once, and every metric is reduced from that one
+    block-sized temporary; no temporaries the size of the full signal are ever
+    allocated.
+
+    :param n_axes: the number of acceleration axes
+    :param fs: the sampling rate; if `None`, the velocity & displacement are
+        not calculated
+    :param peak_top_k: the number of peaks tracked per axis & in the resultant
+        (see `PeakTracker`); only the single largest by default
+    :param peak_min_separation: the minimum separation of tracked peaks, in
+        samples
+    """
+
+    def __init__(self, n_axes, fs, peak_top_k=1, peak_min_separation=0):
+        self.count = 0
+        self.sum_sq = np.zeros(n_axes)
+        self.max_abs = np.full(n_axes, -np.inf)
+        self.argmax_abs = np.zeros(n_axes, dtype=int)
+        self.resultant_max = -np.inf
+        self.resultant_argmax = 0
+
+        self._integrals = IntegralRMS(dt=1 / fs) if fs is not None else None
+        self._peaks = (
+            PeakTracker(n_axes + 1, peak_top_k, peak_min_separation)
+            if peak_top_k > 1
+            else None
+        )
+
+    def update(self, block):
+        """Feed the next block of acceleration data (time in the last axis)."""
+        n = block.shape[-1]
+        if n == 0:
+            return
+
+        block_sq = block ** 2
+        self.sum_sq += np.sum(block_sq, axis=-1, dtype=np.float64)
+
+        # max(x^2) <=> max(|x|)
+        i_max = np.argmax(block_sq, axis=-1)
+        block_max = np.abs(block[np.arange(len(i_max)), i_max])
+        is_new_max = block_max > self.max_abs
+        self.max_abs[is_new_max] = block_max[is_new_max]
+        self.argmax_abs[is_new_max] = self.count + i_max[is_new_max]
+
+        resultant_sq = np.sum(block_sq, axis=0)
+        i_max = np.argmax(resultant_sq)
+        resultant_max = np.sqrt(np.float64(resultant_sq[i_max]))
+        if resultant_max > self.resultant_max:
+            self.resultant_max = resultant_max
+            self.resultant_argmax = self.count + i_max
+
+        if self._peaks is not None:
+            self._peaks.update(np.concatenate([block_sq, resultant_sq[np.newaxis]]))
+
+        if self._integrals is not None:
+            self._integrals.update(block)
+
+        self.count += n
+
+    @property
+    def rms(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # RuntimeWarning: x/0
+            return np.sqrt(self.sum_sq / self.count)
+
+    @property
+    def resultant_rms(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # RuntimeWarning: x/0
+            return np.sqrt(np.sum(self.sum_sq) / self.count)
+
+    @property
+    def peak_indices(self):
+        """
+        The sample indices of the tracked peaks of each axis & then the
+        resultant, in order of decreasing magnitude.
+        """
+        if self._peaks is None:
+            return [np.array([i]) for i in self.argmax_abs] + [
+                np.array([self.resultant_argmax])
+            ]
+        return self._peaks.peaks()
+
+    @property
+    def velocity_rms(self):
+        if self._integrals is None:
+            return np.full_like(self.sum_sq, np.nan)
+        return self._integrals.velocity_rms
+
+    @property
+    def displacement_rms(self):
+        if self._integrals is None:
+            return np.full_like(self.sum_sq, np.nan)
+        return self._integrals.displacement_rms
+
+
+class AccelerationStats(AccelerationMetrics):
+    """
+    Accumulate all acceleration analyses of `Analyzer` over the blocks of an
+    `AccelerationStream` in a single pass.
+
+    :param n_axes: the number of acceleration axes
+    :param fs: the sampling rate
+    :param length: the total number of samples in the stream
+    :param pvss_freqs: the natural frequencies of the PVSS; if `None`, the
+        PVSS is not calculated
+    :param psd_nperseg: the segment length of the PSD; if `None`, the PSD is
+        not calculated
+    :param psd_window: the window used in the PSD
+    :param psd_average, psd_median_rtol: the averaging of the PSD; see
+        `WelchSegments`
+    :param integral_rms: whether to calculate the RMS velocity & displacement
+    :param peak_top_k, peak_min_separation: the peaks tracked; see
+        `AccelerationMetrics`
+    """
+
+    def __init__(
+        self,
+        n_axes,
+        fs,
+        length,
+        *,
+        integral_rms=True,
+        pvss_freqs=None,
+        pvss_damp=0.05,
+        psd_nperseg=None,
+        psd_window="hanning",
+        psd_average="median",
+        psd_median_rtol=None,
+        peak_top_k=1,
+        peak_min_separation=0,
+    ):
+        super().__init__(
+            n_axes,
+            fs=fs if length > 0 and integral_rms else None,
+            peak_top_k=peak_top_k,
+            peak_min_separation=peak_min_separation,
+        )
+
+        self.pvss_freqs = pvss_freqs
+        self._rel_displ = None
+        if pvss_freqs is not None and length > 0:
+            self._rel_displ = shock.RelDisplExtrema(
+                2 * np.pi * pvss_freqs, dt=1 / fs, damp=pvss_damp
+            )
+
+        self._welch = None
+        if psd_nperseg is not None and length > 0:
+            self._welch = WelchSegments(
+                fs,
+                psd_nperseg,
+                length,
+                window=psd_window,
+                average=psd_average,
+                median_rtol=psd_median_rtol,
+            )
+
+    def update(self, block):
+        """Feed the next block of acceleration data (time in the last axis)."""
+        if block.shape[-1] == 0:
+            return
+
+        super().update(block)
+        if self._rel_displ is not None:
+            self._rel_displ.update(block)
+        if self._welch is not None:
+            self._welch.update(block)
+
+    @property
+    def pvss(self):
+        return self._rel_displ.pseudo_velocity(two_sided=False)
+
+    @property
+    def psd(self):
+        return self._welch.psd()
@@ -2,11 +2,9 @@ import numpy as np
 import scipy.signal
 
 
-def highpass(array, fs, cutoff=1.0, half_order=3, axis=-1):
-    """Apply a highpass filter to an array."""
-    array = np.moveaxis(array, axis, -1)
-
-    sos_coeffs = scipy.signal.butter(
+def _highpass_sos(fs, cutoff, half_order):
+    """Generate the second-order-sections coefficients for a highpass filter."""
+    return scipy.signal.butter(
         N=half_order,
         Wn=cutoff,
         btype="highpass",
@@ -14,14 +12,164 @@ def highpass(array, fs, cutoff=1.0, half_order=3, axis=-1):
         output="sos",
     )
 
-    # vvv
+
+def _sosfilt_init(sos_coeffs, x0):
+    """
+    Generate the `sosfilt` initial state for a steady input, starting at the
+    value `x0`.
+    """
+    x0 = np.asarray(x0)
     init_state = scipy.signal.sosfilt_zi(sos_coeffs)
-    for _ in range(2):
-        init_fwd = init_state * array[(Ellipsis, 0) + ((None,) * init_state.ndim)]
-        init_fwd = np.moveaxis(init_fwd, array.ndim - 1, 0)
-        array, _zo = scipy.signal.sosfilt(sos_coeffs, array, axis=-1, zi=init_fwd)
-        array = array[..., ::-1]
-    # ^^^ could alternatively do this (not as good though?):
-    # array = scipy.signal.sosfiltfilt(sos_coeffs, array, axis=-1)
-
-    return np.moveaxis(array, -1, axis)
+    init_state = init_state * x0[(Ellipsis,) + ((None,) * init_state.ndim)]
+    return np.moveaxis(init_state, x0.ndim, 0)
+
+
+def highpass(
+    array, fs, cutoff=1.0, half_order=3, axis=-1, *, out=None, block_len=2 ** 16
+):
+    """
+    Apply a zero-phase highpass filter to an array.
+
+    The filter is run forward, then backward, over consecutive blocks of the
+    array, carrying the filter state from one block to the next. The forward
+    pass is written straight into the output, and the backward pass filters
+    the output in place; the only full-size array is then the output itself.
+
+    :param out: the array in which to store the result, of the same shape as
+        `array`; may be `array` itself, to filter in place. If `None`, a new
+        array is allocated. With a lower-precision `out`, the forward pass is
+        rounded into it before the backward pass is run.
+    :param block_len: the number of samples filtered at a time
+    :return: the filtered array (i.e., `out`, if set)
+    """
+    if block_len <= 0:
+        raise ValueError(f"invalid non-positive block length {block_len}")
+
+    sos_coeffs = _highpass_sos(fs, cutoff, half_order)
+    if out is None:
+        out = np.empty(np.shape(array), dtype=np.result_type(array, sos_coeffs))
+    elif out.shape != np.shape(array):
+        raise ValueError(
+            f"output shape {out.shape} does not match input shape {np.shape(array)}"
+        )
+
+    array_t = np.moveaxis(array, axis, -1)
+    out_t = np.moveaxis(out, axis, -1)
+    length = array_t.shape[-1]
+    if length == 0:
+        return out
+
+    # Forward pass: array -> out
+    state = _sosfilt_init(sos_coeffs, array_t[..., 0])
+    for start in range(0, length, block_len):
+        stop = min(start + block_len, length)
+        out_t[..., start:stop], state = scipy.signal.sosfilt(
+            sos_coeffs, array_t[..., start:stop], axis=-1, zi=state
+        )
+
+    # Backward pass: out -> out, from the last block to the first
+    state = _sosfilt_init(sos_coeffs, out_t[..., -1])
+    for stop in range(length, 0, -block_len):
+        start = max(stop - block_len, 0)
+        block, state = scipy.signal.sosfilt(
+            sos_coeffs, out_t[..., start:stop][..., ::-1], axis=-1, zi=state
+        )
+        out_t[..., start:stop] = block[..., ::-1]
+
+    return out
+
+
+class BlockHighpass:
+    """
+    The same zero-phase highpass filter as `highpass`, evaluated over
+    consecutive blocks of a signal that is too large to hold in memory.
+
+    The signal is pulled from the callable `read_block(start, stop)`, which
+    must return the samples in the index range `[start, stop)` with time in
+    the last axis.
+
+    On construction, the filter is run forward & backward over the signal
+    once, and only the filter states at each block boundary are kept. After
+    that, any block of the filtered signal can be regenerated exactly from
+    those states, in any order.
+    """
+
+    def __init__(
+        self, read_block, length, fs, cutoff=1.0, half_order=3, block_len=2 ** 16
+    ):
+        if block_len <= 0:
+            raise ValueError(f"invalid non-positive block length {block_len}")
+
+        self._read_block = read_block
+        self._length = length
+        self._block_len = block_len
+        self._sos_coeffs = _highpass_sos(fs, cutoff, half_order)
+
+        self._states_fwd = []
+        self._states_bwd = []
+        if length == 0:
+            return
+
+        # Forward pass -> record the forward state at the start of each block
+        state = None
+        for i in range(self.block_count):
+            block = self._read(i)
+            if state is None:
+                state = _sosfilt_init(self._sos_coeffs, block[..., 0])
+            self._states_fwd.append(state)
+            block_fwd, state = scipy.signal.sosfilt(
+                self._sos_coeffs, block, axis=-1, zi=state
+            )
+
+        # Backward pass -> record the backward state at the end of each block
+        state = _sosfilt_init(self._sos_coeffs, block_fwd[..., -1])
+        self._states_bwd = [None] * self.block_count
+        for i in reversed(range(self.block_count)):
+            self._states_bwd[i] = state
+            _block, state = scipy.signal.sosfilt(
+                self._sos_coeffs, self._filter_fwd(i)[..., ::-1], axis=-1, zi=state
+            )
+
+    @property
+    def block_count(self):
+        return -(-self._length // self._block_len)
+
+    def __len__(self):
+        return self._length
+
+    def _read(self, i):
+        start = i * self._block_len
+        return self._read_block(start, min(start + self._block_len, self._length))
+
+    def _filter_fwd(self, i):
+        return scipy.signal.sosfilt(
+            self._sos_coeffs, self._read(i), axis=-1, zi=self._states_fwd[i]
+        )[0]
+
+    def block(self, i):
+        """Generate the `i`th block of the filtered signal."""
+        block, _zo = scipy.signal.sosfilt(
+            self._sos_coeffs,
+            self._filter_fwd(i)[..., ::-1],
+            axis=-1,
+            zi=self._states_bwd[i],
+        )
+        return block[..., ::-1]
+
+    def __iter__(self):
+        """Iterate over the blocks of the filtered signal in order."""
+        for i in range(self.block_count):
+            yield self.block(i)
+
+    def slice(self, start, stop):
+        """Generate the filtered signal over the index range `[start, stop)`."""
+        start, stop, _step = slice(start, stop).indices(self._length)
+        stop = max(start, stop)
+        if start == stop:
+            return self._read_block(0, 0)
+
+        i_start = start // self._block_len
+        i_stop = -(-stop // self._block_len)
+        offset = i_start * self._block_len
+        data = np.concatenate([self.block(i) for i in range(i_start, i_stop)], axis=-1)
+        return data[..., start - offset : stop - offset]
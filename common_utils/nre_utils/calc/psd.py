@@ -1,8 +1,10 @@
+import functools
 import numbers
 import warnings
 
 import numpy as np
 import scipy.signal
+import scipy.sparse
 
 
 def welch(array, nfft=1024, dt=None, axis=-1):
@@ -91,55 +93,123 @@ def rms(array, fs, dn=0, min_freq=0, max_freq=np.inf, nfft=1024, axis=-1):
     return np.sqrt(np.sum(v_psd, axis=-1) / nfft)
 
 
-def _np_histogram_nd(array, bins=10, weights=None, axis=-1, **kwargs):
-    """Compute histograms over a specified axis."""
-    array = np.asarray(array)
-    bins = np.asarray(bins)
-    weights = np.asarray(weights) if weights is not None else None
-
-    # Collect all ND inputs
-    nd_params = {}
-    (nd_params if array.ndim > 1 else kwargs)["a"] = array
-    (nd_params if bins.ndim > 1 else kwargs)["bins"] = bins
-    if weights is not None:
-        (nd_params if weights.ndim > 1 else kwargs)["weights"] = weights
-
-    if len(nd_params) == 0:
-        return np.histogram(**kwargs)[0]
-
-    # Move the desired axes to the back
-    for k, v in nd_params.items():
-        nd_params[k] = np.moveaxis(v, axis, -1)
-
-    # Broadcast ND arrays to the same shape
-    ks, vs = zip(*nd_params.items())
-    vs_broadcasted = np.broadcast_arrays(*vs)
-    for k, v in zip(ks, vs_broadcasted):
-        nd_params[k] = v
-
-    # Generate output
-    bins = nd_params.get("bins", bins)
-
-    result_shape = ()
-    if len(nd_params) != 0:
-        result_shape = v.shape[:-1]
-    if bins.ndim >= 1:
-        result_shape = result_shape + (bins.shape[-1] - 1,)
-    else:
-        result_shape = result_shape + (bins,)
+class BinningPlan:
+    """
+    A precomputed assignment of the frequencies of a periodogram into bins,
+    reusable across all periodograms over the same frequencies.
 
-    result = np.empty(
-        result_shape,
-        dtype=(weights.dtype if weights is not None else int),
-    )
-    loop_shape = v.shape[:-1]
+    As in `np.histogram`, each bin includes its lower boundary, and only the
+    last bin includes its upper boundary; frequencies outside all bins are
+    dropped.
+
+    :param f: the frequencies of the periodograms to re-bin
+    :param freq_splits: the boundaries of the frequency bins; must be strictly
+        increasing
+    :param freqs: the representative frequency of each bin; defaults to the
+        midpoints between the boundaries
+    """
 
-    for nd_i in np.ndindex(*loop_shape):
-        nd_kwargs = {k: v[nd_i] for k, v in nd_params.items()}
-        result[nd_i], edges = np.histogram(**nd_kwargs, **kwargs)
+    def __init__(self, f, freq_splits, freqs=None):
+        f = np.asarray(f)
+        freq_splits = np.asarray(freq_splits)
+        if not np.all(np.diff(freq_splits, prepend=0) > 0):
+            raise ValueError
 
-    result = np.moveaxis(result, -1, axis)
-    return result
+        bin_count = len(freq_splits) - 1
+        bin_indices = np.searchsorted(freq_splits, f, side="right") - 1
+        bin_indices[f == freq_splits[-1]] = bin_count - 1
+        in_bins = (bin_indices >= 0) & (bin_indices < bin_count)
+
+        self.freq_splits = freq_splits
+        self.freqs = (
+            (freq_splits[1:] + freq_splits[:-1]) / 2 if freqs is None else freqs
+        )
+        # the bin of each frequency in `f`: -1 or `bin_count` if outside all bins
+        self.bin_indices = bin_indices
+        self.bin_sizes = np.bincount(bin_indices[in_bins], minlength=bin_count)
+        # Check that the frequencies do not skip any bins
+        self.has_empty_bins = bool(np.any(np.diff(bin_indices) > 1))
+
+        # Each row (i.e., frequency) holds at most one entry -> build the CSR
+        # summation matrix directly
+        self.matrix = scipy.sparse.csr_matrix(
+            (
+                np.ones(np.count_nonzero(in_bins)),
+                bin_indices[in_bins],
+                np.concatenate([[0], np.cumsum(in_bins)]),
+            ),
+            shape=(len(f), bin_count),
+        )
+
+        for array in (self.freq_splits, self.freqs, self.bin_indices, self.bin_sizes):
+            array.setflags(write=False)  # shared between users of the plan
+
+    def apply(self, psd, axis=-1, mode="sum"):
+        """
+        Aggregate a periodogram into the plan's bins; all other axes are
+        reduced together in a single sparse matrix product.
+
+        :param psd: the periodogram, with the plan's frequencies in `axis`
+        :param mode: the method for aggregating values into bins; 'mean'
+            preserves the PSD's area-under-the-curve, 'sum' preserves the
+            PSD's "energy"
+        :return: the re-binned periodogram
+        """
+        if mode not in ("sum", "mean"):
+            raise ValueError(f'unknown mode "{mode}"; must be one of "sum" or "mean"')
+        if self.has_empty_bins:
+            warnings.warn(
+                "empty frequency bins in re-binned PSD; "
+                "original PSD's frequency spacing is too coarse",
+                RuntimeWarning,
+            )
+
+        psd = np.moveaxis(psd, axis, -1)
+        psd_2d = np.reshape(psd, (-1, psd.shape[-1]))
+        psd_binned = np.asarray(psd_2d @ self.matrix)
+        if mode == "mean":
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", category=RuntimeWarning)  # x/0
+
+                psd_binned = np.nan_to_num(  # <- fix divisions by zero
+                    psd_binned / self.bin_sizes
+                )
+
+        psd_binned = psd_binned.reshape(psd.shape[:-1] + (len(self.bin_sizes),))
+        return np.moveaxis(psd_binned, -1, axis)
+
+
+def octave_plan(f, fstart=1, octave_bins=12):
+    """
+    Get the binning plan of `to_octave`.
+
+    Plans are memoized on their parameters, so that periodograms over the
+    same frequencies (e.g., of files or segments with the same sample rate &
+    segment length) share a single plan.
+    """
+    f = np.asarray(f)
+    return _octave_plan(f.tobytes(), f.dtype.str, fstart, octave_bins)
+
+
+@functools.lru_cache(maxsize=64)
+def _octave_plan(f_bytes, f_dtype, fstart, octave_bins):
+    f = np.frombuffer(f_bytes, dtype=f_dtype)
+    max_f = f.max()
+
+    octave_step = 1 / octave_bins
+    center_freqs = 2 ** np.arange(
+        np.log2(fstart),
+        np.log2(max_f) - octave_step / 2,
+        octave_step,
+    )
+    freq_splits = 2 ** np.arange(
+        np.log2(fstart) - octave_step / 2,
+        np.log2(max_f),
+        octave_step,
+    )
+    assert len(center_freqs) + 1 == len(freq_splits)
+
+    return BinningPlan(f, freq_splits, freqs=center_freqs)
 
 
 def differentiate(f, psd, n=1):
@@ -154,6 +224,28 @@ def differentiate(f, psd, n=1):
     return f, psd * factor
 
 
+def to_rms(f, psd, dn=0, min_freq=0, max_freq=np.inf, axis=-1):
+    """
+    Calculate the RMS of the nth derivative of a signal from its periodogram.
+
+    :param f, psd: the returned values from `scipy.signal.welch`
+    :param dn: the derivative number (e.g. 1 = first derivative, 2 = second,
+        -1 = first anti-derivative)
+    :param min_freq, max_freq: the frequency band over which to integrate the
+        periodogram; includes `max_freq` but excludes `min_freq`
+    :param axis: same as the axis parameter provided to `scipy.signal.welch`
+    """
+    psd = np.moveaxis(psd, axis, -1)
+
+    df = f[1] - f[0]
+    i_min_freq, i_max_freq = np.searchsorted(f, [min_freq, max_freq], side="right")
+    f, psd = differentiate(
+        f[i_min_freq:i_max_freq], psd[..., i_min_freq:i_max_freq], n=dn
+    )
+
+    return np.sqrt(df * np.sum(psd, axis=-1))
+
+
 def to_jagged(f, psd, freq_splits, axis=-1, mode="sum"):
     """
     Calculate a periodogram over non-uniformly spaced frequency bins.
@@ -165,46 +257,17 @@ def to_jagged(f, psd, freq_splits, axis=-1, mode="sum"):
     :param mode: the method for aggregating values into bins; 'mean' preserves
         the PSD's area-under-the-curve, 'sum' preserves the PSD's "energy"
     """
-    if not np.all(np.diff(freq_splits, prepend=0) > 0):
-        raise ValueError
-
-    # Check that PSD samples do not skip any frequency bins
-    spacing_test = np.diff(np.searchsorted(freq_splits, f))
-    if np.any(spacing_test > 1):
-        warnings.warn(
-            "empty frequency bins in re-binned PSD; "
-            "original PSD's frequency spacing is too coarse",
-            RuntimeWarning,
-        )
-
-    psd_jagged = _np_histogram_nd(f, bins=freq_splits, weights=psd)
-    if mode == "mean":
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore", category=RuntimeWarning)  # x/0
-
-            psd_jagged = np.nan_to_num(  # <- fix divisions by zero
-                psd_jagged / np.histogram(f, bins=freq_splits)[0]
-            )
-
-    f = (freq_splits[1:] + freq_splits[:-1]) / 2
-    return f, psd_jagged
+    plan = BinningPlan(f, freq_splits)
+    return plan.freqs.copy(), plan.apply(psd, axis=axis, mode=mode)
 
 
-def to_octave(f, psd, fstart=1, octave_bins=12, **kwargs):
-    """Calculate a periodogram over log-spaced frequency bins."""
-    max_f = f.max()
-
-    octave_step = 1 / octave_bins
-    center_freqs = 2 ** np.arange(
-        np.log2(fstart),
-        np.log2(max_f) - octave_step / 2,
-        octave_step,
-    )
-    freq_splits = 2 ** np.arange(
-        np.log2(fstart) - octave_step / 2,
-        np.log2(max_f),
-        octave_step,
-    )
-    assert len(center_freqs) + 1 == len(freq_splits)
+def to_octave(f, psd, fstart=1, octave_bins=12, axis=-1, mode="sum"):
+    """
+    Calculate a periodogram over log-spaced frequency bins.
 
-    return center_freqs, to_jagged(f, psd, freq_splits=freq_splits, **kwargs)[1]
+    The bin assignment is memoized (see `octave_plan`), and reused by later
+    calls over the same frequencies.
+    """
+    plan = octave_plan(f, fstart=fstart, octave_bins=octave_bins)
+    # (copied, so callers can't alter the frequencies of the shared plan)
+    return plan.freqs.copy(), plan.apply(psd, axis=axis, mode=mode)
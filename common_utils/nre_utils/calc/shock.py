@@ -5,8 +5,8 @@ import numpy as np
 import scipy.signal
 
 
-def rel_displ(accel, omega, dt=1, damp=0, axis=-1):
-    """Calculate the relative velocity for a SDOF system."""
+def _rel_displ_tf(omega, dt=1, damp=0):
+    """Generate the discrete transfer function of a SDOF system."""
     # Generate the transfer function
     #   H(s) = L{z(t)}(s) / L{y"(t)}(s) = (1/s²)(Z(s)/Y(s))
     # for the PDE
@@ -14,14 +14,228 @@ def rel_displ(accel, omega, dt=1, damp=0, axis=-1):
     with warnings.catch_warnings():
         warnings.simplefilter("ignore", scipy.signal.BadCoefficients)
 
-        tf = scipy.signal.TransferFunction(
+        return scipy.signal.TransferFunction(
             [-1],
             [1, 2 * damp * omega, omega ** 2],
         ).to_discrete(dt=dt)
 
+
+def rel_displ(accel, omega, dt=1, damp=0, axis=-1):
+    """Calculate the relative velocity for a SDOF system."""
+    tf = _rel_displ_tf(omega, dt, damp)
+
     return scipy.signal.lfilter(tf.num, tf.den, accel, axis=axis)
 
 
+class RelDisplExtrema:
+    """
+    Track the extrema of the relative displacements of SDOF systems over a
+    grid of natural frequencies, for an acceleration signal that is fed in
+    consecutive blocks.
+
+    Long blocks are filtered one frequency at a time with
+    `scipy.signal.lfilter`, whose per-call overhead is then negligible. Short
+    blocks (e.g., from a stream) would be dominated by that overhead, so the
+    whole grid is instead advanced together, with no loop over frequencies:
+    every system is a 2nd-order IIR filter, so with the block split into short
+    sub-blocks, each sub-block's response is the sum of:
+
+    - the zero-state response, i.e. the sub-block convolved with the stacked
+      impulse responses (for all sub-blocks at once, as a matrix product); and
+    - the zero-input response, from each system's state at the start of the
+      sub-block, via the precomputed responses to each unit state.
+
+    Both methods carry the same (2-element, as for `scipy.signal.lfilter`)
+    states from one block to the next, & only the running extrema are kept
+    between blocks.
+
+    Each call to `update` continues the SDOF responses from where the previous
+    block left off, so the extrema match those of `rel_displ` over the
+    concatenated signal.
+
+    :param omega: the natural (angular) frequencies of the SDOF systems
+    :param dt: the sampling period of the acceleration
+    :param damp: the damping ratio of the SDOF systems
+    :param block_len: the maximum number of samples advanced at once
+    :param batch_max_len: blocks shorter than this are advanced for all
+        frequencies together, rather than one frequency at a time
+    :param sub_block_len: the number of samples per sub-block, when advancing
+        all frequencies together
+    """
+
+    def __init__(
+        self,
+        omega,
+        dt=1,
+        damp=0,
+        block_len=2 ** 16,
+        batch_max_len=2 ** 10,
+        sub_block_len=16,
+    ):
+        if block_len <= 0:
+            raise ValueError(f"invalid non-positive block length {block_len}")
+        if sub_block_len <= 0:
+            raise ValueError(f"invalid non-positive sub-block length {sub_block_len}")
+
+        self._omega = np.asarray(omega)
+        self._block_len = block_len
+        self._batch_max_len = batch_max_len
+        self._sub_block_len = sub_block_len
+
+        # Stack all the (2nd order) filter coefficients, normalized so a0 = 1
+        self._num = np.zeros((self._omega.size, 3))
+        self._den = np.zeros((self._omega.size, 3))
+        for i, w in enumerate(self._omega.flat):
+            tf = _rel_displ_tf(w, dt, damp)
+            self._num[i, : len(tf.num)] = tf.num
+            self._den[i, : len(tf.den)] = tf.den
+        self._num /= self._den[:, :1]
+        self._den /= self._den[:, :1]
+
+        # The tables for advancing all systems together, built on first use
+        self._conv_matrices = None
+
+        self._shape = None
+        self._states = None
+        self._min = None
+        self._max = None
+
+    def _init_batch(self):
+        """Precompute the tables for advancing all systems together."""
+        num = self._num[..., np.newaxis]
+        den = self._den[..., np.newaxis]
+
+        # Run the (transposed direct form II) recurrence
+        #   y[n] = b0 x[n] + z0[n-1]
+        #   z0[n] = b1 x[n] + z1[n-1] - a1 y[n]
+        #   z1[n] = b2 x[n] - a2 y[n]
+        # over one sub-block for all systems at once, from each unit state
+        # with no input, & from a unit impulse (the last column) with a zero
+        # state, keeping the outputs & the states after every sample
+        outputs = np.empty((self._omega.size, self._sub_block_len, 3))
+        states = np.empty((self._omega.size, self._sub_block_len, 2, 3))
+        x = np.array([0.0, 0.0, 1.0])
+        z0, z1 = np.eye(3)[:2]
+        for n in range(self._sub_block_len):
+            y = num[:, 0] * x + z0
+            z0 = num[:, 1] * x + z1 - den[:, 1] * y
+            z1 = num[:, 2] * x - den[:, 2] * y
+            outputs[:, n] = y
+            states[:, n] = np.stack([z0, z1], axis=1)
+            x = np.zeros(3)
+
+        # (F, L, 2): the responses to each unit state
+        self._state_responses = outputs[..., :2].copy()
+        # (F, L, 2, 2): the states after n + 1 samples, from each unit state
+        self._state_transitions = states[..., :2].copy()
+        # (F, 2, L): the states after n + 1 samples, from a unit impulse
+        self._impulse_states = np.ascontiguousarray(states[..., 2].swapaxes(1, 2))
+        # (F, L, L): the convolution matrices, s.t. M @ x = h * x
+        lags = np.subtract.outer(
+            np.arange(self._sub_block_len), np.arange(self._sub_block_len)
+        )
+        self._conv_matrices = np.where(
+            lags >= 0, outputs[:, np.clip(lags, 0, None), 2], 0
+        )
+
+    def _advance(self, accel_blocks):
+        """
+        Advance all systems through consecutive sub-blocks of equal length,
+        with shape (C, K, m), & update the running extrema.
+        """
+        if self._conv_matrices is None:
+            self._init_batch()
+
+        channels, count, m = accel_blocks.shape
+        freqs = self._omega.size
+        accel_blocks = accel_blocks.swapaxes(1, 2)
+
+        # Final states of every sub-block from a zero state, for all
+        # frequencies at once
+        impulse_states = self._impulse_states[..., m - 1 :: -1].reshape(freqs * 2, m)
+        states = np.matmul(impulse_states, accel_blocks).reshape(
+            channels, freqs, 2, count
+        )
+
+        # Carry the states across the sub-blocks, keeping the state at the
+        # start of each (in place)
+        transition = self._state_transitions[:, m - 1]
+        s = self._states.swapaxes(0, 1)
+        for j in range(count):
+            s, states[..., j] = (
+                transition[..., 0] * s[..., :1] + transition[..., 1] * s[..., 1:]
+            ) + states[..., j], s
+        self._states = np.ascontiguousarray(s.swapaxes(0, 1))
+
+        conv_matrices = self._conv_matrices[:, :m, :m].reshape(freqs * m, m)
+        state_responses = self._state_responses[:, :m]
+        for i in range(channels):
+            # The zero-state responses of every sub-block, as a single matrix
+            # product, plus their zero-input responses
+            rd = np.matmul(conv_matrices, accel_blocks[i]).reshape(freqs, m, count)
+            rd += np.matmul(state_responses, states[i])
+
+            rd = rd.reshape(freqs, m * count)
+            np.minimum(self._min[:, i], rd.min(axis=1), out=self._min[:, i])
+            np.maximum(self._max[:, i], rd.max(axis=1), out=self._max[:, i])
+
+    def _advance_each(self, accel_block):
+        """
+        Advance the systems one at a time through a block of shape (C, N), &
+        update the running extrema.
+        """
+        for j in range(self._omega.size):
+            rd, self._states[j] = scipy.signal.lfilter(
+                self._num[j],
+                self._den[j],
+                accel_block,
+                axis=-1,
+                zi=self._states[j],
+            )
+            np.minimum(self._min[j], rd.min(axis=-1), out=self._min[j])
+            np.maximum(self._max[j], rd.max(axis=-1), out=self._max[j])
+
+    def update(self, accel):
+        """Feed the next block of acceleration data (time in the last axis)."""
+        if accel.shape[-1] == 0:
+            return
+        if self._states is None:
+            self._shape = accel.shape[:-1]
+            channels = int(np.prod(self._shape))
+            self._states = np.zeros((self._omega.size, channels, 2))
+            self._min = np.full((self._omega.size, channels), np.inf)
+            self._max = np.full((self._omega.size, channels), -np.inf)
+
+        accel = accel.reshape(-1, accel.shape[-1])
+        for i in range(0, accel.shape[-1], self._block_len):
+            block = accel[:, i : i + self._block_len]
+            if block.shape[-1] >= self._batch_max_len:
+                self._advance_each(block)
+                continue
+
+            count = block.shape[-1] // self._sub_block_len
+            split = count * self._sub_block_len
+            if count:
+                self._advance(block[:, :split].reshape(len(block), count, -1))
+            if split < block.shape[-1]:
+                self._advance(block[:, np.newaxis, split:])
+
+    def pseudo_velocity(self, two_sided=False):
+        """
+        The pseudo velocity of the acceleration fed so far, with any frequency
+        axes leading the acceleration's non-time axes.
+        """
+        shape = self._omega.shape + self._shape
+        omega = self._omega[(Ellipsis,) + (None,) * (len(shape) - self._omega.ndim)]
+        neg = -omega * self._min.reshape(shape)
+        pos = omega * self._max.reshape(shape)
+
+        if not two_sided:
+            return np.maximum(neg, pos)
+
+        return namedtuple("PseudoVelocityResults", "neg pos")(neg, pos)
+
+
 def rolling_rel_vel(accel, freqs, dt=1, damp=0, nperseg=256, axis=-1):
     """Calculate a rolling windowed relative velocity for a SDOF system."""
     axis = (axis % accel.ndim) - accel.ndim  # index axis from end
@@ -45,24 +259,22 @@ def rolling_rel_vel(accel, freqs, dt=1, damp=0, nperseg=256, axis=-1):
 def pseudo_velocity(accel, freqs, dt=1, damp=0, two_sided=False, axis=-1):
     """The pseudo velocity of an acceleration signal."""
     freqs = np.asarray(freqs)
-    omega = 2 * np.pi * freqs
 
     accel = np.moveaxis(accel, axis, -1)
 
-    results = np.empty((2,) + freqs.shape + accel.shape[:-1], dtype=np.float)
-
-    for i_nd in np.ndindex(freqs.shape):
-        rd = rel_displ(accel, omega[i_nd], dt, damp)
-
-        results[(0,) + i_nd] = -omega[i_nd] * rd.min(axis=-1)
-        results[(1,) + i_nd] = omega[i_nd] * rd.max(axis=-1)
+    extrema = RelDisplExtrema(2 * np.pi * freqs, dt, damp)
+    extrema.update(accel)
+    results = extrema.pseudo_velocity(two_sided=True)
 
     # Move any frequency axes in place of the specified acceleration axis
-    results = np.moveaxis(
-        results,
-        np.arange(1, omega.ndim + 1),
-        np.arange(1, omega.ndim + 1) + (axis % accel.ndim),
-    )
+    results = [
+        np.moveaxis(
+            result,
+            np.arange(freqs.ndim),
+            np.arange(freqs.ndim) + (axis % accel.ndim),
+        )
+        for result in results
+    ]
 
     if not two_sided:
         return np.maximum(results[0], results[1])
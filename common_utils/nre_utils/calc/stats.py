@@ -36,9 +36,98 @@ def rms(data, axis=None, keepdims=False):
     return np.sqrt(np.mean(np.abs(data) ** 2, axis=axis, keepdims=keepdims))
 
 
+def _cumsum0(values, dtype=np.float64):
+    """Calculate a cumulative sum along the last axis, starting from zero."""
+    result = np.zeros(values.shape[:-1] + (values.shape[-1] + 1,), dtype=dtype)
+    np.cumsum(values, axis=-1, out=result[..., 1:])
+    return result
+
+
 def rolling_rms(array, nperseg=256, axis=-1):
-    """Calculate a rolling RMS along a given axis."""
-    sq = array ** 2
-    window = np.ones(nperseg, dtype=array.dtype) / nperseg
-    mean_sq = scipy.ndimage.convolve1d(sq, window, axis=axis, mode="mirror")
-    return np.sqrt(mean_sq)
+    """
+    Calculate a rolling RMS along a given axis.
+
+    Each window is centered on its sample, and mirrored about the array's
+    edges. The windows are summed from a cumulative sum, so the cost doesn't
+    depend on the window length.
+    """
+    array = np.moveaxis(np.asarray(array), axis, -1)
+    sq = np.pad(
+        array.astype(np.float64) ** 2,
+        [(0, 0)] * (array.ndim - 1) + [((nperseg - 1) // 2, nperseg // 2)],
+        mode="reflect",
+    )
+    csum = _cumsum0(sq)
+    mean_sq = (csum[..., nperseg:] - csum[..., :-nperseg]) / nperseg
+
+    # cancellation in the cumulative sum can leave tiny negative values
+    result = np.sqrt(np.maximum(mean_sq, 0))
+    return np.moveaxis(
+        result.astype(np.result_type(array.dtype, np.float32), copy=False), -1, axis
+    )
+
+
+def _window_starts(length, nperseg, step):
+    return np.arange(0, length - nperseg + 1, nperseg if step is None else step)
+
+
+def window_mean(array, nperseg, step=None, axis=-1):
+    """
+    Calculate the means over windows along a given axis.
+
+    The windows are summed from a cumulative sum, so the cost doesn't depend
+    on the window length.
+
+    :param nperseg: the number of samples per window
+    :param step: the number of samples between the starts of consecutive
+        windows; by default, the windows don't overlap
+    :return: the mean of each window that fits entirely within the array
+    """
+    array = np.moveaxis(np.asarray(array), axis, -1)
+    starts = _window_starts(array.shape[-1], nperseg, step)
+    csum = _cumsum0(array)
+
+    result = (csum[..., starts + nperseg] - csum[..., starts]) / nperseg
+    return np.moveaxis(result, -1, axis)
+
+
+def window_rms(array, nperseg, step=None, axis=-1):
+    """
+    Calculate the RMS over windows along a given axis; see `window_mean`.
+    """
+    mean_sq = window_mean(np.abs(array) ** 2, nperseg, step=step, axis=axis)
+
+    # cancellation in the cumulative sum can leave tiny negative values
+    return np.sqrt(np.maximum(mean_sq, 0))
+
+
+def window_max_abs(array, nperseg, step=None, axis=-1):
+    """
+    Calculate the maximum absolute values over windows along a given axis.
+
+    The maxima are tracked with a monotonic queue (see
+    `scipy.ndimage.maximum_filter1d`), so the cost doesn't depend on the window
+    length; as in `max_abs`, no absolute-value copy of the array is made.
+
+    :param nperseg: the number of samples per window
+    :param step: the number of samples between the starts of consecutive
+        windows; by default, the windows don't overlap
+    :return: the maximum absolute value of each window that fits entirely
+        within the array
+    """
+    # Forbid complex-valued data
+    if np.iscomplexobj(array):
+        raise ValueError("`window_max_abs` does not accept complex arrays")
+
+    array = np.moveaxis(np.asarray(array), axis, -1)
+    starts = _window_starts(array.shape[-1], nperseg, step)
+    if len(starts) == 0:
+        return np.moveaxis(np.empty(array.shape[:-1] + (0,)), -1, axis)
+
+    # The filters' windows start at each sample
+    kwargs = dict(size=nperseg, axis=-1, origin=-(nperseg // 2))
+    result = np.maximum(
+        scipy.ndimage.maximum_filter1d(array, **kwargs)[..., starts],
+        -scipy.ndimage.minimum_filter1d(array, **kwargs)[..., starts],
+    )
+    return np.moveaxis(result, -1, axis)
@@ -1,4 +1,14 @@
+from collections import defaultdict, namedtuple
+import concurrent.futures
+import functools
+import io
+import itertools
+import struct
+
 import ebmlite
+from ebmlite.decoding import readElementID, readElementSize
+
+from .ide_utils import UTYPE_GROUPS
 
 
 def iter_hierarchy(ebmldoc, nocache=False):
@@ -6,6 +16,10 @@ def iter_hierarchy(ebmldoc, nocache=False):
     Iterate depth-first over all elements, yielding for each element its
     hierarchical path from the root document.
 
+    The iteration keeps a single path stack, which is yielded as-is & updated
+    in place; copy it to keep it past the next iteration. Skipped elements are
+    passed over using their encoded sizes, without reading their contents.
+
     :param nocache: whether to skip parser caching (defaults to False)
     :send: whether the current element's descendants should be skipped;
         defaults to None -> False
@@ -14,56 +28,379 @@ def iter_hierarchy(ebmldoc, nocache=False):
         every element in the document
     :yield type: list
     """
-    should_skip = yield [ebmldoc]
-    if should_skip:
-        return
+    path = [ebmldoc]
+    iter_children = []  # for each element in `path`, an iterator of children
 
-    try:
-        iter_subelements = ebmldoc.__iter__(nocache=nocache)
-    except AttributeError:
-        return
+    should_skip = yield path
+    while True:
+        if not should_skip:
+            try:
+                iter_children.append(path[-1].__iter__(nocache=nocache))
+            except AttributeError:  # not a master element
+                path.pop()
+        else:
+            path.pop()
 
-    for subelement in iter_subelements:
-        iter_subhierarchy = iter_hierarchy(subelement, nocache=nocache)
+        # Find the next element, ascending from any finished parent elements
+        while iter_children:
+            element = next(iter_children[-1], None)
+            if element is not None:
+                break
+            iter_children.pop()
+            path.pop()
+        else:
+            return
 
-        should_skip = None  # must start an iterator by sending `None`
-        try:
-            while True:
-                should_skip = yield [ebmldoc] + iter_subhierarchy.send(should_skip)
-        except StopIteration:
-            continue
+        path.append(element)
+        should_skip = yield path
+
+
+def _iter_element_headers(parent, start, end=None):
+    """
+    Iterate over the child elements in a span of an EBML element's stream,
+    reading only their headers; each element's payload is skipped over using
+    its encoded size.
+
+    Elements of unknown size (i.e., streamed master elements) are parsed to
+    find their extent. The iteration ends at the end of the span or of the
+    stream, including at an element header truncated by the end of the
+    stream (e.g., in a recording cut short).
+
+    :param parent: the (master) element or document containing the span
+    :param start: the stream offset of the first element
+    :param end: the stream offset at which to stop; by default, the end of
+        the stream
+    :yield: the offset, ID, payload offset & payload size of each element
+    """
+    stream = parent.stream
+    stream.seek(0, io.SEEK_END)
+    stream_len = stream.tell()
+    end = stream_len if end is None else min(end, stream_len)
+
+    pos = start
+    while pos < end:
+        stream.seek(pos)
+        eid, id_len = readElementID(stream)
+        if pos + id_len >= stream_len:  # truncated header
+            return
+        size, size_len = readElementSize(stream)
+        payload_offset = pos + id_len + size_len
+        if payload_offset > stream_len:  # truncated header
+            return
+
+        if size is None:
+            stream.seek(pos)
+            element, _ = parent.parseElement(stream, nocache=True)
+            size = element.size
+
+        yield pos, eid, payload_offset, size
+        pos = payload_offset + size
 
 
 def filter_elements_by_name(doc, elem_names):
-    """Filter hierarchical element paths by element names."""
-    elem_names = [doc.name] + elem_names
-    iter_elem_hierarchy = iter_hierarchy(doc)
-    should_skip = None
+    """
+    Filter hierarchical element paths by element names.
 
-    try:
-        while True:
-            element_path = iter_elem_hierarchy.send(should_skip)
-            should_skip = element_path[-1].name != elem_names[len(element_path) - 1]
-            if not should_skip and len(element_path) == len(elem_names):
-                yield element_path
-    except StopIteration:
-        pass
+    Only the elements along the given path of names are parsed; all others are
+    skipped over from their headers, along with their descendants.
+    """
+    elem_ids = [doc.schema.elementsByName[name].id for name in elem_names]
+    path = [doc]
+    iter_headers = [_iter_element_headers(doc, doc.payloadOffset)]
+
+    while iter_headers:
+        header = next(iter_headers[-1], None)
+        if header is None:
+            iter_headers.pop()
+            path.pop()
+            continue
+
+        offset, eid, payload_offset, size = header
+        depth = len(iter_headers)
+        if eid != elem_ids[depth - 1]:
+            continue
+
+        doc.stream.seek(offset)
+        element, _ = path[-1].parseElement(doc.stream)
+        if depth == len(elem_ids):
+            yield path + [element]
+        else:
+            path.append(element)
+            iter_headers.append(
+                _iter_element_headers(element, payload_offset, payload_offset + size)
+            )
+
+
+@functools.lru_cache(maxsize=None)
+def _ide_schema():
+    """Load the IDE file schema, once per process."""
+    return ebmlite.loadSchema("mide_ide.xml")
+
+
+def read_config_attrs(filename, queries):
+    """
+    Read several configuration attributes from a file, in a single pass over
+    its recorder configuration list.
+
+    :param filename: the recording's filename
+    :param queries: an iterable of `(config_id, element_name)` pairs, e.g.
+        `(0x8FF7F, "TextValue")` for the device name
+    :return: a dict mapping each query to the list of its values in the file
+    """
+    result = {query: [] for query in queries}
+    names_by_id = defaultdict(set)
+    for config_id, element_name in result:
+        names_by_id[config_id].add(element_name)
+
+    with open(filename, "rb") as file:
+        doc = _ide_schema().load(file)
+        # There's one configuration list, near the start of the file
+        config_list = next(
+            filter_elements_by_name(doc, ["RecorderConfigurationList"]), None
+        )
+        if config_list is None:
+            return result
+
+        for config_item in config_list[-1]:
+            if config_item.name != "RecorderConfigurationItem":
+                continue
+            children = list(config_item)
+            config_id = next(
+                (child.value for child in children if child.name == "ConfigID"), None
+            )
+            element_names = names_by_id.get(config_id, ())
+            for child in children:
+                if child.name in element_names:
+                    result[(config_id, child.name)].append(child.value)
+
+    return result
 
 
 def iter_config_attrs(filename, config_id, element_name):
     """Determine from file whether to perform segment processing."""
+    query = (config_id, element_name)
+    yield from read_config_attrs(filename, [query])[query]
+
+
+def config_attrs_table(filenames, queries, workers=None):
+    """
+    Read several configuration attributes from many files into a table.
+
+    Requires `pandas`.
+
+    :param filenames: the recordings' filenames
+    :param queries: an iterable of `(config_id, element_name)` pairs (see
+        `read_config_attrs`)
+    :param workers: the number of processes over which to read the files; by
+        default, files are read in the current process
+    :return: a `pandas.DataFrame` with a row per attribute value, and columns
+        "filename", "config id", "element name" & "value"
+    """
+    import pandas as pd
+
+    queries = list(queries)
+    if workers is None:
+        results = [read_config_attrs(filename, queries) for filename in filenames]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(
+                executor.map(
+                    read_config_attrs,
+                    filenames,
+                    itertools.repeat(queries),
+                    chunksize=max(1, len(filenames) // (4 * workers)),
+                )
+            )
+
+    rows = [
+        (filename, config_id, element_name, value)
+        for (filename, result) in zip(filenames, results)
+        for ((config_id, element_name), values) in result.items()
+        for value in values
+    ]
+    return pd.DataFrame(
+        rows, columns=["filename", "config id", "element name", "value"]
+    )
+
+
+SubChannelSummary = namedtuple("SubChannelSummary", "id, name, label, units")
+
+
+class ChannelSummary(
+    namedtuple(
+        "ChannelSummary",
+        "id, name, sample_format, subchannels, payload_size, sample_count, "
+        "start_time, end_time",
+    )
+):
+    """
+    The definition of a recording channel, with the extent of its data.
+
+    The sample count is derived from the total size of the channel's data
+    payloads, and is `None` if the channel's sample format is unknown; the start
+    & end times (in seconds on the recorder's clock) are `None` if the channel
+    has no data.
+    """
+
+
+class RecordingSummary(
+    namedtuple(
+        "RecordingSummary", "filename, serial_number, product_name, utc_time, channels"
+    )
+):
+    """The recorder info & channels (a dict keyed by channel ID) of a recording."""
+
+    def sample_counts_by_utype(self):
+        """
+        Get the highest sample count among the channels of each utype (see
+        `ide_utils.UTYPE_GROUPS`); a count is `None` if unknown.
+        """
+        result = {}
+        for channel in self.channels.values():
+            for utype in {
+                UTYPE_GROUPS[sch.label]
+                for sch in channel.subchannels
+                if sch.label in UTYPE_GROUPS
+            }:
+                if channel.sample_count is None or result.get(utype, 0) is None:
+                    result[utype] = None
+                else:
+                    result[utype] = max(result.get(utype, 0), channel.sample_count)
+
+        return result
+
+
+def _parse_time_scale(text):
+    """Parse a time code scale, e.g. "1.0/32768"."""
+    numerator, _, denominator = text.partition("/")
+    return float(numerator) / float(denominator or 1)
+
+
+def _values_by_name(element, names):
+    return {child.name: child.value for child in element if child.name in names}
+
+
+def prescan(filename):
+    """
+    Summarize a recording's metadata, without reading any of its sample data.
+
+    Only the recorder info, the channel & subchannel definitions, and the
+    headers of the data blocks are read, which takes a small fraction of the
+    time of a full `idelib.importFile`; this can be used to filter, size & order
+    recordings before importing them.
+
+    :return: a `RecordingSummary`
+    """
+    info = {}
+    utc_time = None
+    channel_defs = {}
+    block_stats = defaultdict(lambda: dict(payload_size=0, times=[]))
+
     with open(filename, "rb") as file:
-        doc = ebmlite.loadSchema("mide_ide.xml").load(file)
-        for elem_hierarchy in filter_elements_by_name(
-            doc,
-            [
-                "RecorderConfigurationList",
-                "RecorderConfigurationItem",
-                "ConfigID",
+        doc = _ide_schema().load(file)
+        for element in doc:
+            if element.name == "RecordingProperties":
+                for child in element:
+                    if child.name == "RecorderInfo":
+                        info = _values_by_name(child, ("RecorderSerial", "ProductName"))
+                    elif child.name == "ChannelList":
+                        for channel in child:
+                            channel_def = _values_by_name(
+                                channel,
+                                (
+                                    "ChannelID",
+                                    "ChannelName",
+                                    "ChannelFormat",
+                                    "TimeCodeScale",
+                                    "TimeCodeModulus",
+                                ),
+                            )
+                            channel_def["subchannels"] = [
+                                _values_by_name(
+                                    subchannel,
+                                    (
+                                        "SubChannelID",
+                                        "SubChannelName",
+                                        "SubChannelLabel",
+                                        "SubChannelUnits",
+                                    ),
+                                )
+                                for subchannel in channel
+                                if subchannel.name == "SubChannel"
+                            ]
+                            channel_defs[channel_def["ChannelID"]] = channel_def
+
+            elif element.name == "TimeBaseUTC":
+                utc_time = element.value
+
+            elif element.name == "ChannelDataBlock":
+                ch_id = start = end = None
+                payload_size = 0
+                for child in element:
+                    if child.name == "ChannelIDRef":
+                        ch_id = child.value
+                    elif child.name.startswith("StartTimeCode"):
+                        start = child.value
+                    elif child.name.startswith("EndTimeCode"):
+                        end = child.value
+                    elif child.name == "ChannelDataPayload":
+                        payload_size = child.size  # the payload itself is unread
+                stats = block_stats[ch_id]
+                stats["payload_size"] += payload_size
+                stats["times"].append((start, end))
+
+    channels = {}
+    for ch_id, channel_def in channel_defs.items():
+        stats = block_stats.get(ch_id, dict(payload_size=0, times=[]))
+
+        try:
+            sample_size = struct.calcsize(channel_def["ChannelFormat"])
+        except (KeyError, struct.error):
+            sample_count = None
+        else:
+            sample_count = stats["payload_size"] // sample_size
+
+        start_time = end_time = None
+        times = [t for t in stats["times"] if None not in t]
+        if times:
+            # Unwrap time codes that roll over at the modulus
+            modulus = channel_def.get("TimeCodeModulus")
+            offset, prev_start, unwrapped = 0, None, []
+            for start, end in times:
+                if modulus and prev_start is not None and start < prev_start:
+                    offset += modulus
+                prev_start = start
+                if modulus and end < start:
+                    end += modulus
+                unwrapped.append((start + offset, end + offset))
+
+            scale = _parse_time_scale(channel_def.get("TimeCodeScale", "1.0/32768"))
+            start_time = scale * min(start for (start, _end) in unwrapped)
+            end_time = scale * max(end for (_start, end) in unwrapped)
+
+        channels[ch_id] = ChannelSummary(
+            id=ch_id,
+            name=channel_def.get("ChannelName"),
+            sample_format=channel_def.get("ChannelFormat"),
+            subchannels=[
+                SubChannelSummary(
+                    id=sch_def.get("SubChannelID"),
+                    name=sch_def.get("SubChannelName"),
+                    label=sch_def.get("SubChannelLabel"),
+                    units=sch_def.get("SubChannelUnits"),
+                )
+                for sch_def in channel_def["subchannels"]
             ],
-        ):
-            if elem_hierarchy[-1].value != config_id:
-                continue
-            for elem in elem_hierarchy[-2]:
-                if elem.name == element_name:
-                    yield elem.value
+            payload_size=stats["payload_size"],
+            sample_count=sample_count,
+            start_time=start_time,
+            end_time=end_time,
+        )
+
+    return RecordingSummary(
+        filename=filename,
+        serial_number=info.get("RecorderSerial"),
+        product_name=info.get("ProductName"),
+        utc_time=utc_time,
+        channels=channels,
+    )
@@ -23,44 +23,100 @@ class NoChannelException(Exception):
     pass
 
 
+class ChannelInfo(namedtuple("ChannelInfo", "eventarray, length, fs")):
+    """The session data of a recording channel, with its length & sample rate."""
+
+    @classmethod
+    def from_channel(cls, channel):
+        eventarray = channel.getSession()
+        length = len(eventarray)
+        return cls(
+            eventarray, length, eventarray.getSampleRate() if length > 0 else None
+        )
+
+
 class ChannelStruct(namedtuple("ChannelStruct", "channel, sch_ids")):
+    """
+    A group of subchannels of a channel.
+
+    The channel's session data, length & sample rate, and the subchannels'
+    units & axis names, are looked up once, on construction.
+
+    :param info: the channel's `ChannelInfo`, if already known (e.g., as shared
+        by all the groups of a channel in a `ChannelIndex`)
+    """
+
+    def __new__(cls, channel, sch_ids, info=None):
+        self = super().__new__(cls, channel, sch_ids)
+        self._info = ChannelInfo.from_channel(channel) if info is None else info
+        self._units = channel[sch_ids[0]].units
+        self._axis_names = [channel.subchannels[i].axisName for i in sch_ids]
+        return self
+
     @property
     def eventarray(self):
-        return self.channel.getSession()
+        return self._info.eventarray
+
+    @property
+    def length(self):
+        return self._info.length
 
     @property
     def fs(self):
-        return self.eventarray.getSampleRate() if len(self.eventarray) > 0 else None
+        return self._info.fs
 
     @property
     def units(self):
-        return self.channel[self.sch_ids[0]].units
+        return self._units
 
     @property
     def axis_names(self):
-        return [self.channel.subchannels[i].axisName for i in self.sch_ids]
+        return list(self._axis_names)
+
+
+class ChannelIndex:
+    """
+    An index of the subchannels of a recording, grouped by channel & utype.
+
+    The index is built once per recording; the session data, length & sample
+    rate of each channel are looked up only once, and shared by all the
+    `ChannelStruct`s of the channel.
+    """
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.ch_structs = []  # (utype, ChannelStruct) pairs
+
+        for ch_id, channel in dataset.channels.items():
+            # Group subchannel id's by unit type
+            sch_ids_by_utype = defaultdict(list)
+            for sch_id, subchannel in enumerate(channel.subchannels):
+                try:
+                    utype_group = UTYPE_GROUPS[subchannel.units[0]]
+                except KeyError:
+                    warnings.warn(
+                        f"skipped recording channel {ch_id}.{sch_id}"
+                        f' of unlisted unit type "{subchannel.units[0]}"',
+                        RuntimeWarning,
+                    )
+                else:
+                    sch_ids_by_utype[utype_group].append(sch_id)
+
+            if not sch_ids_by_utype:
+                continue
+
+            # Separate each channel into subchannels of like-unit-type
+            info = ChannelInfo.from_channel(channel)
+            for utype, sch_ids in sch_ids_by_utype.items():
+                self.ch_structs.append((utype, ChannelStruct(channel, sch_ids, info)))
+
+    def __iter__(self):
+        return iter(self.ch_structs)
 
 
 def chs_by_utype(dataset):
     """Group subchannels together by channel & utype."""
-    for ch_id, channel in dataset.channels.items():
-        # Group subchannel id's by unit type
-        sch_ids_by_utype = defaultdict(list)
-        for sch_id, subchannel in enumerate(channel.subchannels):
-            try:
-                utype_group = UTYPE_GROUPS[subchannel.units[0]]
-            except KeyError:
-                warnings.warn(
-                    f"skipped recording channel {ch_id}.{sch_id}"
-                    f' of unlisted unit type "{subchannel.units[0]}"',
-                    RuntimeWarning,
-                )
-            else:
-                sch_ids_by_utype[utype_group].append(sch_id)
-
-        # Separate each channel into subchannels of like-unit-type
-        for utype, sch_ids in sch_ids_by_utype.items():
-            yield utype, ChannelStruct(channel, sch_ids)
+    return iter(ChannelIndex(dataset))
 
 
 def dict_groups(iterable):
@@ -71,7 +127,7 @@ def dict_groups(iterable):
     return result
 
 
-def dict_chs_best(iterable, max_key=lambda x: len(x.eventarray)):
+def dict_chs_best(iterable, max_key=lambda x: x.length):
     """
     Group an iterable of utype-ch_struct pairs into a dict, keeping only those
     channels with the highest sample length for their utype.
@@ -87,7 +143,7 @@ def dict_chs_best(iterable, max_key=lambda x: len(x.eventarray)):
     return result
 
 
-def get_ch_type_best(dataset, utype, max_key=lambda x: len(x.eventarray)):
+def get_ch_type_best(dataset, utype, max_key=lambda x: x.length):
     """Get the highest sample-length acceleration channel from a recording."""
     chs = chs_by_utype(dataset)
     utype_chs = (ch_struct for (ut, ch_struct) in chs if ut == utype)
@@ -1,3 +1,4 @@
+import pytest
 from nre_utils.calc import filters
 
 import numpy as np
@@ -48,3 +49,53 @@ def test_highpass():
     angle_change_0centered = (angle_change + np.pi) % (2 * np.pi) - np.pi
     # 0-phase offset with bidirectional filter
     assert np.allclose(angle_change_0centered, 0)
+
+
+@pytest.mark.parametrize("block_len", [64, 1000, 2000])
+def test_highpass_out(block_len):
+    x = np.random.default_rng(0).standard_normal((3, 1000)).cumsum(axis=-1)
+    fs = 100
+    fs_cutoff = 5
+
+    expt_result = filters.highpass(x, fs=fs, cutoff=fs_cutoff)
+
+    # Along another axis
+    np.testing.assert_array_equal(
+        filters.highpass(x.T, fs=fs, cutoff=fs_cutoff, axis=0, block_len=block_len),
+        expt_result.T,
+    )
+
+    # In place
+    out = x.copy()
+    result = filters.highpass(
+        out, fs=fs, cutoff=fs_cutoff, out=out, block_len=block_len
+    )
+    assert result is out
+    np.testing.assert_array_equal(out, expt_result)
+
+    # Into a lower-precision array
+    out = np.empty(x.shape, dtype=np.float32)
+    filters.highpass(x, fs=fs, cutoff=fs_cutoff, out=out, block_len=block_len)
+    np.testing.assert_allclose(out, expt_result, rtol=0, atol=1e-6)
+
+    with pytest.raises(ValueError):
+        filters.highpass(x, fs=fs, cutoff=fs_cutoff, out=np.empty(1000))
+
+
+@pytest.mark.parametrize("length, block_len", [(1000, 64), (1000, 1000), (999, 1)])
+def test_BlockHighpass(length, block_len):
+    x = np.random.default_rng(0).standard_normal((3, length)).cumsum(axis=-1)
+    fs = 100
+    fs_cutoff = 5
+
+    expt_result = filters.highpass(x, fs=fs, cutoff=fs_cutoff)
+    block_filter = filters.BlockHighpass(
+        lambda start, stop: x[:, start:stop],
+        length,
+        fs=fs,
+        cutoff=fs_cutoff,
+        block_len=block_len,
+    )
+
+    np.testing.assert_allclose(np.concatenate(list(block_filter), axis=-1), expt_result)
+    np.testing.assert_allclose(block_filter.slice(300, 700), expt_result[:, 300:700])
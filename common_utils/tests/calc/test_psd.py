@@ -1,5 +1,6 @@
 import pytest
 import numpy as np
+import scipy.signal
 
 from nre_utils.calc import psd, stats
 
@@ -56,3 +57,78 @@ def test_rms_literal(array, fs, dn, nfft, axis):
         stats.rms(array, axis),
         rtol=1e-4,
     )
+
+
+def test_to_rms_literal():
+    """Test `to_rms` against literal definition of RMS."""
+    array = np.random.default_rng(0).standard_normal((3, 1000))
+    f, calc_psd = scipy.signal.welch(
+        array,
+        fs=10,
+        window="boxcar",
+        nperseg=100,
+        noverlap=0,
+        detrend=False,
+        average="mean",
+        axis=-1,
+    )
+
+    np.testing.assert_allclose(
+        psd.to_rms(f, calc_psd, min_freq=-1),
+        stats.rms(array, axis=-1),
+    )
+
+
+@pytest.mark.parametrize("mode", ["sum", "mean"])
+@pytest.mark.parametrize("axis", [-1, 0])
+def test_to_jagged(mode, axis):
+    """Test `to_jagged` against per-axis histograms."""
+    f = np.fft.rfftfreq(200, d=1 / 100)
+    calc_psd = np.random.default_rng(0).random((2, 3, len(f)))
+    freq_splits = np.array([0.5, 1, 2, 5, 10, 25, 49.5, 50])
+
+    expt_psd = np.empty((2, 3, len(freq_splits) - 1))
+    for i in np.ndindex(2, 3):
+        expt_psd[i] = np.histogram(f, bins=freq_splits, weights=calc_psd[i])[0]
+    if mode == "mean":
+        expt_psd /= np.histogram(f, bins=freq_splits)[0]
+
+    calc_f, calc_psd_jagged = psd.to_jagged(
+        f, np.moveaxis(calc_psd, -1, axis), freq_splits, axis=axis, mode=mode
+    )
+
+    np.testing.assert_allclose(calc_f, (freq_splits[1:] + freq_splits[:-1]) / 2)
+    np.testing.assert_allclose(np.moveaxis(calc_psd_jagged, axis, -1), expt_psd)
+
+
+def test_to_jagged_empty_bins():
+    f = np.arange(10.0)
+    freq_splits = np.array([0.5, 1, 1.5, 2, 10])
+
+    with pytest.warns(RuntimeWarning, match="empty frequency bins"):
+        _f, calc_psd_jagged = psd.to_jagged(f, np.ones(10), freq_splits, mode="mean")
+
+    np.testing.assert_array_equal(calc_psd_jagged, [0, 1, 0, 1])
+
+
+def test_octave_plan():
+    """Test that `to_octave` reuses its binning plans."""
+    f = np.fft.rfftfreq(2000, d=1 / 1000)
+    calc_psd = np.random.default_rng(0).random((3, len(f)))
+
+    plan = psd.octave_plan(f, fstart=1, octave_bins=3)
+    assert psd.octave_plan(f.copy(), fstart=1, octave_bins=3) is plan
+    assert psd.octave_plan(f, fstart=1, octave_bins=12) is not plan
+    assert np.sum(plan.bin_sizes) == np.count_nonzero(
+        (f >= plan.freq_splits[0]) & (f <= plan.freq_splits[-1])
+    )
+
+    calc_f, calc_psd_oct = psd.to_octave(f, calc_psd, fstart=1, octave_bins=3)
+    np.testing.assert_array_equal(calc_f, plan.freqs)
+    calc_f += 1  # the returned frequencies are the caller's own
+    np.testing.assert_array_equal(
+        psd.to_octave(f, calc_psd, fstart=1, octave_bins=3)[0], plan.freqs
+    )
+    calc_f_jagged, calc_psd_jagged = psd.to_jagged(f, calc_psd, plan.freq_splits)
+    np.testing.assert_allclose(calc_psd_oct, calc_psd_jagged)
+    assert calc_f_jagged.flags.writeable
@@ -48,3 +48,57 @@ def test_rel_displ(freq, damp):
 
     # Test results
     assert np.allclose(calc_result, expt_result)
+
+
+@pytest.mark.parametrize(
+    "block_len, batch_max_len, sub_block_len, damp",
+    [
+        (2 ** 16, 2 ** 10, 16, 0.05),  # all frequencies together
+        (2 ** 16, 0, 16, 0.05),  # one frequency at a time
+        (128, 100, 7, 0.05),  # both, alternately
+        (2, 2 ** 10, 2, 0.05),
+        (1, 2 ** 10, 1, 0.05),
+        (2 ** 16, 2 ** 10, 16, 0.0),
+        (2 ** 16, 0, 16, 0.0),
+    ],
+)
+def test_RelDisplExtrema(block_len, batch_max_len, sub_block_len, damp):
+    signal = np.random.default_rng(0).standard_normal((3, 1000))
+    freqs = np.array([10, 100, 1000])
+    fs = 10 ** 4  # Hz
+
+    calc_result = shock.RelDisplExtrema(
+        2 * np.pi * freqs,
+        dt=1 / fs,
+        damp=damp,
+        block_len=block_len,
+        batch_max_len=batch_max_len,
+        sub_block_len=sub_block_len,
+    )
+    for i in range(0, signal.shape[-1], 300):
+        calc_result.update(signal[:, i : i + 300])
+    calc_result = calc_result.pseudo_velocity(two_sided=True)
+
+    assert calc_result.neg.shape == (3, 3)
+    for i, freq in enumerate(freqs):
+        omega = 2 * np.pi * freq
+        rd = shock.rel_displ(signal, omega, dt=1 / fs, damp=damp)
+        np.testing.assert_allclose(calc_result.neg[i], -omega * rd.min(axis=-1))
+        np.testing.assert_allclose(calc_result.pos[i], omega * rd.max(axis=-1))
+
+
+def test_pseudo_velocity():
+    signal = np.random.default_rng(1).standard_normal((1000, 2))
+    freqs = np.array([[10, 100], [300, 1000]])
+    fs = 10 ** 4  # Hz
+
+    calc_result = shock.pseudo_velocity(
+        signal, freqs, dt=1 / fs, damp=0.05, two_sided=True, axis=0
+    )
+
+    assert calc_result.neg.shape == (2, 2, 2)
+    for i_nd in np.ndindex(freqs.shape):
+        omega = 2 * np.pi * freqs[i_nd]
+        rd = shock.rel_displ(signal, omega, dt=1 / fs, damp=0.05, axis=0)
+        np.testing.assert_allclose(calc_result.neg[i_nd], -omega * rd.min(axis=0))
+        np.testing.assert_allclose(calc_result.pos[i_nd], omega * rd.max(axis=0))
@@ -0,0 +1,44 @@
+import pytest
+from nre_utils.calc import stats
+
+import numpy as np
+import scipy.ndimage
+
+
+@pytest.mark.parametrize("nperseg", [1, 4, 7, 256])
+@pytest.mark.parametrize("axis", [0, -1])
+def test_rolling_rms(nperseg, axis):
+    array = np.random.default_rng(0).standard_normal((3, 500))
+    if axis == 0:
+        array = array.T
+
+    calc_result = stats.rolling_rms(array, nperseg=nperseg, axis=axis)
+
+    window = np.ones(nperseg) / nperseg
+    expt_result = np.sqrt(
+        scipy.ndimage.convolve1d(array ** 2, window, axis=axis, mode="mirror")
+    )
+    np.testing.assert_allclose(calc_result, expt_result, atol=1e-9)
+
+
+@pytest.mark.parametrize(
+    "length, nperseg, step", [(500, 10, None), (500, 10, 3), (500, 7, 11), (5, 10, 1)]
+)
+@pytest.mark.parametrize(
+    "window_func, stat_func",
+    [
+        (stats.window_mean, np.mean),
+        (stats.window_rms, stats.rms),
+        (stats.window_max_abs, stats.max_abs),
+    ],
+)
+def test_window_stats(length, nperseg, step, window_func, stat_func):
+    array = np.random.default_rng(0).standard_normal((3, length))
+
+    calc_result = window_func(array.T, nperseg, step=step, axis=0)
+
+    starts = range(0, length - nperseg + 1, step or nperseg)
+    expt_result = np.array(
+        [stat_func(array[:, i : i + nperseg], axis=-1) for i in starts]
+    ).reshape(-1, 3)
+    np.testing.assert_allclose(calc_result, expt_result, atol=1e-9)
@@ -1,8 +1,11 @@
+import io
 import os.path
 
+import ebmlite
+import idelib
 import pytest
 
-from nre_utils import ebmlite_utils
+from nre_utils import ebmlite_utils, ide_utils
 
 
 @pytest.mark.parametrize(
@@ -30,3 +33,147 @@ def test_iter_config_attrs(filename, config_id, element_name, expt_result):
         )
     )
     assert calc_result == expt_result
+
+
+CONFIG_QUERIES = [(0x1CFF7F, "UIntValue"), (0x8FF7F, "TextValue")]
+
+
+@pytest.mark.parametrize(
+    "filename",
+    [
+        os.path.join("tests", "ActTest_009.IDE"),
+        os.path.join("tests", "test1.IDE"),
+    ],
+)
+def test_read_config_attrs(filename):
+    calc_result = ebmlite_utils.read_config_attrs(filename, CONFIG_QUERIES)
+
+    assert calc_result == {
+        query: list(ebmlite_utils.iter_config_attrs(filename, *query))
+        for query in CONFIG_QUERIES
+    }
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_config_attrs_table(workers):
+    filenames = [
+        os.path.join("tests", "ActTest_009.IDE"),
+        os.path.join("tests", "test1.IDE"),
+        os.path.join("tests", "test4.IDE"),
+    ]
+    calc_result = ebmlite_utils.config_attrs_table(
+        filenames, CONFIG_QUERIES, workers=workers
+    )
+
+    assert calc_result.columns.to_list() == [
+        "filename",
+        "config id",
+        "element name",
+        "value",
+    ]
+    assert calc_result.values.tolist() == [
+        [filenames[0], 0x1CFF7F, "UIntValue", 1],
+        [filenames[1], 0x8FF7F, "TextValue", "Steve's Microphone"],
+    ]
+
+
+@pytest.mark.parametrize(
+    "filename",
+    [
+        os.path.join("tests", "ActTest_009.IDE"),
+        os.path.join("tests", "test1.IDE"),
+    ],
+)
+def test_filter_elements_by_name(filename):
+    elem_names = ["RecorderConfigurationList", "RecorderConfigurationItem", "ConfigID"]
+    with open(filename, "rb") as file:
+        doc = ebmlite.loadSchema("mide_ide.xml").load(file)
+        calc_result = [
+            [elem.offset for elem in path]
+            for path in ebmlite_utils.filter_elements_by_name(doc, elem_names)
+        ]
+        expt_result = [
+            [elem.offset for elem in path]
+            for path in ebmlite_utils.iter_hierarchy(doc)
+            if [elem.name for elem in path[1:]] == elem_names
+        ]
+
+    assert calc_result
+    assert calc_result == expt_result
+
+
+def test_iter_element_headers_truncated():
+    schema = ebmlite.loadSchema("mide_ide.xml")
+    with open(os.path.join("tests", "test1.IDE"), "rb") as file:
+        data = file.read()
+    doc = schema.load(io.BytesIO(data))
+    headers = list(ebmlite_utils._iter_element_headers(doc, doc.payloadOffset))
+    assert headers[-1][2] + headers[-1][3] == len(data)
+
+    # Cut the file at every byte of an element's header, including between
+    # its ID & its size
+    offset, _, payload_offset, _ = headers[3]
+    for stop in range(offset, payload_offset + 1):
+        doc = schema.load(io.BytesIO(data[:stop]))
+        calc_result = list(ebmlite_utils._iter_element_headers(doc, doc.payloadOffset))
+        expt_result = headers[: 4 if stop == payload_offset else 3]
+        assert calc_result == expt_result
+
+
+def test_iter_element_headers_unknown_size():
+    schema = ebmlite.loadSchema("mide_ide.xml")
+    with open(os.path.join("tests", "test1.IDE"), "rb") as file:
+        data = file.read()
+    doc = schema.load(io.BytesIO(data))
+    config_list_id = schema.elementsByName["RecorderConfigurationList"].id
+    offset, _, payload_offset, size = next(
+        header
+        for header in ebmlite_utils._iter_element_headers(doc, doc.payloadOffset)
+        if header[1] == config_list_id
+    )
+
+    # Re-encode the configuration list with an unknown size, at the end of
+    # the stream
+    id_len = len(ebmlite.encoding.encodeId(config_list_id))
+    data = (
+        data[: offset + id_len] + b"\xff" + data[payload_offset : payload_offset + size]
+    )
+    doc = schema.load(io.BytesIO(data))
+    calc_result = list(ebmlite_utils._iter_element_headers(doc, doc.payloadOffset))
+
+    assert calc_result[-1] == (offset, config_list_id, offset + id_len + 1, size)
+
+
+@pytest.mark.parametrize(
+    "filename",
+    [
+        os.path.join("tests", "ActTest_009.IDE"),
+        os.path.join("tests", "test1.IDE"),
+        os.path.join("tests", "test4.IDE"),
+    ],
+)
+def test_prescan(filename):
+    calc_result = ebmlite_utils.prescan(filename)
+
+    with idelib.importFile(filename) as ds:
+        assert calc_result.serial_number == ds.recorderInfo["RecorderSerial"]
+        assert calc_result.utc_time == ds.sessions[0].utcStartTime
+        assert set(calc_result.channels) == set(ds.channels)
+
+        for ch_id, channel in ds.channels.items():
+            eventarray = channel.getSession()
+            ch_summary = calc_result.channels[ch_id]
+            assert ch_summary.sample_count == len(eventarray)
+            assert [sch.id for sch in ch_summary.subchannels] == list(
+                range(len(channel.subchannels))
+            )
+            if len(eventarray) > 0:
+                assert ch_summary.start_time == pytest.approx(
+                    1e-6 * eventarray[0][0], abs=1e-6
+                )
+
+        calc_counts = calc_result.sample_counts_by_utype()
+        for utype, ch_struct in ide_utils.dict_chs_best(
+            ide_utils.chs_by_utype(ds)
+        ).items():
+            assert calc_counts[utype] == ch_struct.length
@@ -21,6 +21,34 @@ def test_ChannelStruct():
         assert calc_result.eventarray == expt_result[2]
         assert calc_result.fs == expt_result[3]
         assert calc_result.units == expt_result[4]
+        assert calc_result.length == len(expt_result[2])
+        assert calc_result.axis_names == [
+            ds.channels[8].subchannels[i].axisName for i in [0, 1, 2]
+        ]
+
+
+def test_ChannelIndex(monkeypatch):
+    with idelib.importFile(os.path.join("tests", "test3.IDE")) as ds:
+        channel_type = type(ds.channels[8])
+        get_session = channel_type.getSession
+        calls = []
+
+        def getSession(self, *args, **kwargs):
+            calls.append(self.id)
+            return get_session(self, *args, **kwargs)
+
+        monkeypatch.setattr(channel_type, "getSession", getSession)
+        ch_structs = dict(
+            ((utype, ch_struct.channel.id), ch_struct)
+            for (utype, ch_struct) in ide_utils.ChannelIndex(ds)
+        )
+        for ch_struct in ch_structs.values():
+            _ = ch_struct.eventarray, ch_struct.length, ch_struct.fs
+
+        # Each channel's session is looked up once, and shared by its groups
+        assert sorted(calls) == sorted(set(calls))
+        assert ch_structs["acc", 8].eventarray is ch_structs["mic", 8].eventarray
+        assert ch_structs["acc", 8].length == len(ds.channels[8].getSession())
 
 
 def test_chs_by_utype():
@@ -1,11 +1,14 @@
+from functools import partial
 import os
 from unittest import mock
 
 import idelib
 import numpy as np
 import pytest
+import scipy.signal
 
 import bsvp.analyzer
+from common_utils.nre_utils.calc import integrate
 from common_utils.nre_utils.calc.stats import rms, L2_norm
 
 
@@ -46,14 +49,16 @@ def analyzer_bulk(analyzer_raw):
         "pre": mock.Mock(axis_names=["Control"]),
     }
 
+    analyzer_mock._block_len = None
+    analyzer_mock._integral_rms_method = "time"
+    analyzer_mock._peak_top_k = 1
+    analyzer_mock._peak_min_separation = 0
     analyzer_mock._accelerationFs = 3000
     analyzer_mock._accelerationData = np.random.random((3, 21))
-    analyzer_mock._accelerationResultant = L2_norm(
-        analyzer_mock._accelerationData, axis=0
+    analyzer_mock._accelerationMetrics = (
+        bsvp.analyzer.Analyzer._accelerationMetrics.func(analyzer_mock)
     )
     analyzer_mock._microphoneData = np.random.random((1, 21))
-    analyzer_mock._velocityData = np.random.random((3, 21))
-    analyzer_mock._displacementData = np.random.random((3, 21))
     analyzer_mock._pressureData = np.random.random(5)
     analyzer_mock._temperatureData = np.random.random(5)
     analyzer_mock._gyroscopeData = np.random.random(11)
@@ -76,20 +81,90 @@ class TestAnalyzer:
         )
 
     def test_velRMSFull(self, analyzer_bulk):
+        velocity = integrate._integrate(
+            analyzer_bulk._accelerationData, dt=1 / 3000, axis=1
+        )
         assert bsvp.analyzer.Analyzer.velRMSFull.func(analyzer_bulk)[
             "Resultant"
         ] == pytest.approx(
-            bsvp.analyzer.Analyzer.MPS_TO_MMPS
-            * rms(L2_norm(analyzer_bulk._velocityData, axis=0))
+            bsvp.analyzer.Analyzer.MPS_TO_MMPS * rms(L2_norm(velocity, axis=0))
         )
 
     def test_disRMSFull(self, analyzer_bulk):
+        velocity = integrate._integrate(
+            analyzer_bulk._accelerationData, dt=1 / 3000, axis=1
+        )
+        displacement = integrate._integrate(velocity, dt=1 / 3000, axis=1)
         assert bsvp.analyzer.Analyzer.disRMSFull.func(analyzer_bulk)[
             "Resultant"
         ] == pytest.approx(
-            bsvp.analyzer.Analyzer.M_TO_MM
-            * rms(L2_norm(analyzer_bulk._displacementData, axis=0))
+            bsvp.analyzer.Analyzer.M_TO_MM * rms(L2_norm(displacement, axis=0))
+        )
+
+    @pytest.mark.parametrize("name, rtol", [("velRMSFull", 0.05), ("disRMSFull", 0.25)])
+    def test_integral_rms_spectral(self, analyzer_bulk, name, rtol):
+        """Test spectral integral RMS against time-domain integration."""
+        # Band-limited noise -> no content near the highpass cutoff
+        fs = 1000
+        sos = scipy.signal.butter(4, [20, 200], btype="bandpass", fs=fs, output="sos")
+        accel = scipy.signal.sosfiltfilt(
+            sos, np.random.default_rng(0).standard_normal((3, 100000))
+        )
+
+        analyzer_bulk._accel_highpass_cutoff = 1
+        analyzer_bulk._accelerationFs = fs
+        analyzer_bulk._accelerationData = accel
+        analyzer_bulk._accelerationMetrics = (
+            bsvp.analyzer.Analyzer._accelerationMetrics.func(analyzer_bulk)
+        )
+        analyzer_bulk._PSDData = scipy.signal.welch(
+            accel, fs=fs, nperseg=fs, window="hanning", average="median"
+        )
+        analyzer_bulk._spectralIntegralRMS = partial(
+            bsvp.analyzer.Analyzer._spectralIntegralRMS, analyzer_bulk
+        )
+        expt_result = getattr(bsvp.analyzer.Analyzer, name).func(analyzer_bulk)
+
+        analyzer_bulk._integral_rms_method = "spectral"
+        calc_result = getattr(bsvp.analyzer.Analyzer, name).func(analyzer_bulk)
+
+        np.testing.assert_allclose(calc_result, expt_result, rtol=rtol)
+
+    @pytest.mark.parametrize(
+        "name, dn, unit",
+        [
+            ("velRMSFull", -1, bsvp.analyzer.Analyzer.MPS_TO_MMPS),
+            ("disRMSFull", -2, bsvp.analyzer.Analyzer.M_TO_MM),
+        ],
+    )
+    def test_integral_rms_spectral_tones(self, analyzer_bulk, name, dn, unit):
+        """Test spectral integral RMS against the exact RMS of pure tones."""
+        fs = 1000
+        t = np.arange(100 * fs) / fs
+        freqs = np.array([30, 70, 150])  # on the PSD's 1Hz frequency bins
+        amps = np.array([[1.0, 0.5, 0.25], [0.2, 2.0, 0.4], [0.3, 0.3, 3.0]])
+        accel = amps @ np.sin(2 * np.pi * freqs[:, np.newaxis] * t)
+        # A tone below the highpass cutoff (& its window leakage) -> excluded
+        accel += 10 * np.sin(2 * np.pi * 2 * t)
+
+        analyzer_bulk._accel_highpass_cutoff = 5
+        analyzer_bulk._integral_rms_method = "spectral"
+        analyzer_bulk._PSDData = scipy.signal.welch(
+            accel, fs=fs, nperseg=fs, window="hann", average="mean"
+        )
+        analyzer_bulk._spectralIntegralRMS = partial(
+            bsvp.analyzer.Analyzer._spectralIntegralRMS, analyzer_bulk
         )
+        calc_result = getattr(bsvp.analyzer.Analyzer, name).func(analyzer_bulk)
+
+        # Each tone integrates to an amplitude of A / (2πf)^n, with an RMS of
+        # 1/√2 times that; the RMS of distinct tones add in quadrature
+        expt_result = np.sqrt(
+            np.sum((amps / (2 * np.pi * freqs) ** -dn) ** 2, axis=-1) / 2
+        )
+        expt_result = unit * np.append(expt_result, L2_norm(expt_result))
+
+        np.testing.assert_allclose(calc_result, expt_result, rtol=1e-2)
 
     def test_accPeakFull(self, analyzer_bulk):
         assert bsvp.analyzer.Analyzer.accPeakFull.func(analyzer_bulk)[
@@ -166,6 +241,140 @@ class TestAnalyzer:
             rtol=1e-4,
         )
 
+    @pytest.mark.parametrize("accel_highpass_cutoff", [1, None])
+    def testLiveFileBlocks(self, ide_SSX70065, accel_highpass_cutoff):
+        """Test that streaming over blocks matches the in-memory analyses."""
+        kwargs = dict(
+            accel_start_time=None,
+            accel_end_time=None,
+            accel_start_margin=None,
+            accel_end_margin=None,
+            accel_highpass_cutoff=accel_highpass_cutoff,
+            psd_freq_bin_width=1,
+            pvss_init_freq=1,
+            pvss_bins_per_octave=12,
+            vc_init_freq=1,
+            vc_bins_per_octave=3,
+        )
+        analyzer = bsvp.analyzer.Analyzer(ide_SSX70065, **kwargs)
+        analyzer_blocks = bsvp.analyzer.Analyzer(ide_SSX70065, **kwargs, block_len=5000)
+
+        for name in ("accRMSFull", "velRMSFull", "disRMSFull", "accPeakFull"):
+            np.testing.assert_allclose(
+                getattr(analyzer_blocks, name), getattr(analyzer, name), rtol=1e-9
+            )
+        for name in ("_PSDData", "_PVSSData", "_VCCurveData"):
+            for calc_result, expt_result in zip(
+                getattr(analyzer_blocks, name), getattr(analyzer, name)
+            ):
+                np.testing.assert_allclose(calc_result, expt_result)
+
+    def testLiveFileScratch(self, ide_SSX70065, tmp_path):
+        """Test that memory-mapped scratch storage matches in-memory storage."""
+        kwargs = dict(
+            accel_start_time=None,
+            accel_end_time=None,
+            accel_start_margin=None,
+            accel_end_margin=None,
+            accel_highpass_cutoff=1,
+            psd_freq_bin_width=1,
+            pvss_init_freq=1,
+            pvss_bins_per_octave=12,
+            vc_init_freq=1,
+            vc_bins_per_octave=3,
+        )
+        analyzer = bsvp.analyzer.Analyzer(ide_SSX70065, **kwargs)
+        analyzer_scratch = bsvp.analyzer.Analyzer(
+            ide_SSX70065, **kwargs, scratch_dir=tmp_path
+        )
+
+        calc_result = analyzer_scratch._accelerationData
+        assert isinstance(calc_result, np.memmap)
+        np.testing.assert_allclose(
+            calc_result, analyzer._accelerationData, rtol=1e-9, atol=1e-12
+        )
+        assert len(os.listdir(tmp_path)) == 1
+
+        analyzer_scratch.close()
+        assert os.listdir(tmp_path) == []
+
+    def testLiveFileFloat32(self, ide_SSX70065):
+        kwargs = dict(
+            accel_start_time=None,
+            accel_end_time=None,
+            accel_start_margin=None,
+            accel_end_margin=None,
+            accel_highpass_cutoff=1,
+            psd_freq_bin_width=1,
+            pvss_init_freq=1,
+            pvss_bins_per_octave=12,
+            vc_init_freq=1,
+            vc_bins_per_octave=3,
+        )
+        analyzer = bsvp.analyzer.Analyzer(ide_SSX70065, **kwargs)
+        analyzer_float32 = bsvp.analyzer.Analyzer(
+            ide_SSX70065, **kwargs, dtype="float32"
+        )
+
+        # The full-length array is filled from the blocked stream, which only
+        # rounds the data after both (double-precision) filter passes
+        expt_result = analyzer._accelerationData.astype(np.float32)
+        calc_result = analyzer_float32._accelerationData
+        assert calc_result.dtype == np.float32
+        np.testing.assert_array_equal(
+            calc_result,
+            np.concatenate(list(analyzer_float32._accelerationStream), axis=-1),
+        )
+        np.testing.assert_allclose(calc_result, expt_result, rtol=1e-6)
+
+    def testLiveFileSegments(self, ide_SSX70065):
+        kwargs = dict(
+            accel_start_time=None,
+            accel_end_time=None,
+            accel_start_margin=None,
+            accel_end_margin=None,
+            accel_highpass_cutoff=1,
+            psd_freq_bin_width=1,
+            pvss_init_freq=1,
+            pvss_bins_per_octave=12,
+            vc_init_freq=1,
+            vc_bins_per_octave=3,
+        )
+        analyzer = bsvp.analyzer.Analyzer(ide_SSX70065, **kwargs)
+        segments = bsvp.analyzer.Analyzer(
+            ide_SSX70065, **kwargs, segment_duration=2
+        )._segmentData
+        segments_full = bsvp.analyzer.Analyzer(
+            ide_SSX70065, **kwargs, segment_duration=100
+        )._segmentData
+
+        # A segment longer than the recording covers all the data
+        assert len(segments_full.start_times) == 1
+        np.testing.assert_allclose(segments_full.metrics[0, 0], analyzer.accRMSFull)
+        np.testing.assert_allclose(segments_full.metrics[0, 3], analyzer.accPeakFull)
+        np.testing.assert_allclose(segments_full.psd[0], analyzer._PSDData[1])
+        np.testing.assert_allclose(segments_full.vc[0], analyzer._VCCurveData[1])
+
+        # Segment metrics aggregate into the whole-recording metrics
+        data_len = analyzer._accelerationData.shape[-1]
+        segment_lens = np.diff(
+            np.searchsorted(
+                ide_SSX70065.channels[32].getSession().arraySlice()[0],
+                np.append(segments.start_times, np.inf),
+            )
+        )
+        assert segment_lens.sum() == data_len
+        np.testing.assert_allclose(
+            np.sqrt(
+                np.sum(segment_lens[:, None] * segments.metrics[:, 0] ** 2, axis=0)
+                / data_len
+            ),
+            analyzer.accRMSFull,
+        )
+        np.testing.assert_allclose(
+            np.nanmax(segments.metrics[:, 3], axis=0), analyzer.accPeakFull
+        )
+
     @pytest.mark.parametrize(
         "filename",
         [
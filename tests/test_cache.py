@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from bsvp.cache import ResultCache
+
+
+@pytest.fixture
+def recording(tmp_path):
+    filename = tmp_path / "recording.IDE"
+    filename.write_bytes(b"\x00" * 100)
+    return str(filename)
+
+
+@pytest.mark.parametrize("content_digest", [False, True])
+def test_ResultCache_get_put(tmp_path, recording, content_digest):
+    cache = ResultCache(tmp_path / "cache", content_digest=content_digest)
+
+    assert cache.get(recording, "config") is None
+
+    cache.put(recording, "config", {"psd": [1, 2, 3]})
+    assert cache.get(recording, "config") == {"psd": [1, 2, 3]}
+    assert cache.get(recording, "other config") is None
+
+
+def test_ResultCache_invalidate(tmp_path, recording):
+    cache = ResultCache(tmp_path / "cache")
+    cache.put(recording, "config", "data")
+
+    with open(recording, "ab") as file:
+        file.write(b"\x01")
+
+    assert cache.get(recording, "config") is None
+    assert os.listdir(tmp_path / "cache") == []
+
+
+def test_ResultCache_evict(tmp_path, recording):
+    cache = ResultCache(tmp_path / "cache")
+    for i, config in enumerate(("a", "b", "c")):
+        cache.put(recording, config, b"\x00" * 1000)
+        # Space out access times explicitly, regardless of filesystem resolution
+        os.utime(cache._entry_path(recording, config), ns=(i * 10 ** 9,) * 2)
+    cache.get(recording, "a")
+
+    cache.max_size = 3500
+    cache.put(recording, "d", b"\x00" * 1000)
+
+    # "b" is the least recently used
+    assert cache.get(recording, "b") is None
+    for config in ("a", "c", "d"):
+        assert cache.get(recording, config) is not None
@@ -1,4 +1,5 @@
 from collections import namedtuple
+import json
 import os
 import tempfile
 
@@ -10,6 +11,7 @@ import pytest
 
 import bsvp.calc
 import bsvp.analyzer
+import bsvp.parquet
 from common_utils.nre_utils import ide_utils
 
 
@@ -91,6 +93,104 @@ def test_make_peak_windows(filename):
     assert np.all(calc_peak_times == expt_peak_times)
 
 
+@pytest.mark.parametrize("block_len", [None, 5000])
+def test_make_peak_windows_top_k(block_len):
+    filename = os.path.join("tests", "SSX70065.IDE")
+    kwargs = dict(
+        accel_highpass_cutoff=1,
+        accel_start_time=None,
+        accel_end_time=None,
+        accel_start_margin=None,
+        accel_end_margin=None,
+        psd_freq_bin_width=None,
+        pvss_init_freq=None,
+        pvss_bins_per_octave=None,
+        vc_init_freq=None,
+        vc_bins_per_octave=None,
+        block_len=block_len,
+    )
+    with idelib.importFile(filename) as ds:
+        analyzer = bsvp.analyzer.Analyzer(ds, **kwargs)
+        peaks = bsvp.calc._make_peak_windows(analyzer, margin_len=10)
+        analyzer_top_k = bsvp.analyzer.Analyzer(
+            ds, **kwargs, peak_top_k=3, peak_min_separation=100
+        )
+        peaks_top_k = bsvp.calc._make_peak_windows(analyzer_top_k, margin_len=10)
+        # a little under 100 samples, for jitter in the sample times
+        min_separation = np.timedelta64(
+            int(0.99e6 * 100 / analyzer._accelerationFs), "us"
+        )
+
+    peak_times = dict(peaks.index.droplevel("peak offset").unique())
+    peak_times_top_k = (
+        peaks_top_k.index.droplevel("peak offset").unique().to_frame(index=False)
+    )
+    assert set(peak_times_top_k["axis"]) == set(peak_times)
+    for axis, times in peak_times_top_k.groupby("axis")["peak time"]:
+        assert len(times) == 3
+        assert np.all(np.diff(np.sort(times.values)) > min_separation)
+        assert peak_times[axis] in times.values
+
+    # The largest peak's window is unchanged
+    pd.testing.assert_series_equal(
+        peaks, peaks_top_k.loc[peaks.index], check_names=False
+    )
+
+
+@pytest.mark.parametrize(
+    "filename",
+    [
+        os.path.join("tests", "SSX70065.IDE"),
+        os.path.join(".", "tests", "test1.IDE"),
+        os.path.join(".", "tests", "test4.IDE"),
+    ],
+)
+def test_make_rolling(filename):
+    window, step = 0.5, 0.25
+    builder = bsvp.calc.GetDataBuilder(accel_highpass_cutoff=1).add_rolling(
+        window=window, step=step
+    )
+    builder_blocks = bsvp.calc.GetDataBuilder(
+        accel_highpass_cutoff=1, block_len=5000
+    ).add_rolling(window=window, step=step)
+
+    calc_result = builder._get_data(filename)["rolling"]
+    pd.testing.assert_series_equal(
+        builder_blocks._get_data(filename)["rolling"], calc_result, rtol=1e-6
+    )
+    assert calc_result.index.names == ["calculation", "axis", "window start"]
+
+    with idelib.importFile(filename) as ds:
+        for utype, quantity in [
+            ("acc", "Acceleration"),
+            ("gyr", "Angular Velocity"),
+            ("mic", "Microphone"),
+        ]:
+            try:
+                ch_struct = ide_utils.get_ch_type_best(ds, utype)
+            except ide_utils.NoChannelException:
+                continue
+
+            window_starts = calc_result.loc[f"RMS {quantity}"].index.unique(
+                level="window start"
+            )
+            expt_count = (ch_struct.length - round(window * ch_struct.fs)) // round(
+                step * ch_struct.fs
+            ) + 1
+            # the gyroscope data may have an invalid prefix removed
+            assert 0 <= expt_count - len(window_starts) <= 1
+            np.testing.assert_allclose(
+                np.diff(window_starts.total_seconds()), step, rtol=1e-3
+            )
+
+    metrics = builder.add_metrics()._get_data(filename)["metrics"]
+    if "Peak Absolute Acceleration" in metrics.index:
+        # the windows cover all but the end of the data
+        peaks = calc_result.loc["Peak Absolute Acceleration"].groupby("axis").max()
+        expt_peaks = metrics.loc["Peak Absolute Acceleration"].loc[peaks.index]
+        assert np.all(peaks <= expt_peaks * (1 + 1e-9))
+
+
 @pytest.fixture
 def data_builder():
     return (
@@ -141,6 +241,11 @@ def assert_output_is_valid(output: bsvp.calc.OutputStruct):
         "metrics",
         "peaks",
         "vc_curves",
+        "segment_metrics",
+        "segment_psd",
+        "segment_vc_curves",
+        "rolling",
+        "perf",
     }.issuperset(output.dataframes)
 
     assert output.dataframes["meta"].index.name == "filename"
@@ -215,6 +320,63 @@ def assert_output_is_valid(output: bsvp.calc.OutputStruct):
             ]
         )
 
+    if "segment_metrics" in output.dataframes:
+        assert np.all(
+            output.dataframes["segment_metrics"].columns
+            == [
+                "filename",
+                "segment start",
+                "calculation",
+                "axis",
+                "value",
+                "serial number",
+                "start time",
+            ]
+        )
+
+    if "rolling" in output.dataframes:
+        assert np.all(
+            output.dataframes["rolling"].columns
+            == [
+                "filename",
+                "calculation",
+                "axis",
+                "window start",
+                "value",
+                "serial number",
+                "start time",
+            ]
+        )
+
+    if "perf" in output.dataframes:
+        assert np.all(
+            output.dataframes["perf"].columns
+            == [
+                "filename",
+                "stage",
+                "depth",
+                "start time",
+                "duration",
+                "pid",
+                "tid",
+            ]
+        )
+
+    for k in ("segment_psd", "segment_vc_curves"):
+        if k in output.dataframes:
+            assert np.all(
+                output.dataframes[k].columns
+                == [
+                    "filename",
+                    "segment start",
+                    "axis",
+                    "frequency",
+                    "value",
+                    "serial number",
+                    "start time",
+                ]
+            )
+
 
 @pytest.mark.parametrize(
     "getdata_builder",
@@ -239,6 +401,39 @@ def assert_output_is_valid(output: bsvp.calc.OutputStruct):
             .add_peaks(margin_len=1000)
             .add_vc_curves(init_freq=1, bins_per_octave=3)
         ),
+        # Process acceleration data in blocks
+        (
+            bsvp.calc.GetDataBuilder(accel_highpass_cutoff=1, block_len=10000)
+            .add_psd(freq_bin_width=1)
+            .add_pvss(init_freq=1, bins_per_octave=12)
+            .add_metrics()
+            .add_peaks(margin_len=1000)
+            .add_vc_curves(init_freq=1, bins_per_octave=3)
+        ),
+        # Spectral integral RMS
+        bsvp.calc.GetDataBuilder(accel_highpass_cutoff=1).add_metrics(
+            integral_rms_method="spectral"
+        ),
+        (
+            bsvp.calc.GetDataBuilder(accel_highpass_cutoff=1, block_len=10000)
+            .add_psd(freq_bin_width=1)
+            .add_metrics(integral_rms_method="spectral")
+        ),
+        # Per-segment analyses
+        bsvp.calc.GetDataBuilder(accel_highpass_cutoff=1).add_segments(duration=5),
+        (
+            bsvp.calc.GetDataBuilder(accel_highpass_cutoff=1, block_len=10000)
+            .add_psd(freq_bin_width=1, bins_per_octave=3)
+            .add_vc_curves(init_freq=1, bins_per_octave=3)
+            .add_segments(duration=2)
+        ),
+        # Rolling statistics
+        bsvp.calc.GetDataBuilder(accel_highpass_cutoff=1).add_rolling(window=0.5),
+        (
+            bsvp.calc.GetDataBuilder(accel_highpass_cutoff=1, block_len=10000)
+            .add_metrics()
+            .add_rolling(window=1, step=0.1, stats=["peak"])
+        ),
         # Disable highpass filter
         bsvp.calc.GetDataBuilder(accel_highpass_cutoff=None).add_psd(freq_bin_width=1),
         # Test time restrictions on acceleration data
@@ -279,6 +474,250 @@ def test_aggregate_data(getdata_builder):
     assert_output_is_valid(calc_result)
 
 
+def test_aggregate_data_workers():
+    """Test that `aggregate_data` gives the same results over a process pool."""
+    getdata_builder = (
+        bsvp.calc.GetDataBuilder(accel_highpass_cutoff=1)
+        .add_psd(freq_bin_width=1)
+        .add_metrics()
+        .add_peaks(margin_len=100)
+    )
+    filenames = [
+        os.path.join("tests", "test1.IDE"),
+        os.path.join("tests", "test2.IDE"),
+        os.path.join("tests", "test4.IDE"),
+    ]
+
+    calc_result = getdata_builder.aggregate_data(filenames)
+    calc_result_pool = getdata_builder.aggregate_data(filenames, workers=2)
+
+    assert list(calc_result_pool.dataframes) == list(calc_result.dataframes)
+    for k, df in calc_result.dataframes.items():
+        pd.testing.assert_frame_equal(calc_result_pool.dataframes[k], df)
+
+
+def test_aggregate_data_long_format():
+    """Test that `aggregate_data` tables hold the per-file data in long form."""
+    getdata_builder = (
+        bsvp.calc.GetDataBuilder(accel_highpass_cutoff=1)
+        .add_psd(freq_bin_width=1, bins_per_octave=3)
+        .add_metrics()
+        .add_peaks(margin_len=10)
+    )
+    filenames = [
+        os.path.join("tests", "test1.IDE"),
+        os.path.join("tests", "test4.IDE"),
+        os.path.join("tests", "SSX70065.IDE"),
+    ]
+
+    file_data = [getdata_builder._get_data(filename) for filename in filenames]
+    dfs = getdata_builder.aggregate_data(filenames).dataframes
+
+    assert dfs["meta"].index.to_list() == filenames
+    assert dfs["meta"].dtypes.to_dict() == {
+        "serial number": np.dtype(object),
+        "start time": np.dtype("datetime64[ns]"),
+    }
+    for k in ("psd", "metrics", "peaks"):
+        df = dfs[k]
+        for column in ("filename", "axis", "serial number"):
+            assert df[column].dtype == "category"
+        assert df["start time"].dtype == "datetime64[ns]"
+
+        expt_series = [data[k] for data in file_data if data[k] is not None]
+        expt_filenames = [
+            filename
+            for (filename, data) in zip(filenames, file_data)
+            if data[k] is not None
+        ]
+        expt_df = pd.concat(
+            expt_series, keys=expt_filenames, names=["filename"]
+        ).reset_index(name="value")
+        calc_df = df[expt_df.columns]
+        pd.testing.assert_frame_equal(
+            calc_df.astype(
+                {
+                    column: object
+                    for column in calc_df.columns
+                    if pd.api.types.is_categorical_dtype(calc_df[column])
+                }
+            ),
+            expt_df,
+        )
+        assert np.all(
+            df["serial number"].astype(object).to_numpy()
+            == dfs["meta"].loc[df["filename"].astype(object), "serial number"]
+        )
+
+
+@pytest.mark.parametrize("block_len", [None, 2 ** 14])
+def test_aggregate_data_float32(block_len):
+    """Test that single-precision results agree with double-precision ones."""
+    filenames = [
+        os.path.join("tests", "test1.IDE"),
+        os.path.join("tests", "SSX70065.IDE"),
+    ]
+
+    def get_data(dtype):
+        return (
+            bsvp.calc.GetDataBuilder(
+                accel_highpass_cutoff=1, block_len=block_len, dtype=dtype
+            )
+            .add_psd(freq_bin_width=1)
+            .add_pvss(init_freq=1, bins_per_octave=12)
+            .add_metrics()
+            .add_vc_curves(init_freq=1, bins_per_octave=3)
+            .aggregate_data(filenames)
+            .dataframes
+        )
+
+    dfs, dfs_32 = get_data("float64"), get_data("float32")
+
+    for k in ("psd", "vc_curves"):
+        df, df_32 = dfs[k], dfs_32[k]
+        assert df_32["value"].dtype == np.float64
+        np.testing.assert_allclose(
+            df_32["value"], df["value"], rtol=0, atol=1e-6 * df["value"].max()
+        )
+
+    metrics = dfs["metrics"].set_index(["filename", "calculation", "axis"])["value"]
+    metrics_32 = dfs_32["metrics"].set_index(["filename", "calculation", "axis"])[
+        "value"
+    ]
+    np.testing.assert_allclose(metrics_32, metrics, rtol=1e-5)
+
+
+@pytest.mark.parametrize("block_len", [None, 2 ** 14])
+def test_aggregate_data_psd_median_rtol(block_len):
+    """Test the approximate median-averaged PSD against the exact one."""
+    filenames = [os.path.join("tests", "SSX70065.IDE")]
+
+    def get_psd(**kwargs):
+        return (
+            bsvp.calc.GetDataBuilder(accel_highpass_cutoff=1, block_len=block_len)
+            .add_psd(freq_bin_width=1, **kwargs)
+            .aggregate_data(filenames)
+            .dataframes["psd"]["value"]
+        )
+
+    np.testing.assert_allclose(get_psd(median_rtol=0.01), get_psd(), rtol=0.01)
+    assert not np.allclose(get_psd(average="mean"), get_psd(), rtol=0.01)
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_aggregate_data_prescan(workers):
+    """Test that prescanning leaves out only recordings without relevant data."""
+    filenames = [
+        os.path.join("tests", "test1.IDE"),
+        os.path.join("tests", "test4.IDE"),  # no acceleration channel
+        os.path.join("tests", "SSX70065.IDE"),
+    ]
+
+    def get_data(prescan):
+        return (
+            bsvp.calc.GetDataBuilder(accel_highpass_cutoff=1, prescan=prescan)
+            .add_psd(freq_bin_width=1)
+            .add_peaks(margin_len=10)
+            .aggregate_data(filenames, workers=workers)
+            .dataframes
+        )
+
+    dfs, dfs_prescan = get_data(False), get_data(True)
+
+    assert dfs_prescan["meta"].index.to_list() == [filenames[0], filenames[2]]
+    for k, df in dfs.items():
+        if k == "meta":
+            df = df.drop(index=filenames[1])
+        pd.testing.assert_frame_equal(dfs_prescan[k], df, check_categorical=False)
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_aggregate_data_bad_file(workers, tmp_path):
+    """Test that bad files do not abort `aggregate_data`."""
+    corrupt_filename = str(tmp_path / "corrupt.IDE")
+    with open(corrupt_filename, "wb") as file:
+        file.write(b"\x1a\x45\xdf\xa3 not an IDE file")
+
+    getdata_builder = bsvp.calc.GetDataBuilder(accel_highpass_cutoff=1).add_metrics()
+    filenames = [
+        os.path.join("tests", "test1.IDE"),
+        os.path.join("tests", "nonexistent.IDE"),
+        corrupt_filename,
+        os.path.join("tests", "test4.IDE"),
+    ]
+
+    calc_result = getdata_builder.aggregate_data(filenames, workers=workers)
+
+    assert list(calc_result.dataframes["meta"].index) == [
+        filenames[0],
+        filenames[3],
+    ]
+    assert_output_is_valid(calc_result)
+
+
+def test_aggregate_data_cache(tmp_path):
+    """Test that cached results match freshly calculated results."""
+    filenames = [
+        os.path.join("tests", "test1.IDE"),
+        os.path.join("tests", "test4.IDE"),
+    ]
+
+    def builder(**kwargs):
+        return (
+            bsvp.calc.GetDataBuilder(accel_highpass_cutoff=1, **kwargs)
+            .add_psd(freq_bin_width=1)
+            .add_metrics()
+        )
+
+    calc_result = builder().aggregate_data(filenames)
+    builder_cached = builder(cache_dir=tmp_path)
+    builder_cached.aggregate_data(filenames)
+    assert len(os.listdir(tmp_path)) == 2
+
+    calc_result_cached = builder_cached.aggregate_data(filenames)
+    for k, df in calc_result.dataframes.items():
+        pd.testing.assert_frame_equal(calc_result_cached.dataframes[k], df)
+
+    # A different configuration must not reuse the cached results
+    builder_cached.add_peaks(margin_len=10).aggregate_data(filenames)
+    assert len(os.listdir(tmp_path)) == 4
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_aggregate_data_timing(tmp_path, workers):
+    """Test the per-stage timing instrumentation."""
+    filenames = [
+        os.path.join("tests", "test1.IDE"),
+        os.path.join("tests", "test4.IDE"),
+    ]
+    calc_result = (
+        bsvp.calc.GetDataBuilder(accel_highpass_cutoff=1, record_timing=True)
+        .add_psd(freq_bin_width=1)
+        .add_metrics()
+        .aggregate_data(filenames, workers=workers)
+    )
+    assert_output_is_valid(calc_result)
+
+    perf_df = calc_result.dataframes["perf"]
+    for filename in filenames:
+        stages = set(perf_df.loc[perf_df["filename"] == filename, "stage"])
+        assert {
+            "GetDataBuilder._get_data",
+            "idelib.importFile",
+            "_make_psd",
+            "_make_metrics",
+            "Analyzer._accelerationData",
+        }.issubset(stages)
+    assert perf_df["stage"].iloc[-1] == "GetDataBuilder.aggregate_data"
+    assert (perf_df["duration"] >= pd.Timedelta(0)).all()
+
+    calc_result.to_chrome_trace(tmp_path / "trace.json")
+    with open(tmp_path / "trace.json") as file:
+        trace = json.load(file)
+    assert len(trace["traceEvents"]) == len(perf_df)
+    assert all(event["ph"] == "X" for event in trace["traceEvents"])
+
+
 @pytest.fixture
 def output_struct():
     data = {}
@@ -574,6 +1013,62 @@ def test_output_to_csv_folder(output_struct):
             assert v.astype(str).compare(read_result.astype(str)).size == 0
 
 
+def test_output_to_parquet_folder(output_struct):
+    pytest.importorskip("pyarrow")
+
+    with tempfile.TemporaryDirectory() as dirpath:
+        output_struct.to_parquet_folder(dirpath, compression="gzip")
+
+        for k, v in output_struct.dataframes.items():
+            read_result = pd.read_parquet(os.path.join(dirpath, k + ".parquet"))
+            if "value" in v.columns:
+                assert read_result["value"].dtype == np.float32
+                v = v.assign(value=v["value"].astype(np.float32))
+
+            pd.testing.assert_frame_equal(
+                read_result,
+                v,
+                check_categorical=False,
+                check_dtype=False,
+                check_index_type=False,
+            )
+            for column in read_result.select_dtypes(exclude="number").columns:
+                if v[column].dtype == object:
+                    assert read_result[column].dtype == "category"
+
+
+def test_parquet_folder_writer(output_struct):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    with tempfile.TemporaryDirectory() as dirpath:
+        with bsvp.parquet.ParquetFolderWriter(dirpath, value_dtype=None) as writer:
+            # one row group per written file
+            for filename in output_struct.dataframes["meta"].index:
+                writer.write(
+                    {
+                        k: (
+                            df.loc[[filename]]
+                            if k == "meta"
+                            else df[df["filename"] == filename]
+                        )
+                        for (k, df) in output_struct.dataframes.items()
+                    }
+                )
+
+        for k, v in output_struct.dataframes.items():
+            filepath = os.path.join(dirpath, k + ".parquet")
+            assert pq.ParquetFile(filepath).metadata.num_row_groups == 2
+
+            pd.testing.assert_frame_equal(
+                pd.read_parquet(filepath),
+                v if k == "meta" else v.reset_index(drop=True),
+                check_categorical=False,
+                check_dtype=False,
+                check_index_type=False,
+            )
+
+
 def test_output_to_html_plots(output_struct):
     with tempfile.TemporaryDirectory() as dirpath:
         output_struct.to_html_plots(folder_path=dirpath, show=False)
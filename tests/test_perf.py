@@ -0,0 +1,30 @@
+from bsvp import perf
+
+
+@perf.timed
+def _stage_func(x):
+    with perf.stage("inner"):
+        return x + 1
+
+
+def test_PerfRecorder():
+    recorder = perf.PerfRecorder()
+    with perf.recording(recorder):
+        with perf.stage("outer"):
+            assert _stage_func(1) == 2
+
+    df = recorder.to_frame()
+    assert df.columns.to_list() == perf.PERF_COLUMNS
+    assert df["stage"].to_list() == ["outer", "_stage_func", "inner"]
+    assert df["depth"].to_list() == [0, 1, 2]
+    assert df["duration"].is_monotonic_decreasing
+
+
+def test_not_recording():
+    recorder = perf.PerfRecorder()
+    with perf.recording(recorder):
+        pass
+
+    with perf.stage("outer"):
+        assert _stage_func(1) == 2
+    assert recorder.records == []
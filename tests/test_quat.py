@@ -87,3 +87,18 @@ def test_quat_to_angvel():
     )
 
     np.testing.assert_allclose(calc_result, expt_result)
+
+
+@pytest.mark.parametrize("chunk_len", [1, 2, 5, 2 ** 14])
+@pytest.mark.parametrize("uniform", [True, False])
+def test_quat_to_angvel_chunks(chunk_len, uniform):
+    rng = np.random.default_rng(0)
+    q = rng.standard_normal((23, 4))
+    t = np.cumsum(rng.uniform(0.5, 1.5, len(q)))
+    dt = 0.1 if uniform else t
+
+    calc_result = quat.quat_to_angvel(q, dt, chunk_len=chunk_len)
+
+    q_prime = np.gradient(q, dt, axis=0, edge_order=2)
+    expt_result = 2 * quat.quat_div(q_prime, q)[..., 1:]
+    np.testing.assert_allclose(calc_result, expt_result)
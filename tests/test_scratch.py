@@ -0,0 +1,30 @@
+import gc
+import os
+
+import numpy as np
+
+from bsvp.scratch import ScratchSpace
+
+
+def test_ScratchSpace(tmp_path):
+    scratch = ScratchSpace(tmp_path)
+    assert os.path.dirname(scratch.path) == str(tmp_path)
+
+    array = scratch.empty((3, 100))
+    assert isinstance(array, np.memmap)
+    array[:] = np.arange(100)
+    np.testing.assert_array_equal(array[1], np.arange(100))
+
+    assert scratch.empty((3, 0)).shape == (3, 0)
+
+    scratch.cleanup()
+    assert os.listdir(tmp_path) == []
+
+
+def test_ScratchSpace_gc(tmp_path):
+    scratch = ScratchSpace(tmp_path)
+    scratch.empty(10)
+
+    del scratch
+    gc.collect()
+    assert os.listdir(tmp_path) == []
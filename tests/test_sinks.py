@@ -0,0 +1,141 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import bsvp.calc
+from bsvp.sinks import CsvFolderSink, ParquetDatasetSink, SqliteSink
+
+
+FILENAMES = [
+    os.path.join("tests", "test1.IDE"),
+    os.path.join("tests", "test4.IDE"),
+]
+
+
+@pytest.fixture
+def getdata_builder():
+    return (
+        bsvp.calc.GetDataBuilder(accel_highpass_cutoff=1)
+        .add_psd(freq_bin_width=1)
+        .add_metrics()
+        .add_peaks(margin_len=10)
+    )
+
+
+@pytest.fixture
+def output_folder(getdata_builder, tmp_path):
+    folder_path = tmp_path / "output"
+    getdata_builder.aggregate_data(FILENAMES).to_csv_folder(folder_path)
+    return folder_path
+
+
+def read_csv(path):
+    return pd.read_csv(path, parse_dates=["start time"])
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_CsvFolderSink(getdata_builder, output_folder, tmp_path, workers):
+    with CsvFolderSink(tmp_path / "sink") as sink:
+        written = getdata_builder.aggregate_data_to(FILENAMES, sink, workers=workers)
+    assert sorted(written) == sorted(FILENAMES)
+
+    for k in ("meta", "psd", "metrics", "peaks"):
+        df = read_csv(tmp_path / "sink" / f"{k}.csv")
+        expt_df = read_csv(output_folder / f"{k}.csv")
+        if workers is None:
+            pd.testing.assert_frame_equal(df, expt_df)
+        else:
+            assert len(df) == len(expt_df)
+            assert set(df["filename"]) == set(expt_df["filename"])
+
+
+def test_CsvFolderSink_resume(getdata_builder, output_folder, tmp_path):
+    folder_path = tmp_path / "sink"
+    with CsvFolderSink(folder_path) as sink:
+        getdata_builder.aggregate_data_to(FILENAMES[:1], sink)
+
+    # Simulate a run interrupted while writing the next file
+    with open(folder_path / "psd.csv", "a") as file:
+        file.write("partial,row\n")
+    with open(folder_path / CsvFolderSink.JOURNAL_NAME, "a") as file:
+        file.write('{"filename": ')
+
+    with CsvFolderSink(folder_path) as sink:
+        assert sink.completed() == {FILENAMES[0]}
+        written = getdata_builder.aggregate_data_to(FILENAMES, sink)
+    assert written == FILENAMES[1:]
+
+    for k in ("meta", "psd", "metrics", "peaks"):
+        pd.testing.assert_frame_equal(
+            read_csv(folder_path / f"{k}.csv"),
+            read_csv(output_folder / f"{k}.csv"),
+        )
+
+
+def test_SqliteSink(getdata_builder, output_folder, tmp_path):
+    path = tmp_path / "results.db"
+    with SqliteSink(path) as sink:
+        getdata_builder.aggregate_data_to(FILENAMES[:1], sink)
+    with SqliteSink(path) as sink:
+        assert sink.completed() == {FILENAMES[0]}
+        written = getdata_builder.aggregate_data_to(FILENAMES, sink)
+    assert written == FILENAMES[1:]
+
+    with sqlite3.connect(path) as con:
+        for k in ("meta", "psd", "metrics"):
+            df = pd.read_sql(f'SELECT * FROM "{k}"', con)
+            expt_df = pd.read_csv(output_folder / f"{k}.csv")
+            assert df.columns.to_list() == expt_df.columns.to_list()
+            assert df["filename"].to_list() == expt_df["filename"].to_list()
+            if "value" in df.columns:
+                np.testing.assert_allclose(df["value"], expt_df["value"])
+
+        peaks = pd.read_sql('SELECT * FROM "peaks"', con)
+        assert peaks["peak offset"].dtype == np.float64
+
+
+def test_SqliteSink_rollback(tmp_path):
+    path = tmp_path / "results.db"
+    with SqliteSink(path) as sink:
+        with pytest.raises(sqlite3.Error):
+            sink.write(
+                "a.IDE",
+                dict(
+                    psd=pd.DataFrame(dict(filename=["a.IDE"], value=[1.0])),
+                    metrics=pd.DataFrame({"bad column": [object()]}),
+                ),
+            )
+        assert sink.completed() == set()
+
+    with sqlite3.connect(path) as con:
+        tables = {name for (name,) in con.execute("SELECT name FROM sqlite_master")}
+    assert "psd" not in tables
+
+
+def test_ParquetDatasetSink(getdata_builder, tmp_path):
+    pytest.importorskip("pyarrow")
+
+    folder_path = tmp_path / "sink"
+    with ParquetDatasetSink(folder_path) as sink:
+        getdata_builder.aggregate_data_to(FILENAMES[:1], sink)
+
+    # Simulate a run interrupted before its "meta" file was written
+    for name in ("orphan.parquet", "orphan.tmp"):
+        (folder_path / "psd" / name).write_bytes(b"")
+
+    with ParquetDatasetSink(folder_path) as sink:
+        assert sink.completed() == {FILENAMES[0]}
+        assert os.listdir(folder_path / "psd") == os.listdir(folder_path / "meta")
+        getdata_builder.aggregate_data_to(FILENAMES, sink)
+
+    dfs = getdata_builder.aggregate_data(FILENAMES).dataframes
+    for k in ("meta", "psd", "metrics"):
+        df = pd.read_parquet(folder_path / k)
+        assert df.columns.to_list() == dfs[k].columns.to_list()
+        assert set(df.index if k == "meta" else df["filename"]) == set(
+            dfs[k].index if k == "meta" else dfs[k]["filename"]
+        )
+        assert len(df) == len(dfs[k])
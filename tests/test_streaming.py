@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+import scipy.signal
+
+from bsvp import streaming
+from common_utils.nre_utils.calc import integrate, stats
+from common_utils.nre_utils.calc.stats import rms
+
+
+np.random.seed(0)
+
+
+@pytest.mark.parametrize("length, block_len", [(5000, 128), (5000, 5000), (77, 10)])
+def test_IntegralRMS(length, block_len):
+    dt = 1e-3
+    accel = np.random.random((3, length)) - 0.4
+
+    calc_result = streaming.IntegralRMS(dt)
+    for i in range(0, length, block_len):
+        calc_result.update(accel[:, i : i + block_len])
+
+    velocity = integrate._integrate(accel, dt=dt, axis=-1)
+    displacement = integrate._integrate(velocity, dt=dt, axis=-1)
+
+    np.testing.assert_allclose(calc_result.velocity_rms, rms(velocity, axis=-1))
+    np.testing.assert_allclose(
+        calc_result.displacement_rms, rms(displacement, axis=-1), rtol=1e-6
+    )
+
+
+@pytest.mark.parametrize(
+    "average, median_rtol, rtol",
+    [("median", None, 1e-7), ("mean", None, 1e-7), ("median", 0.01, 0.01)],
+)
+@pytest.mark.parametrize("length, block_len", [(5000, 128), (5000, 5000), (400, 7)])
+def test_WelchSegments(length, block_len, average, median_rtol, rtol):
+    fs = 100
+    data = np.random.random((3, length))
+
+    calc_result = streaming.WelchSegments(
+        fs, nperseg=256, length=length, average=average, median_rtol=median_rtol
+    )
+    for i in range(0, length, block_len):
+        calc_result.update(data[:, i : i + block_len])
+
+    expt_freqs, expt_psd = scipy.signal.welch(
+        data, fs=fs, nperseg=256, window="hanning", average=average, axis=-1
+    )
+    calc_freqs, calc_psd = calc_result.psd()
+
+    np.testing.assert_allclose(calc_freqs, expt_freqs)
+    np.testing.assert_allclose(calc_psd, expt_psd, rtol=rtol)
+
+
+@pytest.mark.parametrize("top_k, min_separation", [(1, 0), (3, 0), (4, 5), (50, 9)])
+@pytest.mark.parametrize("length, block_len", [(500, 64), (500, 500), (30, 7)])
+def test_PeakTracker(length, block_len, top_k, min_separation):
+    # small integers, so that there are tied values
+    values = np.random.randint(0, 20, (2, length)).astype(float)
+
+    calc_result = streaming.PeakTracker(2, top_k, min_separation)
+    for i in range(0, length, block_len):
+        calc_result.update(values[:, i : i + block_len])
+
+    for calc_peaks, x in zip(calc_result.peaks(), values):
+        expt_peaks = [
+            i
+            for i in range(length)
+            if np.all(x[i] > x[max(i - min_separation, 0) : i])
+            and np.all(x[i] >= x[i + 1 : i + min_separation + 1])
+        ]
+        expt_peaks.sort(key=lambda i: (-x[i], i))
+        assert calc_peaks.tolist() == expt_peaks[:top_k]
+
+
+@pytest.mark.parametrize("nperseg, step", [(10, 10), (10, 3), (7, 11), (1000, 1)])
+@pytest.mark.parametrize("length, block_len", [(5000, 128), (5000, 5000), (77, 10)])
+def test_RollingStats(length, block_len, nperseg, step):
+    data = np.random.random((3, length)) - 0.5
+
+    calc_result = streaming.RollingStats(3, nperseg, step, ["rms", "peak", "mean"])
+    for i in range(0, length, block_len):
+        calc_result.update(data[:, i : i + block_len])
+
+    for name, window_func in [
+        ("rms", stats.window_rms),
+        ("peak", stats.window_max_abs),
+        ("mean", stats.window_mean),
+    ]:
+        np.testing.assert_allclose(
+            calc_result.result()[name],
+            window_func(data, nperseg, step=step),
+            atol=1e-9,
+        )
+
+
+@pytest.mark.parametrize("count", [1, 15, 16, 1000, 1001])
+def test_MedianSketch(count):
+    values = np.random.lognormal(sigma=2, size=(count, 3, 50))
+    values[:, 0, :5] = 0  # all zeros
+    values[: count // 2 + 1, 1, :5] = 0  # mostly zeros
+
+    sketch = streaming.MedianSketch((3, 50), rtol=0.01)
+    for i in range(0, count, 64):
+        sketch.update(values[i : i + 64])
+
+    assert sketch.count == count
+    np.testing.assert_allclose(sketch.median(), np.median(values, axis=0), rtol=0.01)
+
+
+def test_MedianSketch_clipped():
+    values = np.concatenate([np.ones((16, 2)), np.full((100, 2), 1e6)])
+
+    sketch = streaming.MedianSketch((2,), rtol=0.01, bucket_count=64)
+    sketch.update(values)
+
+    with pytest.warns(RuntimeWarning, match="outside the sketch's range"):
+        sketch.median()